@@ -25,9 +25,14 @@ import ure
 import sys
 import utime
 import _thread
+import urandom
+import uselect
 import usocket
-from utils import crc32
 from usr import logging
+from usr.checksum import xor_checksum, write_hex, crc32
+from usr.compact import compact_frames
+from usr.frame_counter import FrameCounter
+from usr.encoder import lgn_encoder, hbt_encoder, nrm_encoder, epb_encoder, NRM_ALERT_ID, NRM_PACKET_STATUS
 
 logger = logging.getLogger(__name__)
 
@@ -41,13 +46,62 @@ def checksum(data):
 
 
 def crc32_checksum(data):
-    data = data if isinstance(data, bytes) else str(data).encode()
-    csum = 0xFFFFFFFF
-    try:
-        csum = crc32().update(csum, data)
-    except Exception:
-        return None
-    return hex(csum)[2:].upper()
+    """CRC-32 of data as 8 uppercase hex digits."""
+    data = data if isinstance(data, (bytes, bytearray, memoryview)) else str(data).encode()
+    out = bytearray(8)
+    write_hex(out, 0, crc32(data), 8)
+    return out.decode()
+
+
+_EAGAIN = 11
+_ETIMEDOUT = 110
+_IPV4_ITEM = r"(25[0-5]|2[0-4]\d|[01]?\d\d?)"
+_IPV4_REGEX = ure.compile(r"^{item}\.{item}\.{item}\.{item}$".format(item=_IPV4_ITEM))
+_IPV6_REGEX = ure.compile(r"{}|{}|{}|{}".format(*[r"[0-9a-fA-F]" * i for i in range(1, 5)]) + ":")
+
+_HOST_CHARS = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ-"
+_IPV6_CHARS = "0123456789abcdefABCDEF:."
+
+# Failed server is not used for this milliseconds if the other server is ok.
+_FAILOVER_HOLD_MS = 300000
+_FAILURE_PENALTY_MS = 10000
+
+# Max poll wait, poll returns at once on timers added by other threads.
+_POLL_MAX_MS = 1000
+# ACK progress check interval of the I/O loop while packets or threads wait for ACK.
+_ACK_CHECK_MS = 20
+
+_CMD_KEYWORDS = (b"SET ", b"GET ", b"CLR ")
+# First bytes of keywords, "S", "G", "C".
+_CMD_HEADS = (0x53, 0x47, 0x43)
+# CR, LF, NUL
+_CMD_DELIMITERS = (0x0D, 0x0A, 0x00)
+
+
+def _check_host(host):
+    """Check host is an ipv4, ipv6 or domain name.
+
+    Args:
+        host(str): server host
+
+    Returns:
+        bool: True - valid host, False - invalid host.
+    """
+    if not host or len(host) > 253:
+        return False
+    if host.find(":") != -1:
+        return host.count(":") <= 7 and all(c in _IPV6_CHARS for c in host)
+    labels = host.split(".")
+    if all(label.isdigit() for label in labels):
+        match = _IPV4_REGEX.search(host)
+        return match is not None and match.group(0) == host
+    for label in labels:
+        if not 0 < len(label) < 64 or label[0] == "-" or label[-1] == "-":
+            return False
+        for c in label:
+            if c not in _HOST_CHARS:
+                return False
+    return True
 
 
 class StrEnum:
@@ -91,24 +145,410 @@ class AlertID(StrEnum):
     Overspeed = "17"
 
 
+class Priority:
+    """Send lanes of packets, a lower value is sent first."""
+    Emergency = 0
+    Alert = 1
+    Normal = 2
+    History = 3
+    Health = 4
+
+
+_PRIORITY_NAMES = ("emergency", "alert", "normal", "history", "health")
+
+
+class PriorityGate:
+    """Lock of the send path granted by priority.
+
+    A waiter gets the gate only when no waiter of a higher lane is waiting,
+    so an emergency packet is written next whatever is queued in lower
+    lanes. Queueing delay from request to grant is counted per lane.
+
+    Every waiter blocks on its own lock, which is released by `release`,
+    `notify` or a leaving waiter, then the waiter checks the gate again.
+    """
+
+    def __init__(self, lanes=5):
+        self.__lock = _thread.allocate_lock()
+        self.__busy = False
+        self.__waiting = [0] * lanes
+        self.__waiters = []
+        self.__count = [0] * lanes
+        self.__delay = [0] * lanes
+        self.__delay_max = [0] * lanes
+
+    def __free(self, prio, ready):
+        if self.__busy:
+            return False
+        for i in range(prio):
+            if self.__waiting[i]:
+                return False
+        return ready is None or ready()
+
+    def __wake(self):
+        # Gate lock is held, a waiter lock is locked until it is woken once.
+        for waiter in self.__waiters:
+            if waiter.locked():
+                waiter.release()
+
+    def acquire(self, prio, timeout=0, ready=None):
+        """Wait until gate is free and no higher lane is waiting.
+
+        Args:
+            prio(int): `Priority` lane
+            timeout: max milliseconds to wait, 0 is no limit (default: {0})
+            ready(function): extra condition of this lane (default: {None})
+
+        Returns:
+            bool: True - gate is held, False - timeout.
+        """
+        start = utime.ticks_ms()
+        waiter = _thread.allocate_lock()
+        waiter.acquire()
+        held = False
+        with self.__lock:
+            self.__waiting[prio] += 1
+            self.__waiters.append(waiter)
+        try:
+            while True:
+                with self.__lock:
+                    if self.__free(prio, ready):
+                        self.__busy = True
+                        held = True
+                        delay = utime.ticks_diff(utime.ticks_ms(), start)
+                        self.__count[prio] += 1
+                        self.__delay[prio] += delay
+                        if delay > self.__delay_max[prio]:
+                            self.__delay_max[prio] = delay
+                        return True
+                if not timeout:
+                    waiter.acquire()
+                    continue
+                left = timeout - utime.ticks_diff(utime.ticks_ms(), start)
+                if left <= 0 or not waiter.acquire(1, left / 1000):
+                    return False
+        finally:
+            with self.__lock:
+                self.__waiting[prio] -= 1
+                self.__waiters.remove(waiter)
+                if not held:
+                    # Lower lanes may go now.
+                    self.__wake()
+
+    def release(self):
+        with self.__lock:
+            self.__busy = False
+            self.__wake()
+
+    def notify(self):
+        """Wake waiters to check their `ready` condition again."""
+        with self.__lock:
+            self.__wake()
+
+    def busy(self):
+        return self.__busy
+
+    def stats(self):
+        """Queueing delay of each lane.
+
+        Returns:
+            dict: {lane name: {"count", "avg_ms", "max_ms"}}
+        """
+        with self.__lock:
+            return dict(
+                (name, {
+                    "count": self.__count[i],
+                    "avg_ms": self.__delay[i] // self.__count[i] if self.__count[i] else 0,
+                    "max_ms": self.__delay_max[i],
+                })
+                for i, name in enumerate(_PRIORITY_NAMES)
+            )
+
+
+class RingBuffer:
+    """Fixed size receive buffer with read/write cursors.
+
+    Socket data is read straight into the free space by `readinto`, parsed
+    bytes are released by `consume`, so no bytes object is created per read.
+    """
+
+    def __init__(self, size=1024):
+        self.buf = bytearray(size)
+        self.size = size
+        self.rpos = 0
+        self.used = 0
+        self.__view = memoryview(self.buf)
+        self.__high_water = 0
+        self.__total = 0
+        self.__dropped = 0
+
+    def free(self):
+        return self.size - self.used
+
+    def write_view(self):
+        """Get the contiguous free space after write cursor.
+
+        Returns:
+            memoryview: free space, None when buffer is full.
+        """
+        if self.used == self.size:
+            return None
+        wpos = self.rpos + self.used
+        if wpos >= self.size:
+            return self.__view[wpos - self.size:self.rpos]
+        return self.__view[wpos:]
+
+    def commit(self, size):
+        """Mark size bytes written into `write_view` as received."""
+        self.used += size
+        self.__total += size
+        if self.used > self.__high_water:
+            self.__high_water = self.used
+
+    def consume(self, size):
+        """Release size bytes after read cursor."""
+        size = min(size, self.used)
+        self.used -= size
+        self.rpos = 0 if self.used == 0 else (self.rpos + size) % self.size
+
+    def drop(self):
+        """Release all bytes which can not be parsed."""
+        self.__dropped += self.used
+        self.consume(self.used)
+
+    def read(self, start=0, end=None):
+        """Copy bytes in [start, end) after read cursor.
+
+        Returns:
+            bytes: data copy.
+        """
+        end = self.used if end is None else end
+        start += self.rpos
+        end += self.rpos
+        if end <= self.size:
+            return bytes(self.__view[start:end])
+        if start >= self.size:
+            return bytes(self.__view[start - self.size:end - self.size])
+        return bytes(self.__view[start:]) + bytes(self.__view[:end - self.size])
+
+    def stats(self):
+        """Get buffer usage.
+
+        Returns:
+            dict: size, used, high water mark, total received and dropped bytes.
+        """
+        return {
+            "size": self.size,
+            "used": self.used,
+            "high_water": self.__high_water,
+            "total": self.__total,
+            "dropped": self.__dropped,
+        }
+
+
+class CommandParser:
+    """Incremental tokenizer of server commands `SET|GET|CLR KEY[:VALUE]`.
+
+    Received bytes in the `RingBuffer` are scanned once from a cursor. A
+    command ends at CR/LF/NUL or where the next command starts, the last
+    command is kept until more data is received or `final` is given, so a
+    command split across reads is dispatched exactly once.
+    """
+
+    def __init__(self, callback):
+        """
+        Args:
+            callback: function called as callback(cmd_type, cmd_key, cmd_val)
+        """
+        self.__callback = callback
+        self.__scan = 0
+        self.__start = -1
+
+    def __dispatch(self, rx, start, end):
+        token = rx.read(start, end).decode()
+        cmd_type = token[:3]
+        index = 4
+        while index < len(token) and "A" <= token[index] <= "Z":
+            index += 1
+        cmd_key = token[4:index]
+        if not cmd_key:
+            logger.error("Server command %r is illegal.", token)
+            return
+        cmd_val = token[index + 1:] if token[index:index + 1] == ":" else token[index:]
+        try:
+            self.__callback(cmd_type, cmd_key, cmd_val)
+        except Exception as e:
+            sys.print_exception(e)
+
+    def __is_keyword(self, rx, index, end):
+        """Check bytes from index against command keywords.
+
+        Returns:
+            True - a keyword, False - not a keyword, None - bytes received so far are a keyword prefix.
+        """
+        buf = rx.buf
+        res = False
+        for keyword in _CMD_KEYWORDS:
+            pos = rx.rpos + index
+            count = 0
+            for char in keyword:
+                if index + count >= end:
+                    res = None
+                    break
+                if pos >= rx.size:
+                    pos -= rx.size
+                if buf[pos] != char:
+                    break
+                pos += 1
+                count += 1
+            else:
+                return True
+        return res
+
+    def parse(self, rx, final=False):
+        """Parse received data and release parsed bytes.
+
+        Args:
+            rx(RingBuffer): received data
+            final(bool): True - no more data for now, dispatch the last command (default: {False})
+        """
+        buf = rx.buf
+        end = rx.used
+        index = self.__scan
+        while index < end:
+            pos = rx.rpos + index
+            char = buf[pos - rx.size if pos >= rx.size else pos]
+            if char in _CMD_DELIMITERS:
+                if self.__start >= 0:
+                    self.__dispatch(rx, self.__start, index)
+                    self.__start = -1
+                index += 1
+            elif char in _CMD_HEADS:
+                keyword = self.__is_keyword(rx, index, end)
+                if keyword is None:
+                    # A keyword may be split, wait for more data to check it.
+                    break
+                if keyword:
+                    if self.__start >= 0:
+                        self.__dispatch(rx, self.__start, index)
+                    self.__start = index
+                    index += 4
+                else:
+                    index += 1
+            else:
+                index += 1
+
+        if final and self.__start >= 0:
+            self.__dispatch(rx, self.__start, end)
+            self.__start = -1
+            index = end
+        head = self.__start if self.__start >= 0 else index
+        rx.consume(head)
+        self.__scan = index - head
+        self.__start = 0 if self.__start >= 0 else -1
+        if final:
+            # Incomplete keyword is never finished.
+            rx.drop()
+            self.__scan = 0
+        elif rx.free() == 0:
+            logger.error("Server command is longer than %s bytes, dropped.", rx.size)
+            rx.drop()
+            self.__scan = 0
+            self.__start = -1
+
+
+class Endpoint:
+    """Server address with cached DNS result and connection health."""
+
+    def __init__(self, ip=None, port=None, domain=None):
+        self.ip = ip
+        self.port = port
+        self.domain = domain
+        self.addr = None
+        self.dns_at = None
+        self.socket_args = []
+        self.socket_ip = None
+        # Connect latency average, milliseconds.
+        self.latency = 0
+        self.failures = 0
+        self.failed_at = None
+
+    def configured(self):
+        return bool(self.ip or self.domain)
+
+    def update(self, host=None, port=None):
+        """Change server address.
+
+        Args:
+            host(str): ip or domain (default: {None})
+            port(int): server port (default: {None})
+
+        Returns:
+            bool: True - address is changed.
+        """
+        changed = False
+        if host is not None:
+            if _IPV4_REGEX.search(host) or (host.find(":") != -1 and _IPV6_REGEX.search(host)):
+                changed = host != self.ip or self.domain is not None
+                self.ip = host
+                self.domain = None
+            else:
+                changed = host != self.domain
+                if changed:
+                    self.ip = None
+                self.domain = host
+        if port is not None and port != self.port:
+            self.port = port
+            changed = True
+        if changed:
+            self.addr = None
+            self.dns_at = None
+            self.latency = 0
+            self.failures = 0
+        return changed
+
+    def succeeded(self, latency):
+        self.latency = latency if not self.latency else (self.latency * 3 + latency) // 4
+        self.failures = 0
+
+    def failed(self):
+        self.failures += 1
+        self.failed_at = utime.ticks_ms()
+
+    def score(self):
+        """Health score, lower is better."""
+        penalty = 0
+        if self.failures and utime.ticks_diff(utime.ticks_ms(), self.failed_at) < _FAILOVER_HOLD_MS:
+            penalty = self.failures * _FAILURE_PENALTY_MS
+        return self.latency + penalty
+
+
 class TCPUDPBase:
     """This class is TCP/UDP base module."""
 
-    def __init__(self, ip=None, port=None, domain=None, method="TCP", timeout=600, keep_alive=0):
+    def __init__(self, ip=None, port=None, domain=None, method="TCP", timeout=600, keep_alive=0, rx_size=1024,
+                 reconnect_min=1, reconnect_max=64, tx_pending_max=8192, dns_ttl=3600, standby=False,
+                 ack_failover=2):
         """
         Args:
             ip: server ip address (default: {None})
             port: server port (default: {None})
             domain: server domain (default: {None})
             method: TCP or UDP (default: {"TCP"})
+            rx_size: receive buffer size (default: {1024})
+            reconnect_min: first reconnect delay seconds, doubled after each failure (default: {1})
+            reconnect_max: max reconnect delay seconds (default: {64})
+            tx_pending_max: max bytes waiting for socket writable (default: {8192})
+            dns_ttl: seconds to reuse ip resolved from domain (default: {3600})
+            standby: keep a connection to the other server for fast failover (default: {False})
+            ack_failover: ACK timeouts in a row to fail over to the other server (default: {2})
         """
-        self.__ip = ip
-        self.__port = port
-        self.__domain = domain
-        self.__addr = None
+        # Primary and secondary server.
+        self.__endpoints = (Endpoint(ip, port, domain), Endpoint())
+        self.__endpoint = self.__endpoints[0]
         self.__method = method
         self.__socket = None
-        self.__socket_args = []
+        self.__dns_ttl = dns_ttl
         self.__timeout = timeout
         self.__keep_alive = keep_alive
         self.__socket_lock = _thread.allocate_lock()
@@ -116,36 +556,62 @@ class TCPUDPBase:
         self.__tid = None
         self.__callback = print
         self.__stack_size = 0x2000
+        self.__rx_buf = RingBuffer(rx_size)
+        self.__rx_idle_at = None
+        self.__active_at = 0
+        self.__poller = None
+        self.__tx_pending = []
+        self.__tx_pending_size = 0
+        self.__tx_pending_max = tx_pending_max
+        # Bytes accepted by `__send` on current socket, starting at its ACK size.
+        self.__tx_bytes = 0
+        self.__timers = []
+        self.__timer_lock = _thread.allocate_lock()
+        self.__reconnect_min = reconnect_min
+        self.__reconnect_max = reconnect_max
+        self.__reconnect_count = 0
+        self.__standby = standby
+        self.__standby_socket = None
+        self.__standby_endpoint = None
+        self.__switch_to = None
+        self.__ack_failover = ack_failover
+        self.__ack_failures = 0
+        if ip:
+            try:
+                self.__init_socket(self.__endpoint)
+            except ValueError as e:
+                logger.error(str(e))
 
-    def __init_addr(self):
-        """Get ip and port from domain.
+    def __init_addr(self, ep):
+        """Get ip and port from domain, resolved ip is cached for `dns_ttl` seconds.
 
         Raises:
-            ValueError: Domain DNS parsing falied.
+            ValueError: Domain DNS parsing falied and no ip resolved before.
         """
-        if self.__domain is not None and self.__domain:
-            if self.__port is None:
-                self.__port == 8883 if self.__domain.startswith("https://") else 1883
-            try:
-                addr_info = usocket.getaddrinfo(self.__domain, self.__port)
-                self.__ip = addr_info[0][-1][0]
-            except Exception as e:
-                sys.print_exception(e)
-                raise ValueError("Domain %s DNS parsing error. %s" % (self.__domain, str(e)))
-        self.__addr = (self.__ip, self.__port)
+        if ep.domain is not None and ep.domain:
+            if ep.port is None:
+                ep.port = 8883 if ep.domain.startswith("https://") else 1883
+            if ep.dns_at is None or utime.ticks_diff(utime.ticks_ms(), ep.dns_at) >= self.__dns_ttl * 1000:
+                try:
+                    addr_info = usocket.getaddrinfo(ep.domain, ep.port)
+                    ep.ip = addr_info[0][-1][0]
+                    ep.dns_at = utime.ticks_ms()
+                except Exception as e:
+                    sys.print_exception(e)
+                    if ep.ip is None:
+                        raise ValueError("Domain %s DNS parsing error. %s" % (ep.domain, str(e)))
+                    # Use last known good ip, DNS is retried on next connect.
+                    logger.warn("Domain %s DNS parsing error, use last ip %s", ep.domain, ep.ip)
+        ep.addr = (ep.ip, ep.port)
 
-    def __init_socket(self):
-        """Init socket by ip, port and method
+    def __init_socket(self, ep):
+        """Init socket by ip, port and method, args are only computed again when ip is changed.
 
         Raises:
             ValueError: ip or domain or method is illegal.
         """
-        if self.__check_ipv4():
-            socket_af = usocket.AF_INET
-        elif self.__check_ipv6():
-            socket_af = usocket.AF_INET6
-        else:
-            raise ValueError("Args ip %s is illegal!" % self.__ip)
+        if ep.socket_args and ep.socket_ip == ep.ip:
+            return
 
         if self.__method == 'TCP':
             socket_type = usocket.SOCK_STREAM
@@ -155,59 +621,102 @@ class TCPUDPBase:
             socket_proto = usocket.IPPROTO_UDP
         else:
             raise ValueError("Args method is TCP or UDP, not %s" % self.__method)
-        self.__socket_args = (socket_af, socket_type, socket_proto)
 
-    def __check_ipv4(self):
+        if self.__check_ipv4(ep.ip):
+            socket_af = usocket.AF_INET
+        elif self.__check_ipv6(ep.ip):
+            socket_af = usocket.AF_INET6
+        else:
+            raise ValueError("Args ip %s is illegal!" % ep.ip)
+        ep.socket_args = (socket_af, socket_type, socket_proto)
+        ep.socket_ip = ep.ip
+
+    def __check_ipv4(self, ip):
         """Check ip is ipv4.
 
         Returns:
             bool: True - ip is ipv4, False - ip is not ipv4
         """
-        self.__ipv4_item = r"(25[0-5]|2[0-4]\d|[01]?\d\d?)"
-        self.__ipv4_regex = r"^{item}\.{item}\.{item}\.{item}$".format(item=self.__ipv4_item)
-        if self.__ip.find(":") == -1:
-            ipv4_re = ure.search(self.__ipv4_regex, self.__ip)
+        if ip.find(":") == -1:
+            ipv4_re = _IPV4_REGEX.search(ip)
             if ipv4_re:
-                if ipv4_re.group(0) == self.__ip:
+                if ipv4_re.group(0) == ip:
                     return True
         return False
 
-    def __check_ipv6(self):
+    def __check_ipv6(self, ip):
         """Check ip is ipv6.
 
         Returns:
             bool: True - ip is ipv6, False - ip is not ipv6
         """
-        self.__ipv6_code = r"[0-9a-fA-F]"
-        ipv6_item_format = [self.__ipv6_code * i for i in range(1, 5)]
-        self.__ipv6_item = r"{}|{}|{}|{}".format(*ipv6_item_format)
-
-        if self.ip.startswith("::") or ure.search(self.__ipv6_item + ":", self.__ip):
+        if ip.startswith("::") or _IPV6_REGEX.search(ip):
             return True
         else:
             return False
 
-    def __connect(self):
+    def __open_socket(self, ep):
+        """Create socket and connect server when method is TCP.
+
+        Returns:
+            socket: connected socket, None - falied
+        """
+        try:
+            self.__init_addr(ep)
+            self.__init_socket(ep)
+            logger.debug("socket_args %s", ep.socket_args)
+            sock = usocket.socket(*ep.socket_args)
+            if self.__method == 'TCP':
+                logger.debug("addr %s", ep.addr)
+                start = utime.ticks_ms()
+                sock.connect(ep.addr)
+                ep.succeeded(utime.ticks_diff(utime.ticks_ms(), start))
+                if 1 <= self.__keep_alive <= 120:
+                    sock.setsockopt(usocket.SOL_SOCKET, usocket.TCP_KEEPALIVE, self.__keep_alive)
+            return sock
+        except Exception as e:
+            sys.print_exception(e)
+            ep.failed()
+        return None
+
+    def __use_socket(self, sock, ep):
+        """Use connected socket for sending and the I/O loop, socket lock must be held."""
+        # Socket is read and written by the I/O loop when it is ready.
+        sock.setblocking(False)
+        poller = uselect.poll()
+        poller.register(sock, uselect.POLLIN)
+        self.__socket = sock
+        self.__endpoint = ep
+        self.__poller = poller
+        self.__ack_failures = 0
+        try:
+            self.__tx_bytes = sock.getsendacksize()
+        except Exception:
+            self.__tx_bytes = 0
+
+    def __select_endpoint(self):
+        """Server with best health score, primary server is first when scores are the same."""
+        best = None
+        for ep in self.__endpoints:
+            if ep.configured() and (best is None or ep.score() < best.score()):
+                best = ep
+        return best or self.__endpoints[0]
+
+    def __connect(self, ep=None):
         """Socket connect when method is TCP
 
+        Args:
+            ep(Endpoint): server to connect, None is the server with best health score
+
         Returns:
             bool: True - success, False - falied
         """
         with self.__socket_lock:
-            self.__init_addr()
-            self.__init_socket()
-            if self.__socket_args:
-                try:
-                    logger.debug("self.__socket_args %s" % str(self.__socket_args))
-                    self.__socket = usocket.socket(*self.__socket_args)
-                    if self.__method == 'TCP':
-                        logger.debug("self.__addr %s" % str(self.__addr))
-                        self.__socket.connect(self.__addr)
-                        if 1 <= self.__keep_alive <= 120:
-                            self.__socket.setsockopt(usocket.SOL_SOCKET, usocket.TCP_KEEPALIVE, self.__keep_alive)
-                    return True
-                except Exception as e:
-                    sys.print_exception(e)
+            ep = ep or self.__select_endpoint()
+            sock = self.__open_socket(ep)
+            if sock is not None:
+                self.__use_socket(sock, ep)
+                return True
             return False
 
     def __disconnect(self):
@@ -217,6 +726,10 @@ class TCPUDPBase:
             bool: True - success, False - falied
         """
         with self.__socket_lock:
+            self.__poller = None
+            self.__tx_pending = []
+            self.__tx_pending_size = 0
+            self.tx_drained()
             if self.__socket is not None:
                 try:
                     self.__socket.close()
@@ -231,67 +744,401 @@ class TCPUDPBase:
     def __send(self, data):
         """Send data by socket.
 
+        When socket send buffer is full, the unsent bytes are queued and written
+        by the I/O loop when socket is writable.
+
         Args:
             data(bytes): byte stream
 
         Returns:
-            bool: True - success, False - falied.
+            int: socket ACK size when data is acked, 0 - falied.
         """
         with self.__socket_lock:
             if self.__socket is not None:
                 try:
                     if self.__method == "TCP":
-                        write_data_num = self.__socket.write(data)
-                        return (write_data_num == len(data))
+                        if self.__tx_pending:
+                            self.__write_pending()
+                        if self.__tx_pending:
+                            if self.__tx_pending_size + len(data) > self.__tx_pending_max:
+                                return 0
+                            self.__tx_pending.append(bytes(data))
+                            self.__tx_pending_size += len(data)
+                            self.__tx_bytes += len(data)
+                            return self.__tx_bytes
+                        write_data_num = self.__write(data)
+                        if write_data_num < len(data):
+                            pending = bytes(memoryview(data)[write_data_num:])
+                            self.__tx_pending.append(pending)
+                            self.__tx_pending_size += len(pending)
+                            if self.__poller is not None:
+                                self.__poller.modify(self.__socket, uselect.POLLIN | uselect.POLLOUT)
+                        self.__tx_bytes += len(data)
+                        return self.__tx_bytes
                     elif self.__method == "UDP":
-                        send_data_num = self.__socket.sendto(data, self.__addr)
-                        return (send_data_num == len(data))
+                        send_data_num = self.__socket.sendto(data, self.__endpoint.addr)
+                        if send_data_num == len(data):
+                            self.__tx_bytes += len(data)
+                            return self.__tx_bytes
                 except Exception as e:
                     sys.print_exception(e)
-            return False
+            return 0
+
+    def __write(self, data):
+        try:
+            return self.__socket.write(data) or 0
+        except OSError as e:
+            if e.args[0] == _EAGAIN:
+                return 0
+            raise
 
-    def __read(self, bufsize=1024):
-        """Read data by socket.
+    def __write_pending(self):
+        """Write queued bytes while socket is writable, socket lock must be held."""
+        if self.__socket is None:
+            return
+        while self.__tx_pending:
+            data = self.__tx_pending[0]
+            write_data_num = self.__write(data)
+            self.__tx_pending_size -= write_data_num
+            if write_data_num < len(data):
+                self.__tx_pending[0] = data[write_data_num:]
+                return
+            self.__tx_pending.pop(0)
+        if self.__poller is not None:
+            self.__poller.modify(self.__socket, uselect.POLLIN)
+        self.tx_drained()
+
+    def __read(self):
+        """Read data by socket into receive buffer until no data or buffer is full.
+
+        Returns:
+            int: read data size, -1 - connection is closed or failed.
+        """
+        size = 0
+        while self.__socket is not None:
+            view = self.__rx_buf.write_view()
+            if view is None:
+                break
+            try:
+                read_size = self.__socket.readinto(view)
+            except Exception as e:
+                if e.args[0] in (_EAGAIN, _ETIMEDOUT):
+                    break
+                sys.print_exception(e)
+                logger.error("%s read falied. error: %r", self.__method, e)
+                return -1
+            if read_size is None:
+                break
+            if read_size == 0:
+                if self.__method == "UDP":
+                    break
+                return -1
+            if logger.isEnabledFor("debug"):
+                logger.debug("read_data: %s", bytes(view[:read_size]))
+            self.__rx_buf.commit(read_size)
+            size += read_size
+        return size
+
+    def add_timer(self, interval, callback, periodic=False):
+        """Run callback in downlink thread after interval.
 
         Args:
-            bufsize(int): read data size.
+            interval(int): milliseconds
+            callback(function): timer callback, no args
+            periodic(bool): True - run callback every interval (default: {False})
 
         Returns:
-            bytes: read data info
+            list: timer handle for `cancel_timer`.
         """
-        logger.debug("start read")
-        data = b""
-        if self.__socket is not None:
-            while True:
-                read_data = b""
+        timer = [utime.ticks_add(utime.ticks_ms(), interval), interval if periodic else 0, callback]
+        with self.__timer_lock:
+            self.__timers.append(timer)
+        if _thread.get_ident() != self.__tid:
+            self.__wake_loop()
+        return timer
+
+    def __wake_loop(self):
+        # Socket is writable, so polling POLLOUT returns at once and the I/O loop
+        # takes the new timer, POLLOUT is cleared by `__write_pending`.
+        with self.__socket_lock:
+            if self.__poller is not None and not self.__tx_pending:
                 try:
-                    self.__socket.settimeout(0.5 if data else self.__timeout)
-                    read_data = self.__socket.recv(bufsize)
-                    logger.debug("read_data: %s" % read_data)
+                    self.__poller.modify(self.__socket, uselect.POLLIN | uselect.POLLOUT)
                 except Exception as e:
-                    if e.args[0] != 110:
-                        sys.print_exception(e)
-                        logger.error("%s read falied. error: %s" % (self.__method, repr(e)))
-                data += read_data if read_data else b""
-                if not read_data or len(data) >= bufsize:
-                    break
+                    sys.print_exception(e)
+
+    def cancel_timer(self, timer):
+        with self.__timer_lock:
+            for i in range(len(self.__timers)):
+                if self.__timers[i] is timer:
+                    self.__timers.pop(i)
+                    return True
+        return False
+
+    def __run_timers(self):
+        """Run due timers.
+
+        Returns:
+            int: milliseconds to next timer, -1 - no timer.
+        """
+        due = []
+        now = utime.ticks_ms()
+        with self.__timer_lock:
+            for timer in self.__timers[:]:
+                if utime.ticks_diff(timer[0], now) <= 0:
+                    due.append(timer[2])
+                    if timer[1]:
+                        timer[0] = utime.ticks_add(now, timer[1])
+                    else:
+                        self.__timers.remove(timer)
+        for callback in due:
+            try:
+                callback()
+            except Exception as e:
+                sys.print_exception(e)
+        wait = -1
+        now = utime.ticks_ms()
+        with self.__timer_lock:
+            for timer in self.__timers:
+                diff = max(0, utime.ticks_diff(timer[0], now))
+                if wait < 0 or diff < wait:
+                    wait = diff
+        return wait
+
+    def __connection_lost(self):
+        logger.error("%s connection status is %s", self.__method, self.status())
+        self.__endpoint.failed()
+        self.__disconnect()
+        if not self.__conn_tag:
+            return
+        if self.__swap_standby():
+            logger.info("fail over to standby server %s", self.__endpoint.addr)
+            self.__connected()
+            self.on_reconnect()
+        else:
+            self.__schedule_reconnect()
 
-        return data
+    def __schedule_reconnect(self):
+        # Exponential backoff with jitter, devices of a depot do not reconnect at the same time.
+        delay = min(self.__reconnect_max, self.__reconnect_min * (1 << min(self.__reconnect_count, 16))) * 1000
+        delay = urandom.randint(delay // 2, delay)
+        self.__reconnect_count += 1
+        logger.debug("reconnect after %s ms", delay)
+        self.add_timer(delay, self.__reconnect)
+
+    def __reconnect(self):
+        if not self.__conn_tag:
+            return
+        if self.__connect():
+            self.__connected()
+            self.on_reconnect()
+        else:
+            self.__disconnect()
+            self.__schedule_reconnect()
+
+    def __connected(self):
+        """Start standby connection and fail back check after connection is changed."""
+        self.__reconnect_count = 0
+        if self.__standby:
+            self.add_timer(0, self.__open_standby)
+        if self.__endpoint is not self.__endpoints[0]:
+            self.add_timer(_FAILOVER_HOLD_MS, self.__failback)
+
+    def __open_standby(self):
+        if not self.__conn_tag or self.__standby_socket is not None:
+            return
+        for ep in self.__endpoints:
+            if ep is not self.__endpoint and ep.configured():
+                sock = self.__open_socket(ep)
+                if sock is None:
+                    self.add_timer(_FAILOVER_HOLD_MS, self.__open_standby)
+                    return
+                with self.__socket_lock:
+                    self.__standby_socket = sock
+                    self.__standby_endpoint = ep
+                logger.debug("standby server %s connected", ep.addr)
+                return
+
+    def __close_standby(self):
+        with self.__socket_lock:
+            sock = self.__standby_socket
+            self.__standby_socket = None
+            self.__standby_endpoint = None
+        if sock is not None:
+            try:
+                sock.close()
+            except Exception as e:
+                sys.print_exception(e)
+
+    def __swap_standby(self):
+        """Use standby connection as the main connection.
+
+        Returns:
+            bool: True - success, False - no standby connection alive.
+        """
+        with self.__socket_lock:
+            sock = self.__standby_socket
+            ep = self.__standby_endpoint
+            self.__standby_socket = None
+            self.__standby_endpoint = None
+            if sock is None:
+                return False
+            try:
+                if self.__method == "TCP" and sock.getsocketsta() != 4:
+                    sock.close()
+                    ep.failed()
+                    return False
+                self.__use_socket(sock, ep)
+                return True
+            except Exception as e:
+                sys.print_exception(e)
+            return False
+
+    def __failback(self):
+        primary = self.__endpoints[0]
+        if self.__conn_tag and self.__endpoint is not primary:
+            if primary.configured() and primary.score() <= self.__endpoint.score():
+                self.__switch_to = primary
+            else:
+                self.add_timer(_FAILOVER_HOLD_MS, self.__failback)
+
+    def __switch(self):
+        """Switch server when nothing is waiting to send, new connection is made before the old one is closed."""
+        ep = self.__switch_to
+        self.__switch_to = None
+        if ep is self.__standby_endpoint:
+            old = self.__socket
+            if self.__swap_standby():
+                self.__close_socket(old)
+                self.__connected()
+                return
+        sock = self.__open_socket(ep)
+        if sock is None:
+            if ep is not self.__endpoints[0]:
+                return
+            # Primary server is still not reachable.
+            self.add_timer(_FAILOVER_HOLD_MS, self.__failback)
+            return
+        with self.__socket_lock:
+            old = self.__socket
+            self.__use_socket(sock, ep)
+        self.__close_socket(old)
+        logger.info("switch to server %s", ep.addr)
+        self.__connected()
+
+    def __close_socket(self, sock):
+        if sock is not None:
+            try:
+                sock.close()
+            except Exception as e:
+                sys.print_exception(e)
+
+    def report_ack(self, res):
+        """Report ACK result of a packet, the server is failed over after `ack_failover` timeouts in a row.
+
+        Args:
+            res(bool): True - packet is acked, False - ACK timeout.
+        """
+        if res:
+            self.__ack_failures = 0
+            return
+        self.__ack_failures += 1
+        self.__endpoint.failed()
+        if self.__conn_tag and self.__ack_failures >= self.__ack_failover:
+            self.__ack_failures = 0
+            self.__connection_lost()
+
+    def set_server(self, host=None, port=None, secondary=False):
+        """Set primary or secondary server, applied when nothing is waiting to send.
+
+        Args:
+            host(str): ip or domain (default: {None})
+            port(int): server port (default: {None})
+            secondary(bool): True - secondary server, False - primary server (default: {False})
+
+        Returns:
+            bool: True - success, False - failed
+        """
+        ep = self.__endpoints[1 if secondary else 0]
+        try:
+            if not ep.update(host, port):
+                return True
+        except Exception as e:
+            sys.print_exception(e)
+            return False
+        logger.info("%s server is changed to %s:%s", "secondary" if secondary else "primary", ep.ip or ep.domain, ep.port)
+        if ep is self.__standby_endpoint:
+            self.__close_standby()
+            if self.__conn_tag:
+                self.add_timer(0, self.__open_standby)
+        if self.__conn_tag and ep is self.__endpoint:
+            self.__switch_to = ep
+        return True
+
+    def tx_idle(self):
+        """Nothing is waiting for ACK, server can be switched without losing packets."""
+        return True
+
+    def tx_drained(self):
+        """Called when queued bytes are all written or dropped, socket lock is held."""
+        pass
+
+    def on_reconnect(self):
+        """Called after connection is recovered, in downlink thread or the thread reporting ACK failures."""
+        pass
 
     def __wait_msg(self):
-        _msg = b""
+        """Downlink thread, one poll loop for reading, pending writes, timers and reconnecting."""
         while self.__conn_tag:
-            if self.status() != 0:
-                if self.status() != 1:
-                    self.__disconnect()
-                    self.__connect()
-                logger.error("%s connection status is %s" % (self.__method, self.status()))
-                utime.sleep(1)
+            if self.__switch_to is not None and self.__poller is not None and not self.__tx_pending and self.tx_idle():
+                self.__switch()
+            wait = self.__run_timers()
+            poller = self.__poller
+            if poller is None:
+                # Waiting for reconnect timer.
+                utime.sleep_ms(wait if wait >= 0 else 1000)
                 continue
-            _msg += self.__read()
-            if not _msg:
+            if self.__rx_idle_at is not None:
+                idle = max(0, utime.ticks_diff(self.__rx_idle_at, utime.ticks_ms()))
+                wait = idle if wait < 0 else min(wait, idle)
+            try:
+                events = poller.poll(wait if 0 <= wait < _POLL_MAX_MS else _POLL_MAX_MS)
+            except Exception as e:
+                sys.print_exception(e)
+                self.__connection_lost()
                 continue
-            _msg = self.parse(_msg)
+            if not self.__conn_tag:
+                break
+            if events:
+                self.__active_at = utime.ticks_ms()
+            elif utime.ticks_diff(utime.ticks_ms(), self.__active_at) >= self.__timeout * 1000:
+                # Idle timeout, check the connection is still alive.
+                self.__active_at = utime.ticks_ms()
+                if self.status() != 0:
+                    self.__connection_lost()
+                    continue
+            for event in events:
+                if event[1] & uselect.POLLOUT:
+                    with self.__socket_lock:
+                        try:
+                            self.__write_pending()
+                        except Exception as e:
+                            sys.print_exception(e)
+                            event = (event[0], uselect.POLLERR)
+                if event[1] & uselect.POLLIN:
+                    size = self.__read()
+                    if size > 0:
+                        self.__rx_idle_at = utime.ticks_add(utime.ticks_ms(), 500)
+                        self.parse(self.__rx_buf, False)
+                    elif size < 0:
+                        event = (event[0], uselect.POLLERR)
+                if event[1] & (uselect.POLLHUP | uselect.POLLERR):
+                    self.__connection_lost()
+                    break
+            if self.__rx_idle_at is not None and utime.ticks_diff(utime.ticks_ms(), self.__rx_idle_at) >= 0:
+                # Server stops sending.
+                self.__rx_idle_at = None
+                self.parse(self.__rx_buf, True)
 
     def __downlink_thread_start(self):
         """This function starts a thread to read the data sent by the server"""
@@ -310,13 +1157,27 @@ class TCPUDPBase:
                 _thread.stop_thread(self.__tid)
             self.__tid = None
 
-    def parse(self, msg):
+    def parse(self, rx, final=True):
+        """Handle data received from server.
+
+        Args:
+            rx(RingBuffer): received data, parsed bytes should be consumed
+            final(bool): True - server stops sending for now
+        """
+        msg = rx.read()
+        rx.consume(len(msg))
         if callable(self.__callback):
             self.__callback("Receive msg %s" % repr(msg))
         else:
-            logger.info("Receive msg %s" % repr(msg))
+            logger.info("Receive msg %r", msg)
 
-        return b""
+    def rx_stats(self):
+        """Get receive buffer usage, the high water mark is for sizing `rx_size`.
+
+        Returns:
+            dict: size, used, high_water, total, dropped bytes.
+        """
+        return self.__rx_buf.stats()
 
     def status(self):
         """Get socket connection status
@@ -364,6 +1225,7 @@ class TCPUDPBase:
         if self.__conn_tag == 0:
             if self.__connect():
                 self.__conn_tag = 1
+                self.__connected()
                 self.__downlink_thread_start()
                 return True
         return False
@@ -376,101 +1238,676 @@ class TCPUDPBase:
         """
         if self.__conn_tag == 1:
             self.__conn_tag = 0
-            self.__socket.settimeout(0.1)
+            # Closed socket wakes up the poll of downlink thread.
+            res = self.__disconnect()
+            self.__close_standby()
             self.__downlink_thread_stop()
-            return self.__disconnect()
+            self.__switch_to = None
+            with self.__timer_lock:
+                self.__timers = []
+            self.__reconnect_count = 0
+            return res
         return True
 
 
 class AISClient(TCPUDPBase):
 
-    def __init__(self, ip=None, port=None, domain=None, method="TCP", timeout=600, keep_alive=0):
-        super().__init__(ip=ip, port=port, domain=domain, method=method, timeout=timeout, keep_alive=keep_alive)
-        self.fn = None
-        self.__cmd_regex = r"(SET|GET|CLR)\s([A-Z]+):?(.*)"
+    def __init__(self, ip=None, port=None, domain=None, method="TCP", timeout=600, keep_alive=0,
+                 send_window=0, ack_timeout=10, rx_size=1024, reconnect_min=1, reconnect_max=64,
+                 tx_pending_max=8192, dns_ttl=3600, standby=False, ack_failover=2, batch_size=2048,
+                 remote_server=False):
+        """
+        Args:
+            send_window: max packets in flight without ACK, 0 is waiting ACK of each packet (default: {0})
+            ack_timeout: seconds to wait ACK of a packet (default: {10})
+            rx_size: receive buffer size, max server commands length received at once (default: {1024})
+            batch_size: buffer size of batched packets, a full buffer is written at once (default: {2048})
+            remote_server: apply server address of SET PIP/PPT/SIP/SPT commands, they are only
+                given to command callback if False (default: {False})
 
-    def __send_msg(self, msg, timeout=10):
-        res = False
-        last_ack_size = self.__socket.getsendacksize()
-        if self.__send(msg):
-            logger.debug("__send msg: %s" % msg)
-            if timeout > 0:
-                run_time = 0
-                # logger.debug("run_time %s, last_ack_size %s, now_ack_size %s" % (run_time, last_ack_size, self.__socket.getsendacksize()))
-                while (run_time < timeout * 1000) and (self.__socket.getsendacksize() - last_ack_size) < len(msg):
-                    utime.sleep_ms(10)
-                    run_time += 10
-                    # logger.debug("run_time %s, last_ack_size %s, now_ack_size %s" % (run_time, last_ack_size, self.__socket.getsendacksize()))
-                res = (self.__socket.getsendacksize() - last_ack_size) == len(msg)
-            else:
-                res = True
-        return res
+            Other args are the same as `TCPUDPBase`.
+        """
+        super().__init__(ip=ip, port=port, domain=domain, method=method, timeout=timeout, keep_alive=keep_alive,
+                         rx_size=rx_size, reconnect_min=reconnect_min, reconnect_max=reconnect_max,
+                         tx_pending_max=tx_pending_max, dns_ttl=dns_ttl, standby=standby,
+                         ack_failover=ack_failover)
+        self.__frame_counter = FrameCounter(None)
+        self.__cmd_parser = CommandParser(self.__dispatch_cmd)
+        self.__send_window = send_window
+        self.__ack_timeout = ack_timeout
+        self.__remote_server = remote_server
+        self.__ack_lock = _thread.allocate_lock()
+        self.__ack_socket = None
+        self.__ack_callback = None
+        self.__ack_timer = None
+        self.__ack_waiting = 0
+        # Threads blocked until a condition of ACK progress: (lock, check function)
+        self.__ack_waiters = []
+        # In-flight packets: [ack offset, send ticks, msg, done callback, NRM/EPB items stored as history if failed]
+        self.__inflight = []
+        # ACK results found while send gate is held, reported by next `poll_ack`: (acked, failed, timeout)
+        self.__ack_results = None
+        # Encoders and socket writes are used by one lane at a time, ACKs are waited without it.
+        self.__tx_gate = PriorityGate()
+        self.__lgn_encoder = lgn_encoder()
+        self.__hbt_encoder = hbt_encoder()
+        self.__nrm_encoder = nrm_encoder()
+        self.__epb_encoder = epb_encoder()
+        self.__history = None
+        self.__history_batch_size = 4096
+        # Sequence number of the next history packet to write, packets before it are in flight.
+        self.__history_next = 0
+        self.__history_compact = False
+        self.__history_compressor = None
+        self.__compress_lock = _thread.allocate_lock()
+        # History is replayed by a worker thread after reconnect, one at a time.
+        self.__replay_lock = _thread.allocate_lock()
+        self.__replaying = False
+        self.__replay_again = False
+        # Batched packets are encoded back to back in one buffer: (kind, start, end, values)
+        self.__batch = None
+        self.__batch_size = batch_size
+        self.__batch_buf = None
+        self.__batch_pos = 0
+        self.__batch_owner = None
+        self.__batch_prio = Priority.Health
+        # Written batches waiting ACK: (ticket, [(kind, NRM values or EPB frame)])
+        self.__batch_sent = []
+        self.__scheduler = None
+        self.__motion_filter = None
 
-    def _frame_number(self):
+    def __ack_notify(self, items, res):
+        for _, _, msg, done, history in items:
+            try:
+                if not res and history:
+                    # Server did not get the packets, store them to send later like a failed write.
+                    self.__history_save(history)
+                if done is not None:
+                    done(res)
+                elif callable(self.__ack_callback):
+                    self.__ack_callback(msg, res)
+            except Exception as e:
+                sys.print_exception(e)
+
+    def __wait_window(self, prio):
+        """Wait a free slot of send window before taking the send gate, emergency packets may exceed the window."""
+        if self.__send_window <= 0 or prio == Priority.Emergency or self.__batching():
+            return
+        if self.poll_ack() >= self.__send_window:
+            self.__wait_until(lambda: len(self.__inflight) < self.__send_window, self.__ack_timeout * 1000)
+
+    def __pipeline_send(self, msg, prio, done=None, history=None):
+        """Write packet without waiting ACK, the ACK result is reported by `poll_ack`, send gate is held.
+
+        Args:
+            msg(str/bytes): packet data
+            prio(int): `Priority` lane
+            done(function): called with ACK result of this packet, default is ack callback
+            history(tuple): (kind, NRM values or EPB frame) items of msg, stored as history if ACK failed
+
+        Returns:
+            bool: True - packet is written, False - falied.
+        """
+        with self.__ack_lock:
+            # Packets of a closed socket are failed before writing to the new one, they are
+            # reported after send gate is released, history of failed packets needs the gate.
+            self.__collect_ack()
+            if self.__ack_results is not None and self.__ack_timer is None:
+                self.__ack_timer = self.add_timer(_ACK_CHECK_MS, self.__check_ack, True)
+            if self.__socket is None:
+                return False
+            if prio != Priority.Emergency and len(self.__inflight) >= self.__send_window:
+                return False
+            self.__ack_socket = self.__socket
+            end = self.__send(msg)
+            if not end:
+                return False
+            if logger.isEnabledFor("debug"):
+                logger.debug("__send msg: %s", bytes(msg))
+            if done is None and isinstance(msg, memoryview):
+                # Encoder buffer is reused by next packet.
+                msg = bytes(msg) if self.__ack_callback is not None else None
+            self.__inflight.append([end, utime.ticks_ms(), msg, done, history])
+            if self.__ack_timer is None:
+                self.__ack_timer = self.add_timer(_ACK_CHECK_MS, self.__check_ack, True)
+        return True
+
+    def __check_ack(self):
+        self.poll_ack()
+        with self.__ack_lock:
+            for lock, check in self.__ack_waiters:
+                if lock.locked():
+                    try:
+                        done = check()
+                    except Exception:
+                        # Socket is closed, the waiter finds it out.
+                        done = True
+                    if done:
+                        lock.release()
+            if not self.__inflight and self.__ack_results is None and not self.__ack_waiters \
+                    and self.__ack_timer is not None:
+                self.cancel_timer(self.__ack_timer)
+                self.__ack_timer = None
+
+    def __wait_until(self, check, timeout):
+        """Block until ACK progress meets a condition, the waiter is woken by `__check_ack` in I/O loop.
+
+        Args:
+            check(function): condition without args, it is called in I/O loop too
+            timeout: max milliseconds to wait
+
+        Returns:
+            bool: last check result.
+        """
+        if check():
+            return True
+        lock = _thread.allocate_lock()
+        lock.acquire()
+        waiter = (lock, check)
+        with self.__ack_lock:
+            self.__ack_waiters.append(waiter)
+            if self.__ack_timer is None:
+                self.__ack_timer = self.add_timer(_ACK_CHECK_MS, self.__check_ack, True)
         try:
-            if not self.fn:
-                self.fn = iter(range(1, 999999))
-            _fn = next(self.fn)
-            return "{:06d}".format(_fn)
-        except Exception:
-            self.fn = None
-            return self._frame_number()
-
-    def parse(self, msg):
-        msg = msg.decode()
-        while msg:
-            rematch = ure.match(self.__cmd_regex, msg)
-            if rematch:
-                total_cmd, cmd_type, cmd_key, cmd_val = [rematch.group(i) for i in range(4)]
-                if msg != total_cmd:
-                    sindex = msg.find(total_cmd)
-                    msg = msg[0:sindex] + msg[sindex + len(total_cmd):]
+            lock.acquire(1, timeout / 1000)
+        finally:
+            with self.__ack_lock:
+                self.__ack_waiters.remove(waiter)
+        return check()
+
+    def __collect_ack(self):
+        """Move finished packets from in-flight list to ACK results, ack lock is held."""
+        if not self.__inflight:
+            return
+        acked = []
+        failed = []
+        timeout = False
+        if self.__ack_socket is not self.__socket:
+            failed = self.__inflight
+            self.__inflight = []
+        else:
+            ack_size = self.__socket.getsendacksize()
+            now = utime.ticks_ms()
+            while self.__inflight:
+                item = self.__inflight[0]
+                if ack_size >= item[0]:
+                    acked.append(self.__inflight.pop(0))
+                elif utime.ticks_diff(now, item[1]) >= self.__ack_timeout * 1000:
+                    # TCP is in order, packets after a lost ACK are not acked too.
+                    failed = self.__inflight
+                    self.__inflight = []
+                    timeout = True
                 else:
-                    msg = ""
-                if callable(self.__callback):
-                    self.__callback(*(cmd_type, cmd_key, cmd_val))
+                    break
+        if not acked and not failed:
+            return
+        if self.__ack_results is None:
+            self.__ack_results = (acked, failed, timeout)
+        else:
+            last = self.__ack_results
+            self.__ack_results = (last[0] + acked, last[1] + failed, last[2] or timeout)
+
+    def poll_ack(self):
+        """Check ACK progress of pipelined packets and report the finished packets.
+
+        Returns:
+            int: count of packets still waiting ACK.
+        """
+        with self.__ack_lock:
+            self.__collect_ack()
+            inflight_num = len(self.__inflight)
+            results = self.__ack_results
+            self.__ack_results = None
+        if results is None:
+            return inflight_num
+        acked, failed, timeout = results
+        self.__ack_notify(acked, True)
+        self.__ack_notify(failed, False)
+        if acked:
+            self.report_ack(True)
+        if timeout:
+            self.report_ack(False)
+        return inflight_num
+
+    def flush(self, timeout=None):
+        """Wait all pipelined packets are acked or timeout.
+
+        Returns:
+            bool: True - all packets finished, False - timeout.
+        """
+        timeout = self.__ack_timeout if timeout is None else timeout
+        if self.poll_ack():
+            self.__wait_until(lambda: not self.__inflight, timeout * 1000)
+        return self.poll_ack() == 0
+
+    def set_ack_callback(self, callback):
+        """Set callback of pipelined packets ACK result, callback(msg, res)"""
+        if callable(callback):
+            self.__ack_callback = callback
+            return True
+        return False
+
+    def set_history(self, history, batch_size=4096, compact=False, compressor=None):
+        """Set store-and-forward queue for NRM/EPB packets when server is not reachable.
+
+        Args:
+            history(HistoryQueue): packets queue
+            batch_size: max bytes of one batched history write (default: {4096})
+            compact: send NRM runs of a batch as `compact` delta frames, the server must
+                decode them, a server also turns it on or off by `SET HCM:1/0` (default: {False})
+            compressor(BatchCompressor): compress batches into `$,ZLB` frames within its RAM
+                budget, batch_size should not be more than its max_size (default: {None})
+        """
+        self.__history = history
+        self.__history_batch_size = batch_size
+        self.__history_next = 0
+        self.__history_compact = compact
+        self.__history_compressor = compressor
+        return True
+
+    def __history_put(self, msg):
+        if self.__history is None:
+            return False
+        res = self.__history.put(msg)
+        logger.debug("history put %s, size %s", res, self.__history.size())
+        return res
+
+    def __history_save(self, items):
+        """Store packets which are not sent as history, items are (kind, NRM values or EPB frame)."""
+        if self.__history is None:
+            return False
+        res = True
+        for kind, data in items:
+            if kind == "NRM":
+                self.__tx_gate.acquire(Priority.History)
+                try:
+                    res = self.__history_put(self.__nrm_history_frame(data)) and res
+                finally:
+                    self.__tx_gate.release()
+            elif kind == "EPB":
+                res = self.__history_put(data) and res
+        return res
+
+    def __history_done(self, seq, count, res):
+        if res:
+            # Packets dropped by new packets meanwhile are not counted.
+            self.__history.pop(count, seq)
+        else:
+            # Later batches are failed too, history is sent again from the oldest packet.
+            self.__history_next = 0
+
+    def flush_history(self, max_batches=0):
+        """Send stored packets to server in batched writes, oldest first.
+
+        History is a low lane, a batch is written only when no bytes are
+        queued on socket, so live packets are not delayed by a long backlog.
+
+        Args:
+            max_batches: max batched writes, 0 is until queue empty or send failed (default: {0})
+
+        Returns:
+            int: packets number sent.
+        """
+        sent = 0
+        batches = 0
+        while self.__history is not None and self.status() == 0:
+            seq, frames = self.__history.read(self.__history_next, self.__history_batch_size)
+            if not frames:
+                break
+            count = len(frames)
+            if self.__history_compact:
+                batch = compact_frames(frames)
+                if logger.isEnabledFor("debug"):
+                    logger.debug("history batch %s packets, compact %s of %s bytes", count, len(batch),
+                                 sum(len(i) for i in frames))
             else:
+                batch = b"".join(frames)
+            if self.__history_compressor is not None:
+                # Compressed out of the tx gate, live packets are not delayed by it,
+                # the lock keeps compressor buffers to one thread.
+                with self.__compress_lock:
+                    packed = self.__history_compressor.compress(batch)
+                if packed is not None:
+                    batch = packed
+            self.__wait_window(Priority.History)
+            if not self.__lane(Priority.History):
+                break
+            try:
+                if seq < self.__history_next:
+                    # Packets are written by another thread meanwhile, read next ones.
+                    continue
+                self.__history_next = seq + count
+                if self.__send_window > 0:
+                    ticket = self.__send_msg(batch, Priority.History,
+                                             lambda res, seq=seq, count=count: self.__history_done(seq, count, res))
+                else:
+                    ticket = self.__send_msg(batch, Priority.History)
+                if ticket is None:
+                    self.__history_next = seq
+            finally:
+                self.__tx_gate.release()
+            if ticket is None:
+                break
+            if self.__send_window <= 0:
+                res = self.__wait_ack(ticket)
+                self.__history_done(seq, count, res)
+                if not res:
+                    break
+            sent += count
+            batches += 1
+            if batches == max_batches:
                 break
-        msg = msg.encode()
-        return msg
+        return sent
+
+    def __history_replay(self):
+        while True:
+            with self.__replay_lock:
+                if not self.__replay_again:
+                    self.__replaying = False
+                    return
+                self.__replay_again = False
+            try:
+                self.flush_history()
+            except Exception as e:
+                sys.print_exception(e)
+
+    def on_reconnect(self):
+        # Called by the I/O loop or a thread reporting ACK failures, replay waits for the
+        # send gate and ACKs which are checked by the I/O loop, so it runs in a worker thread.
+        if self.__history is None:
+            return
+        with self.__replay_lock:
+            self.__replay_again = True
+            if self.__replaying:
+                return
+            self.__replaying = True
+        _thread.stack_size(self.__stack_size)
+        _thread.start_new_thread(self.__history_replay, ())
+
+    def set_scheduler(self, scheduler):
+        """Set report scheduler, it gets SET UR/URE/URH/EO/ED commands."""
+        self.__scheduler = scheduler
+        return True
+
+    def set_motion_filter(self, motion_filter):
+        """Set filter of normal location reports, e.g. `MotionFilter`, None is no filter."""
+        self.__motion_filter = motion_filter
+        return True
+
+    def begin_batch(self):
+        """Start a batch, packets sent by this thread are kept until `end_batch`.
+
+        Packets are encoded back to back into one buffer and written with one
+        socket write and one ACK wait, each packet keeps its own frame number.
+        The batch is written in the lane of its most urgent packet. Packets of
+        other threads are sent as usual.
+        """
+        self.__tx_gate.acquire(Priority.Normal)
+        try:
+            if self.__batch is None:
+                if self.__batch_buf is None:
+                    self.__batch_buf = bytearray(self.__batch_size)
+                self.__batch = []
+                self.__batch_pos = 0
+                self.__batch_prio = Priority.Health
+                self.__batch_sent = []
+                self.__batch_owner = _thread.get_ident()
+        finally:
+            self.__tx_gate.release()
+        return True
+
+    def end_batch(self):
+        """Write batched packets.
+
+        Returns:
+            bool: True - all packets are sent, False - some packets failed,
+                the failed NRM/EPB packets are stored as history.
+        """
+        if not self.__batching():
+            return True
+        self.__tx_gate.acquire(self.__batch_prio)
+        try:
+            self.__batch_flush()
+            written = self.__batch_sent
+            self.__batch_sent = []
+            self.__batch = None
+            self.__batch_owner = None
+        finally:
+            self.__tx_gate.release()
+        res = True
+        for ticket, items in written:
+            if not self.__wait_ack(ticket):
+                self.__history_save(items)
+                res = False
+        if res and written:
+            self.flush_history(max_batches=1)
+        return res
+
+    def send_batch(self, packets):
+        """Send packets in one batch.
+
+        Args:
+            packets(list): (method name, kwargs) tuples, e.g.
+                [("send_emergency", {...}), ("send_heart_beat", {...})]
+
+        Returns:
+            bool: True - all packets are sent, False - failed.
+        """
+        self.begin_batch()
+        try:
+            for name, kwargs in packets:
+                getattr(self, name)(**kwargs)
+        finally:
+            res = self.end_batch()
+        return res
+
+    def __batching(self):
+        return self.__batch is not None and self.__batch_owner == _thread.get_ident()
+
+    def __batch_add(self, kind, msg, prio, values=None):
+        # Send gate is held.
+        size = len(msg)
+        if prio < self.__batch_prio:
+            self.__batch_prio = prio
+        if self.__batch_pos + size > len(self.__batch_buf):
+            # Buffer is full, write it and start a new one.
+            self.__batch_flush()
+            if size > len(self.__batch_buf):
+                self.__batch.append((kind, 0, size, values))
+                self.__batch_send(msg)
+                return True
+        start = self.__batch_pos
+        self.__batch_pos += size
+        self.__batch_buf[start:self.__batch_pos] = msg
+        self.__batch.append((kind, start, self.__batch_pos, values))
+        return True
+
+    def __batch_flush(self):
+        if self.__batch:
+            self.__batch_send(memoryview(self.__batch_buf)[:self.__batch_pos])
+
+    def __batch_send(self, msg):
+        # Send gate is held, batch items are the packets of msg, ACK is waited by `end_batch`.
+        items = []
+        for kind, start, end, values in self.__batch:
+            if kind == "NRM":
+                items.append((kind, values))
+            elif kind == "EPB":
+                items.append((kind, bytes(msg[start:end])))
+        ticket = self.__send_msg(msg, self.__batch_prio, history=items) if self.status() == 0 else None
+        self.__batch_sent.append((ticket, items))
+        self.__batch = []
+        self.__batch_pos = 0
+
+    def tx_idle(self):
+        return not self.__inflight and not self.__ack_waiting and not self.__tx_gate.busy()
+
+    def tx_drained(self):
+        # History and health lanes wait for it.
+        self.__tx_gate.notify()
+
+    def tx_stats(self):
+        """Queueing delay of send lanes, see `PriorityGate.stats`."""
+        return self.__tx_gate.stats()
+
+    def __tx_drained(self):
+        return not self.__tx_pending
+
+    def __lane(self, prio):
+        """Take send gate for a lane.
+
+        History and health packets wait until queued socket bytes are written,
+        so at most one of their writes is queued before an emergency packet.
+        Batched packets are only encoded, the batch is written in its own lane.
+
+        Returns:
+            bool: True - gate is held, False - timeout.
+        """
+        if prio >= Priority.History and not self.__batching():
+            return self.__tx_gate.acquire(prio, self.__ack_timeout * 1000, self.__tx_drained)
+        return self.__tx_gate.acquire(prio)
+
+    def __send_msg(self, msg, prio, done=None, history=None):
+        """Write packet, send gate is held.
+
+        Args:
+            done(function): ACK result callback of a pipelined packet (default: {None})
+            history(tuple): (kind, NRM values or EPB frame) items of msg, a pipelined packet
+                failed after it is written is stored as history (default: {None})
+
+        Returns:
+            ticket for `__wait_ack`: None - failed, True - pipelined,
+                (socket, ACK size) - written and waiting ACK.
+        """
+        if self.__send_window > 0:
+            return True if self.__pipeline_send(msg, prio, done, history) else None
+        sock = self.__socket
+        if sock is None:
+            return None
+        end = self.__send(msg)
+        if not end:
+            return None
+        if logger.isEnabledFor("debug"):
+            logger.debug("__send msg: %s", bytes(msg))
+        return (sock, end)
+
+    def __wait_ack(self, ticket):
+        """Wait ACK of a written packet without holding send gate.
+
+        Returns:
+            bool: True - acked or pipelined, False - failed.
+        """
+        if ticket is None or ticket is True:
+            return ticket is True
+        sock, end = ticket
+        res = False
+        with self.__ack_lock:
+            self.__ack_waiting += 1
+        try:
+            res = self.__wait_until(lambda: sock.getsendacksize() >= end, self.__ack_timeout * 1000)
+            self.report_ack(res)
+        except Exception as e:
+            # Socket is closed by downlink thread.
+            sys.print_exception(e)
+        finally:
+            with self.__ack_lock:
+                self.__ack_waiting -= 1
+        return res
+
+    def set_frame_counter(self, counter):
+        """Set frame number counter, e.g. `FrameCounter` kept on flash, default counter restarts on reboot."""
+        self.__frame_counter = counter
+        return True
+
+    def _frame_number(self):
+        return self.__frame_counter.next()
+
+    def __set_remote_server(self, cmd_key, cmd_val):
+        """Apply server address of a server command, it is applied without dropping queued packets."""
+        secondary = cmd_key[0] == "S"
+        if cmd_key.endswith("IP"):
+            if not _check_host(cmd_val):
+                logger.error("SET %s:%s is not a server host, ignored.", cmd_key, cmd_val)
+                return False
+            return self.set_server(host=cmd_val, secondary=secondary)
+        port = int(cmd_val) if cmd_val.isdigit() else 0
+        if not 0 < port < 65536:
+            logger.error("SET %s:%s is not a server port, ignored.", cmd_key, cmd_val)
+            return False
+        return self.set_server(port=port, secondary=secondary)
+
+    def __dispatch_cmd(self, cmd_type, cmd_key, cmd_val):
+        if cmd_type == "SET" and cmd_key in ("PIP", "PPT", "SIP", "SPT"):
+            if self.__remote_server:
+                self.__set_remote_server(cmd_key, cmd_val)
+        elif cmd_type == "SET" and cmd_key == "HCM":
+            # Compact history is only sent to a server which asks for it.
+            self.__history_compact = cmd_val == "1"
+        if self.__scheduler is not None and cmd_type == "SET":
+            self.__scheduler.on_command(cmd_key, cmd_val)
+        if callable(self.__callback):
+            self.__callback(*(cmd_type, cmd_key, cmd_val))
+
+    def parse(self, rx, final=True):
+        self.__cmd_parser.parse(rx, final)
+
+    def __nrm_frame(self, values):
+        enc = self.__nrm_encoder
+        pos = enc.encode(values)
+        check_sum = xor_checksum(enc.buf, 2, pos)
+        pos = enc.put(pos, b",")
+        pos = write_hex(enc.buf, pos, check_sum)
+        pos = enc.put(pos, b"*")
+        return enc.view[:pos]
+
+    def __nrm_history_frame(self, values):
+        values[NRM_PACKET_STATUS] = "H"
+        if values[NRM_ALERT_ID] == AlertID.LocationUpdate:
+            values[NRM_ALERT_ID] = AlertID.LocationUpdateHistory
+        return self.__nrm_frame(values)
+
+    def __epb_frame(self, values):
+        enc = self.__epb_encoder
+        pos = enc.encode(values)
+        # CRC is computed on the encoder buffer and written after `*` in place.
+        pos = write_hex(enc.buf, pos, crc32(enc.buf, 0, pos), 8)
+        return enc.view[:pos]
 
     def send_login(self, vender_id, device_name, imei, firmware_version, protocal_version, latitude,
                    latitude_dir, longitude, longtiude_dir):
-        kwgs = {
-            "vender_id": vender_id,
-            "device_name": device_name,
-            "imei": imei,
-            "firmware_version": firmware_version,
-            "protocal_version": protocal_version,
-            "latitude": latitude,
-            "latitude_dir": latitude_dir,
-            "longitude": longitude,
-            "longtiude_dir": longtiude_dir
-        }
-        msg = "$,LGN,{vender_id},{device_name},{imei},{firmware_version},{protocal_version}," \
-              "{latitude},{latitude_dir},{longitude},{longtiude_dir}*".format(**kwgs)
-        return self.__send_msg(msg)
+        values = (vender_id, device_name, imei, firmware_version, protocal_version, latitude,
+                  latitude_dir, longitude, longtiude_dir)
+        prio = Priority.Alert
+        self.__wait_window(prio)
+        self.__lane(prio)
+        try:
+            pos = self.__lgn_encoder.encode(values)
+            if self.__batching():
+                return self.__batch_add("LGN", self.__lgn_encoder.view[:pos], prio)
+            ticket = self.__send_msg(self.__lgn_encoder.view[:pos], prio)
+        finally:
+            self.__tx_gate.release()
+        return self.__wait_ack(ticket)
 
     def send_heart_beat(self, vender_id, firmware_version, imei, battery_percentage,
                         Low_battery_threshold_value, memory_percentage,
                         data_update_rate_when_ignition_on, data_update_rate_when_ignition_off,
                         digital_io_status, analog_io_status):
-        kwgs = {
-            "vender_id": vender_id,
-            "firmware_version": firmware_version,
-            "imei": imei,
-            "battery_percentage": battery_percentage,
-            "Low_battery_threshold_value": Low_battery_threshold_value,
-            "memory_percentage": memory_percentage,
-            "data_update_rate_when_ignition_on": data_update_rate_when_ignition_on,
-            "data_update_rate_when_ignition_off": data_update_rate_when_ignition_off,
-            "digital_io_status": digital_io_status,
-            "analog_io_status": analog_io_status
-        }
-        msg = "$,HBT,{vender_id},{firmware_version},{imei},{battery_percentage}," \
-              "{Low_battery_threshold_value},{memory_percentage},{data_update_rate_when_ignition_on}," \
-              "{data_update_rate_when_ignition_off},{digital_io_status},{analog_io_status}*".format(**kwgs)
-        return self.__send_msg(msg)
+        values = (vender_id, firmware_version, imei, battery_percentage, Low_battery_threshold_value,
+                  memory_percentage, data_update_rate_when_ignition_on, data_update_rate_when_ignition_off,
+                  digital_io_status, analog_io_status)
+        prio = Priority.Health
+        self.__wait_window(prio)
+        if not self.__lane(prio):
+            return False
+        try:
+            pos = self.__hbt_encoder.encode(values)
+            if self.__batching():
+                return self.__batch_add("HBT", self.__hbt_encoder.view[:pos], prio)
+            ticket = self.__send_msg(self.__hbt_encoder.view[:pos], prio)
+        finally:
+            self.__tx_gate.release()
+        return self.__wait_ack(ticket)
 
     def send_loction_alert_information(self, vender_id, firmware_version, packet_type, alert_id,
                                        packet_status, imei, vehicle_reg_no, gps_fix, date, time,
@@ -480,82 +1917,74 @@ class AISClient(TCPUDPBase):
                                        internal_battery_voltage, emergency_status, temper_alert,
                                        gsm_strength, mcc, mnc, lac, cell_id, nmr, digital_input_status,
                                        digital_output_status, analog_input_1, analog_input_2, odometer):
-        kwgs = {
-            "vender_id": vender_id,
-            "firmware_version": firmware_version,
-            "packet_type": packet_type,
-            "alert_id": alert_id,
-            "packet_status": packet_status,
-            "imei": imei,
-            "vehicle_reg_no": vehicle_reg_no,
-            "gps_fix": gps_fix,
-            "date": date,
-            "time": time,
-            "latitude": latitude,
-            "latitude_dir": latitude_dir,
-            "longitude": longitude,
-            "longitude_dir": longitude_dir,
-            "speed": speed,
-            "heading": heading,
-            "no_of_satellites": no_of_satellites,
-            "altitude": altitude,
-            "pdop": pdop,
-            "hdop": hdop,
-            "operator_name": operator_name,
-            "ignition": ignition,
-            "main_power_status": main_power_status,
-            "main_input_voltage": main_input_voltage,
-            "internal_battery_voltage": internal_battery_voltage,
-            "emergency_status": emergency_status,
-            "temper_alert": temper_alert,
-            "gsm_strength": gsm_strength,
-            "mcc": mcc,
-            "mnc": mnc,
-            "lac": lac,
-            "cell_id": cell_id,
-            "nmr": nmr,
-            "digital_input_status": digital_input_status,
-            "digital_output_status": digital_output_status,
-            "analog_input_1": analog_input_1,
-            "analog_input_2": analog_input_2,
-            "odometer": odometer,
-            "frame_number": self._frame_number()
-        }
-        msg = "$,NRM,{vender_id},{firmware_version},{packet_type},{alert_id},{packet_status}," \
-              "{imei},{vehicle_reg_no},{gps_fix},{date},{time},{latitude},{latitude_dir}," \
-              "{longitude},{longitude_dir},{speed},{heading},{no_of_satellites},{altitude}," \
-              "{pdop},{hdop},{operator_name},{ignition},{main_power_status},{main_input_voltage}," \
-              "{internal_battery_voltage},{emergency_status},{temper_alert},{gsm_strength},{mcc},{mnc}," \
-              "{lac},{cell_id},{nmr},{digital_input_status},{digital_output_status},{analog_input_1}," \
-              "{analog_input_2},{odometer},{frame_number}".format(**kwgs)
-        check_sum = checksum(msg[2:])
-        msg += ",%s*" % check_sum
-        return self.__send_msg(msg)
+        """Send location/alert information packet (NRM).
+
+        Returns:
+            bool: True - acked, or written and waiting ACK when `send_window` > 0, its ACK result
+                is given to ack callback, False - not acked, it is stored as history if history is set.
+        """
+        values = [vender_id, firmware_version, packet_type, alert_id, packet_status, imei, vehicle_reg_no,
+                  gps_fix, date, time, latitude, latitude_dir, longitude, longitude_dir, speed, heading,
+                  no_of_satellites, altitude, pdop, hdop, operator_name, ignition, main_power_status,
+                  main_input_voltage, internal_battery_voltage, emergency_status, temper_alert, gsm_strength,
+                  mcc, mnc, lac, cell_id, nmr, digital_input_status, digital_output_status, analog_input_1,
+                  analog_input_2, odometer, None]
+        motion_filter = self.__motion_filter
+        if motion_filter is not None and not motion_filter.check(values):
+            # Vehicle is not moving, the report is handled without sending.
+            return True
+        values[-1] = self._frame_number()
+        if packet_type == PacketTypes.EmergencyAlert:
+            prio = Priority.Emergency
+        elif packet_type == PacketTypes.NormalReport:
+            prio = Priority.Normal
+        else:
+            prio = Priority.Alert
+        self.__wait_window(prio)
+        self.__lane(prio)
+        try:
+            msg = self.__nrm_frame(values)
+            if motion_filter is not None:
+                motion_filter.record(len(msg))
+            if self.__batching():
+                return self.__batch_add("NRM", msg, prio, values)
+            history = (("NRM", values),)
+            ticket = self.__send_msg(msg, prio, history=history) if self.status() == 0 else None
+        finally:
+            self.__tx_gate.release()
+        if not self.__wait_ack(ticket):
+            # Server is not reachable, store packet as history packet.
+            self.__history_save(history)
+            return False
+        self.flush_history(max_batches=1)
+        return True
 
     def send_emergency(self, vender_id, packet_type, imei, packet_status, date_time, gps_fix, latitude,
                        latitude_dir, longitude, longitude_dir, altitude, speed, distance, provider,
                        vehicle_reg_no, reply_number):
-        kwgs = {
-            "vender_id": vender_id,
-            "packet_type": packet_type,
-            "imei": imei,
-            "packet_status": packet_status,
-            "date_time": date_time,
-            "gps_fix": gps_fix,
-            "latitude": latitude,
-            "latitude_dir": latitude_dir,
-            "longitude": longitude,
-            "longitude_dir": longitude_dir,
-            "altitude": altitude,
-            "speed": speed,
-            "distance": distance,
-            "provider": provider,
-            "vehicle_reg_no": vehicle_reg_no,
-            "reply_number": reply_number
-        }
-        msg = "$,EPB,{vender_id},{packet_type},{imei},{packet_status},{date_time},{gps_fix}," \
-              "{latitude},{latitude_dir},{longitude},{longitude_dir},{altitude},{speed}," \
-              "{distance},{provider},{vehicle_reg_no},{reply_number}*".format(**kwgs)
-        check_sum = crc32_checksum(msg)
-        msg += check_sum
-        return self.__send_msg(msg)
+        """Send emergency packet (EPB).
+
+        Returns:
+            bool: True - acked, or written and waiting ACK when `send_window` > 0, its ACK result
+                is given to ack callback, False - not acked, it is stored as history if history is set.
+        """
+        values = (vender_id, packet_type, imei, packet_status, date_time, gps_fix, latitude, latitude_dir,
+                  longitude, longitude_dir, altitude, speed, distance, provider, vehicle_reg_no, reply_number)
+        prio = Priority.Emergency
+        self.__lane(prio)
+        try:
+            msg = self.__epb_frame(values)
+            if self.__batching():
+                return self.__batch_add("EPB", msg, prio)
+            # Kept for history after the gate is released.
+            msg = bytes(msg)
+            history = (("EPB", msg),)
+            ticket = self.__send_msg(msg, prio, history=history) if self.status() == 0 else None
+        finally:
+            self.__tx_gate.release()
+        if not self.__wait_ack(ticket):
+            # Server is not reachable, store packet to send later.
+            self.__history_save(history)
+            return False
+        self.flush_history(max_batches=1)
+        return True
@@ -0,0 +1,203 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : checksum.py
+@author    : agent (agent@local)
+@brief     : Packet checksums on buffers without copies.
+@version   : v1.0.0
+@date      : 2026-10-18 01:15:20
+@copyright : Copyright (c) 2026
+"""
+
+try:
+    from utils import crc32 as _CRC32Engine
+except ImportError:
+    # CPython, e.g. server validation.
+    _CRC32Engine = None
+try:
+    import ubinascii as _binascii
+except ImportError:
+    try:
+        import binascii as _binascii
+    except ImportError:
+        _binascii = None
+
+_HEX = b"0123456789ABCDEF"
+_CRC32_MASK = 0xFFFFFFFF
+_CRC32_POLY = 0xEDB88320
+# CRC-32 check value of b"123456789".
+_CRC32_CHECK = (b"123456789", 0xCBF43926)
+
+
+def _xor_loop(view, csum):
+    for i in view:
+        csum ^= i
+    return csum
+
+
+def _xor_fold(view, csum):
+    # XOR of all bytes by folding the big int in halves, log2(n) steps in C.
+    size = len(view)
+    if size < 8:
+        return _xor_loop(view, csum)
+    value = int.from_bytes(view, "big")
+    while size > 1:
+        bits = (size >> 1) * 8
+        value = (value >> bits) ^ (value & ((1 << bits) - 1))
+        size -= size >> 1
+    return csum ^ value
+
+
+def _has_long_int():
+    try:
+        return int.from_bytes(b"\x01" * 32, "big") > 0
+    except Exception:
+        return False
+
+
+_xor = _xor_fold if _has_long_int() else _xor_loop
+
+
+def xor_checksum(buf, start=0, end=None, csum=0):
+    """XOR checksum of buf[start:end].
+
+    The result can be given as `csum` of the next call to update checksum
+    incrementally.
+
+    Args:
+        buf(bytes/bytearray/memoryview): data buffer
+        start(int): start offset (default: {0})
+        end(int): end offset, None is buffer end (default: {None})
+        csum(int): checksum of previous data (default: {0})
+
+    Returns:
+        int: checksum value, 0 ~ 255.
+    """
+    end = len(buf) if end is None else end
+    if end <= start:
+        return csum
+    return _xor(memoryview(buf)[start:end], csum)
+
+
+def write_hex(buf, pos, value, digits=2):
+    """Write value as uppercase hex digits into buffer.
+
+    Args:
+        buf(bytearray/memoryview): output buffer
+        pos(int): buffer position
+        value(int): value to write
+        digits(int): hex digits number, leading zeros are padded (default: {2})
+
+    Returns:
+        int: buffer position after digits.
+    """
+    end = pos + digits
+    if end > len(buf):
+        raise ValueError("Buffer is too short for %s hex digits." % digits)
+    for i in range(end - 1, pos - 1, -1):
+        buf[i] = _HEX[value & 0xF]
+        value >>= 4
+    return end
+
+
+_crc32_table_entries = None
+
+
+def _crc32_by_table(view, crc):
+    global _crc32_table_entries
+    table = _crc32_table_entries
+    if table is None:
+        table = []
+        for i in range(256):
+            value = i
+            for _ in range(8):
+                value = (value >> 1) ^ _CRC32_POLY if value & 1 else value >> 1
+            table.append(value)
+        _crc32_table_entries = table
+    crc ^= _CRC32_MASK
+    for i in view:
+        crc = table[(crc ^ i) & 0xFF] ^ (crc >> 8)
+    return crc ^ _CRC32_MASK
+
+
+def _crc32_candidates():
+    """Native CRC-32 functions `func(view, crc)`, the engine is created once and reused."""
+    funcs = []
+    if _CRC32Engine is not None:
+        try:
+            engine = _CRC32Engine()
+        except Exception:
+            engine = None
+        if engine is not None:
+            # The initial value convention of `update` is found by the check value.
+            funcs.append(("utils", lambda view, crc: engine.update(crc, view) & _CRC32_MASK))
+            funcs.append(("utils", lambda view, crc: (engine.update(crc ^ _CRC32_MASK, view) ^ _CRC32_MASK) & _CRC32_MASK))
+            funcs.append(("utils", lambda view, crc: engine.update(crc ^ _CRC32_MASK, view) & _CRC32_MASK))
+    if _binascii is not None and hasattr(_binascii, "crc32"):
+        funcs.append(("binascii", lambda view, crc: _binascii.crc32(view, crc) & _CRC32_MASK))
+    return funcs
+
+
+def _select_crc32():
+    data, value = _CRC32_CHECK
+    for name, func in _crc32_candidates():
+        # Buffers are given without copies if the function takes memoryview.
+        for copy in (False, True):
+            impl = (lambda view, crc, func=func: func(bytes(view), crc)) if copy else func
+            try:
+                view = memoryview(data)
+                if impl(view, 0) == value and impl(view[4:], impl(view[:4], 0)) == value:
+                    return name, impl
+            except Exception:
+                pass
+    return "table", _crc32_by_table
+
+
+_crc32_name, _crc32 = _select_crc32()
+
+
+def crc32(buf, start=0, end=None, crc=0):
+    """CRC-32 (IEEE 802.3, same as zlib) of buf[start:end].
+
+    `utils.crc32` is used if it is there, else `binascii.crc32`, else a
+    256 entries table. The result can be given as `crc` of the next call to
+    update CRC incrementally.
+
+    Args:
+        buf(bytes/bytearray/memoryview): data buffer
+        start(int): start offset (default: {0})
+        end(int): end offset, None is buffer end (default: {None})
+        crc(int): CRC of previous data (default: {0})
+
+    Returns:
+        int: CRC value, 0 ~ 0xFFFFFFFF.
+    """
+    end = len(buf) if end is None else end
+    if end <= start:
+        return crc
+    return _crc32(memoryview(buf)[start:end], crc)
+
+
+def crc32_table(buf, start=0, end=None, crc=0):
+    """Same as `crc32` by the 256 entries table, used when no native CRC-32 is there."""
+    end = len(buf) if end is None else end
+    if end <= start:
+        return crc
+    return _crc32_by_table(memoryview(buf)[start:end], crc)
+
+
+def crc32_backend():
+    """Name of the CRC-32 implementation used: "utils", "binascii" or "table"."""
+    return _crc32_name
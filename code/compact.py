@@ -0,0 +1,208 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : compact.py
+@author    : agent (agent@local)
+@brief     : Compact delta frames of NRM history bursts.
+@version   : v1.0.0
+@date      : 2026-10-18 01:53:39
+@copyright : Copyright (c) 2026
+
+A run of NRM frames is sent as one frame:
+
+    $,NRC,<record>;<record>;...;<record>,<checksum>*
+
+The first record is all items of the NRM frame (without checksum), so
+vender_id, firmware, IMEI, vehicle_reg_no, operator_name and NMR are sent
+once. Next records only have the changed items of the previous record:
+
+    <index>~<int>   number delta of the previous value, e.g. "9~10" of time, "38~1" of frame number
+    <index>=<text>  new value, "=" alone is an empty value
+
+A record with a different items number (e.g. NMR length changed) is all
+items after "!". The server rebuilds standard NRM frames with checksums.
+"""
+
+try:
+    from usr.checksum import xor_checksum, write_hex
+except ImportError:
+    # Server imports the module from the code folder.
+    from checksum import xor_checksum, write_hex
+
+COMPACT_HEAD = b"$,NRC,"
+_NRM_HEAD = b"$,NRM,"
+_FULL = "!"
+_DELTA = "~"
+_SET = "="
+
+
+def _number(value):
+    """(integer of digits, decimals, integer part width) of a decimal string, None if not a number."""
+    neg = value[:1] == "-"
+    body = value[1:] if neg else value
+    dot = body.find(".")
+    whole = body if dot < 0 else body[:dot]
+    frac = "" if dot < 0 else body[dot + 1:]
+    if not whole.isdigit() or (dot >= 0 and not frac.isdigit()):
+        return None
+    num = int(whole + frac)
+    return -num if neg else num, len(frac), len(whole)
+
+
+def _format(num, decimals, width):
+    text = str(abs(num))
+    if decimals:
+        text = "0" * (decimals + 1 - len(text)) + text
+        text = text[:-decimals] + "." + text[-decimals:]
+        text = "0" * (width + decimals + 1 - len(text)) + text
+    else:
+        text = "0" * (width - len(text)) + text
+    return "-" + text if num < 0 else text
+
+
+def _token(index, prev, value):
+    num = _number(value) if value else None
+    if num is not None:
+        last = _number(prev)
+        if last is not None and last[1] == num[1]:
+            delta = str(num[0] - last[0])
+            # Only deltas which rebuild the same text are used, e.g. "099" to "100" is kept as text.
+            if len(delta) < len(value) and _format(num[0], last[1], last[2]) == value:
+                return "%d%s%s" % (index, _DELTA, delta)
+    return "%d%s%s" % (index, _SET, value)
+
+
+def _apply(items, token):
+    pos = 0
+    while pos < len(token) and token[pos].isdigit():
+        pos += 1
+    index = int(token[:pos])
+    op = token[pos]
+    if op == _SET:
+        items[index] = token[pos + 1:]
+    elif op == _DELTA:
+        last = _number(items[index])
+        if last is None:
+            raise ValueError("delta of not number %s" % items[index])
+        items[index] = _format(last[0] + int(token[pos + 1:]), last[1], last[2])
+    else:
+        raise ValueError("unknown token %s" % token)
+
+
+def _nrm_items(frame):
+    """Items of a NRM frame without checksum, None if it can not be compacted."""
+    if not frame.startswith(_NRM_HEAD) or frame[-1:] != b"*":
+        return None
+    end = frame.rfind(b",")
+    if end < len(_NRM_HEAD):
+        return None
+    text = bytes(frame[len(_NRM_HEAD):end]).decode()
+    return None if ";" in text else text.split(",")
+
+
+def _compact_run(run, size):
+    """Compact frame of NRM items lists, None if it is not shorter than `size` bytes of the frames."""
+    records = []
+    prev = None
+    for items in run:
+        if prev is None:
+            records.append(",".join(items))
+        elif len(items) != len(prev):
+            records.append(_FULL + ",".join(items))
+        else:
+            records.append(",".join([_token(i, prev[i], items[i]) for i in range(len(items)) if items[i] != prev[i]]))
+        prev = items
+    body = ";".join(records).encode()
+    frame = bytearray(len(COMPACT_HEAD) + len(body) + 4)
+    pos = len(COMPACT_HEAD)
+    frame[:pos] = COMPACT_HEAD
+    frame[pos:pos + len(body)] = body
+    pos += len(body)
+    csum = xor_checksum(frame, 2, pos)
+    frame[pos] = 0x2C
+    pos = write_hex(frame, pos + 1, csum)
+    frame[pos] = 0x2A
+    return bytes(frame) if len(frame) < size else None
+
+
+def compact_frames(frames):
+    """Join history frames for one write, runs of NRM frames are sent as compact frames.
+
+    Args:
+        frames(list): history frames bytes, oldest first
+
+    Returns:
+        bytes: frames to write.
+    """
+    out = []
+    run = []
+    run_frames = []
+
+    def end_run():
+        if len(run) > 1:
+            frame = _compact_run(run, sum(len(i) for i in run_frames))
+            if frame is not None:
+                out.append(frame)
+                run_frames[:] = []
+        out.extend(run_frames)
+        run[:] = []
+        run_frames[:] = []
+
+    for frame in frames:
+        items = _nrm_items(frame)
+        if items is None:
+            end_run()
+            out.append(frame)
+        else:
+            run.append(items)
+            run_frames.append(frame)
+    end_run()
+    return b"".join(out)
+
+
+def expand_frame(frame):
+    """Rebuild standard NRM frames of a compact frame.
+
+    Args:
+        frame(bytes): `$,NRC,...*` frame
+
+    Returns:
+        list: NRM frames bytes, None if the frame is broken.
+    """
+    if not frame.startswith(COMPACT_HEAD) or frame[-1:] != b"*":
+        return None
+    end = frame.rfind(b",", 0, -1)
+    try:
+        if end < len(COMPACT_HEAD) or int(frame[end + 1:-1], 16) != xor_checksum(frame, 2, end):
+            return None
+        frames = []
+        prev = None
+        for record in frame[len(COMPACT_HEAD):end].decode().split(";"):
+            if prev is None:
+                items = record.split(",")
+            elif record[:1] == _FULL:
+                items = record[1:].split(",")
+            else:
+                items = list(prev)
+                if record:
+                    for token in record.split(","):
+                        _apply(items, token)
+            prev = items
+            nrm = bytearray(_NRM_HEAD + ",".join(items).encode() + b",00*")
+            write_hex(nrm, len(nrm) - 3, xor_checksum(nrm, 2, len(nrm) - 4))
+            frames.append(bytes(nrm))
+    except (ValueError, IndexError):
+        return None
+    return frames
@@ -0,0 +1,274 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : compressor.py
+@author    : agent (agent@local)
+@brief     : Small window deflate compressor of batched uploads.
+@version   : v1.0.0
+@date      : 2026-10-18 01:57:02
+@copyright : Copyright (c) 2026
+
+`uzlib` of QuecPython only decompresses, so batches are compressed here
+into a zlib stream (fixed Huffman codes, LZ77 matches in a small window),
+which `zlib.decompress` of the server reads. A compressed batch is sent as
+one length-prefixed frame:
+
+    $,ZLB,<zlib bytes length>,<zlib bytes>*
+"""
+
+ZLIB_HEAD = b"$,ZLB,"
+
+_LEN_BASE = (3, 4, 5, 6, 7, 8, 9, 10, 11, 13, 15, 17, 19, 23, 27, 31, 35, 43, 51, 59, 67, 83, 99, 115, 131, 163,
+             195, 227, 258)
+_LEN_EXTRA = (0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4, 5, 5, 5, 5, 0)
+_DIST_BASE = (1, 2, 3, 4, 5, 7, 9, 13, 17, 25, 33, 49, 65, 97, 129, 193, 257, 385, 513, 769, 1025, 1537, 2049,
+              3073, 4097, 6145, 8193, 12289, 16385, 24577)
+_DIST_EXTRA = (0, 0, 0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7, 8, 8, 9, 9, 10, 10, 11, 11, 12, 12, 13, 13)
+_MIN_MATCH = 3
+_MAX_MATCH = 258
+_ADLER_MOD = 65521
+# Max bytes summed before adler32 sums overflow 32 bits.
+_ADLER_BLOCK = 5552
+# Bytes per table entry, MicroPython list items are object pointers.
+_ENTRY_SIZE = 4
+
+
+def _reverse(code, bits):
+    value = 0
+    for _ in range(bits):
+        value = (value << 1) | (code & 1)
+        code >>= 1
+    return value
+
+
+def _fixed_tables():
+    """Bit reversed fixed Huffman codes of literal/length and distance symbols."""
+    lit_code = [0] * 288
+    lit_bits = bytearray(288)
+    for sym in range(288):
+        if sym < 144:
+            code, bits = 0x30 + sym, 8
+        elif sym < 256:
+            code, bits = 0x190 + sym - 144, 9
+        elif sym < 280:
+            code, bits = sym - 256, 7
+        else:
+            code, bits = 0xC0 + sym - 280, 8
+        lit_code[sym] = _reverse(code, bits)
+        lit_bits[sym] = bits
+    dist_code = bytearray(_reverse(i, 5) for i in range(30))
+    len_index = bytearray(_MAX_MATCH - _MIN_MATCH + 1)
+    for index in range(len(_LEN_BASE)):
+        end = _LEN_BASE[index + 1] if index + 1 < len(_LEN_BASE) else _MAX_MATCH + 1
+        for length in range(_LEN_BASE[index], end):
+            len_index[length - _MIN_MATCH] = index
+    # Distance symbol of distance - 1, below 256 directly, else by (distance - 1) >> 7, as zlib does.
+    dist_index = bytearray(512)
+    for index in range(len(_DIST_BASE)):
+        base = _DIST_BASE[index] - 1
+        if base < 256:
+            for dist in range(base, base + (1 << _DIST_EXTRA[index])):
+                dist_index[dist] = index
+        else:
+            for dist in range(base, base + (1 << _DIST_EXTRA[index]), 128):
+                dist_index[256 + (dist >> 7)] = index
+    return lit_code, lit_bits, dist_code, len_index, dist_index
+
+
+_LIT_CODE, _LIT_BITS, _DIST_CODE, _LEN_INDEX, _DIST_INDEX = _fixed_tables()
+
+
+class BatchCompressor:
+    """Compress batches of frames within a fixed RAM budget.
+
+    The output buffer and LZ77 hash tables are allocated here once and
+    reused, a compress call allocates only the returned frame. The budget
+    is split into the output buffer (`max_size` bytes) and two tables
+    (match heads and chains) of `window` entries, a bigger window finds
+    more repeated text of older frames.
+    """
+
+    def __init__(self, budget=8192, max_size=4096, max_chain=8):
+        """
+        Args:
+            budget: RAM bytes of buffers and tables, besides the input batch (default: {8192})
+            max_size: max bytes of a batch to compress (default: {4096})
+            max_chain: max match candidates tried per byte, more is smaller and slower (default: {8})
+
+        Raises:
+            ValueError: budget is less than max_size and a 256 bytes window.
+        """
+        window = 256
+        while window < 32768 and max_size + (window * 2) * 2 * _ENTRY_SIZE <= budget:
+            window *= 2
+        if max_size + window * 2 * _ENTRY_SIZE > budget:
+            raise ValueError("Budget %s is less than %s bytes." % (budget, max_size + window * 2 * _ENTRY_SIZE))
+        self.window = window
+        self.max_size = max_size
+        self.max_chain = max_chain
+        self.memory = max_size + window * 2 * _ENTRY_SIZE
+        self.__out = bytearray(max_size)
+        self.__head = [0] * window
+        self.__chain = [0] * window
+        self.batches = 0
+        self.raw_bytes = 0
+        self.sent_bytes = 0
+
+    def __header(self):
+        cinfo = 0
+        while (256 << cinfo) < self.window:
+            cinfo += 1
+        cmf = (cinfo << 4) | 8
+        return cmf, (31 - (cmf << 8) % 31) % 31
+
+    @staticmethod
+    def __adler32(data):
+        a = 1
+        b = 0
+        view = memoryview(data)
+        for start in range(0, len(data), _ADLER_BLOCK):
+            for byte in view[start:start + _ADLER_BLOCK]:
+                a += byte
+                b += a
+            a %= _ADLER_MOD
+            b %= _ADLER_MOD
+        return (b << 16) | a
+
+    def __deflate(self, data):
+        """zlib stream of data in output buffer, returns its size, 0 if it is not smaller than data."""
+        out = self.__out
+        # A symbol is at most 4 bytes, end of block and adler32 are 6 bytes.
+        limit = min(len(out), len(data)) - 10
+        if limit <= 0:
+            return 0
+        head = self.__head
+        chain = self.__chain
+        for i in range(len(head)):
+            head[i] = 0
+        mask = self.window - 1
+        shift = 0
+        while (1 << shift) < self.window:
+            shift += 1
+        shift = (shift + 2) // 3
+        max_chain = self.max_chain
+        lit_code = _LIT_CODE
+        lit_bits = _LIT_BITS
+        size = len(data)
+        out[0], out[1] = self.__header()
+        pos = 2
+        # BFINAL 1, BTYPE 01 fixed Huffman.
+        bitbuf = 3
+        bitcnt = 3
+        i = 0
+        while i < size:
+            if pos > limit:
+                return 0
+            best = 0
+            dist = 0
+            if i + _MIN_MATCH <= size:
+                key = ((data[i] << (shift * 2)) ^ (data[i + 1] << shift) ^ data[i + 2]) & mask
+                cand = head[key] - 1
+                chain[i & mask] = head[key]
+                head[key] = i + 1
+                low = i - self.window
+                tries = max_chain
+                longest = min(_MAX_MATCH, size - i)
+                while cand > low and cand >= 0 and tries:
+                    if data[cand + best] == data[i + best]:
+                        length = 0
+                        while length < longest and data[cand + length] == data[i + length]:
+                            length += 1
+                        if length > best:
+                            best = length
+                            dist = i - cand
+                            if length == longest:
+                                break
+                    cand = chain[cand & mask] - 1
+                    tries -= 1
+            if best >= _MIN_MATCH:
+                index = _LEN_INDEX[best - _MIN_MATCH]
+                sym = 257 + index
+                bitbuf |= lit_code[sym] << bitcnt
+                bitcnt += lit_bits[sym]
+                bitbuf |= (best - _LEN_BASE[index]) << bitcnt
+                bitcnt += _LEN_EXTRA[index]
+                index = _DIST_INDEX[dist - 1] if dist <= 256 else _DIST_INDEX[256 + ((dist - 1) >> 7)]
+                bitbuf |= _DIST_CODE[index] << bitcnt
+                bitcnt += 5
+                bitbuf |= (dist - _DIST_BASE[index]) << bitcnt
+                bitcnt += _DIST_EXTRA[index]
+                # Matched bytes are added to the hash chains too.
+                end = min(i + best, size - _MIN_MATCH + 1)
+                j = i + 1
+                while j < end:
+                    key = ((data[j] << (shift * 2)) ^ (data[j + 1] << shift) ^ data[j + 2]) & mask
+                    chain[j & mask] = head[key]
+                    head[key] = j + 1
+                    j += 1
+                i += best
+            else:
+                sym = data[i]
+                bitbuf |= lit_code[sym] << bitcnt
+                bitcnt += lit_bits[sym]
+                i += 1
+            while bitcnt >= 8:
+                out[pos] = bitbuf & 0xFF
+                pos += 1
+                bitbuf >>= 8
+                bitcnt -= 8
+        bitbuf |= lit_code[256] << bitcnt
+        bitcnt += lit_bits[256]
+        while bitcnt > 0:
+            out[pos] = bitbuf & 0xFF
+            pos += 1
+            bitbuf >>= 8
+            bitcnt -= 8
+        adler = self.__adler32(data)
+        for shift in (24, 16, 8, 0):
+            out[pos] = (adler >> shift) & 0xFF
+            pos += 1
+        return pos
+
+    def compress(self, data):
+        """Compress a batch into a `$,ZLB` frame.
+
+        Args:
+            data(bytes/bytearray): batched frames
+
+        Returns:
+            bytes: compressed frame, None if data is longer than `max_size` or is
+                not smaller compressed, it should be sent as it is.
+        """
+        if not data or len(data) > self.max_size:
+            return None
+        size = self.__deflate(data)
+        if not size:
+            return None
+        frame = ZLIB_HEAD + str(size).encode() + b"," + bytes(memoryview(self.__out)[:size]) + b"*"
+        if len(frame) >= len(data):
+            return None
+        self.batches += 1
+        self.raw_bytes += len(data)
+        self.sent_bytes += len(frame)
+        return frame
+
+    def stats(self):
+        return {
+            "window": self.window,
+            "memory": self.memory,
+            "batches": self.batches,
+            "raw_bytes": self.raw_bytes,
+            "sent_bytes": self.sent_bytes,
+        }
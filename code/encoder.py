@@ -0,0 +1,183 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : encoder.py
+@author    : agent (agent@local)
+@brief     : Precompiled AIS-140 packet encoders.
+@version   : v1.0.0
+@date      : 2026-10-18 01:14:28
+@copyright : Copyright (c) 2026
+"""
+
+LGN_FIELDS = (
+    "vender_id", "device_name", "imei", "firmware_version", "protocal_version", "latitude",
+    "latitude_dir", "longitude", "longtiude_dir"
+)
+
+HBT_FIELDS = (
+    "vender_id", "firmware_version", "imei", "battery_percentage", "Low_battery_threshold_value",
+    "memory_percentage", "data_update_rate_when_ignition_on", "data_update_rate_when_ignition_off",
+    "digital_io_status", "analog_io_status"
+)
+
+NRM_FIELDS = (
+    "vender_id", "firmware_version", "packet_type", "alert_id", "packet_status", "imei",
+    "vehicle_reg_no", "gps_fix", "date", "time", "latitude", "latitude_dir", "longitude",
+    "longitude_dir", "speed", "heading", "no_of_satellites", "altitude", "pdop", "hdop",
+    "operator_name", "ignition", "main_power_status", "main_input_voltage",
+    "internal_battery_voltage", "emergency_status", "temper_alert", "gsm_strength", "mcc", "mnc",
+    "lac", "cell_id", "nmr", "digital_input_status", "digital_output_status", "analog_input_1",
+    "analog_input_2", "odometer", "frame_number"
+)
+
+EPB_FIELDS = (
+    "vender_id", "packet_type", "imei", "packet_status", "date_time", "gps_fix", "latitude",
+    "latitude_dir", "longitude", "longitude_dir", "altitude", "speed", "distance", "provider",
+    "vehicle_reg_no", "reply_number"
+)
+
+try:
+    # MicroPython str is a buffer of its bytes, it is copied without encoding.
+    memoryview("")
+    _STR_BUFFER = True
+except TypeError:
+    _STR_BUFFER = False
+
+# Field indexes used when a NRM packet is changed to a history packet.
+NRM_ALERT_ID = NRM_FIELDS.index("alert_id")
+NRM_PACKET_STATUS = NRM_FIELDS.index("packet_status")
+
+
+class PacketEncoder:
+    """Encode a packet layout compiled once into a reusable bytearray.
+
+    Values are given in the order of `fields`, so no kwargs dict is built and
+    no field name is looked up per packet. Each value is written straight
+    into the buffer, no packet string is formatted: bytes and str values are
+    copied, int values are written by digits, other values (e.g. float) are
+    written as `str(value)`.
+    """
+
+    def __init__(self, head, fields, tail="", size=512, widths=None):
+        """
+        Args:
+            head: packet head, e.g. "$,NRM,"
+            fields: field names in packet order
+            tail: packet tail (default: {""})
+            size: buffer size, max packet length (default: {512})
+            widths: {field name: digits} of zero padded int fields (default: {None})
+        """
+        self.fields = fields
+        self.head = head.encode()
+        self.tail = tail.encode()
+        self.widths = [0] * len(fields)
+        for name, digits in (widths or {}).items():
+            self.widths[fields.index(name)] = digits
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+
+    def __overflow(self):
+        raise ValueError("Packet is longer than %s bytes." % len(self.buf))
+
+    def __put_int(self, pos, value, width):
+        if value < 0:
+            pos = self.put(pos, b"-")
+            value = -value
+        digits = 1
+        rest = value // 10
+        while rest:
+            rest //= 10
+            digits += 1
+        end = pos + max(digits, width)
+        if end > len(self.buf):
+            self.__overflow()
+        buf = self.buf
+        i = end
+        while i > pos:
+            i -= 1
+            buf[i] = 0x30 + value % 10
+            value //= 10
+        return end
+
+    def put(self, pos, value, width=0):
+        """Write a value into buffer.
+
+        Args:
+            pos(int): buffer position
+            value: bytes/str/number value
+            width(int): min digits of an int value, zero padded (default: {0})
+
+        Returns:
+            int: buffer position after value.
+
+        Raises:
+            ValueError: packet is longer than buffer.
+        """
+        if type(value) is int:
+            return self.__put_int(pos, value, width)
+        if isinstance(value, str):
+            value = memoryview(value) if _STR_BUFFER else value.encode()
+        elif not isinstance(value, (bytes, bytearray, memoryview)):
+            value = str(value).encode()
+        end = pos + len(value)
+        if end > len(self.buf):
+            self.__overflow()
+        self.view[pos:end] = value
+        return end
+
+    def encode(self, values, pos=0):
+        """Write head, values and tail into buffer.
+
+        Args:
+            values(tuple/list): values in fields order
+            pos(int): buffer position (default: {0})
+
+        Returns:
+            int: buffer position after packet.
+        """
+        if len(values) != len(self.fields):
+            raise ValueError("Packet needs %s values, not %s." % (len(self.fields), len(values)))
+        pos = self.put(pos, self.head)
+        widths = self.widths
+        for i in range(len(values)):
+            if i:
+                if pos >= len(self.buf):
+                    self.__overflow()
+                self.buf[pos] = 0x2C
+                pos += 1
+            pos = self.put(pos, values[i], widths[i])
+        return self.put(pos, self.tail)
+
+    def encode_dict(self, kwgs, pos=0):
+        """Encode values from a dict by field names."""
+        return self.encode([kwgs[name] for name in self.fields], pos)
+
+
+def lgn_encoder(size=256):
+    return PacketEncoder("$,LGN,", LGN_FIELDS, "*", size)
+
+
+def hbt_encoder(size=256):
+    return PacketEncoder("$,HBT,", HBT_FIELDS, "*", size)
+
+
+def nrm_encoder(size=512):
+    """NRM packet without checksum, `,XX*` is appended by caller."""
+    return PacketEncoder("$,NRM,", NRM_FIELDS, "", size, {"frame_number": 6})
+
+
+def epb_encoder(size=256):
+    """EPB packet without CRC32, it is appended by caller."""
+    return PacketEncoder("$,EPB,", EPB_FIELDS, "*", size)
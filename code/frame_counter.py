@@ -0,0 +1,125 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : frame_counter.py
+@author    : agent (agent@local)
+@brief     : Packet frame number counter kept over reboots.
+@version   : v1.0.0
+@date      : 2026-10-18 01:47:13
+@copyright : Copyright (c) 2026
+"""
+
+import sys
+import ustruct
+import ql_fs
+import _thread
+
+_MAGIC = 0xA141
+# magic, generation, reserved limit, check
+_SLOT_FMT = "<HIII"
+_SLOT_SIZE = ustruct.calcsize(_SLOT_FMT)
+_CHECK_KEY = 0x5A5A5A5A
+
+# Frame numbers are 6 digits, 000001 to 999999, then 000001 again.
+FRAME_MIN = 1
+FRAME_MAX = 999999
+
+
+class FrameCounter:
+    """Frame number counter shared by all packets of a device.
+
+    Numbers are reserved on flash in blocks: the file keeps the first number
+    after the reserved block and is written once per `block` numbers, so
+    after a reboot counting goes on from there and a number is never used
+    twice in a cycle, at most `block` numbers are skipped. The file has two
+    slots written in turn with a generation and a check word, so a write
+    cut by power loss falls back to the other slot.
+
+    The server sees one sequence per IMEI, which only wraps from 999999 to
+    000001, so duplicates and gaps are found by frame number alone. Numbers
+    skipped after a reboot are not counted as lost when the device logs in
+    first, if `block` is not more than `restart_skip` of the server.
+    """
+
+    def __init__(self, path="/usr/ais_frame.dat", block=100):
+        """
+        Args:
+            path: counter file path, None is not kept over reboots (default: {"/usr/ais_frame.dat"})
+            block: numbers reserved per file write (default: {100})
+        """
+        self.__path = path
+        self.__block = max(1, block)
+        self.__next = FRAME_MIN
+        self.__limit = FRAME_MIN
+        self.__generation = 0
+        self.__lock = _thread.allocate_lock()
+        self.__open()
+
+    @staticmethod
+    def __add(number, count):
+        return (number - FRAME_MIN + count) % (FRAME_MAX - FRAME_MIN + 1) + FRAME_MIN
+
+    def __open(self):
+        if self.__path is None:
+            return
+        try:
+            if ql_fs.path_exists(self.__path):
+                with open(self.__path, "rb") as f:
+                    data = f.read(_SLOT_SIZE * 2)
+                for pos in (0, _SLOT_SIZE):
+                    if len(data) < pos + _SLOT_SIZE:
+                        break
+                    magic, generation, limit, check = ustruct.unpack_from(_SLOT_FMT, data, pos)
+                    if magic == _MAGIC and check == generation ^ limit ^ _CHECK_KEY and generation >= self.__generation \
+                            and FRAME_MIN <= limit <= FRAME_MAX:
+                        self.__generation = generation
+                        self.__next = limit
+            self.__limit = self.__next
+        except Exception as e:
+            sys.print_exception(e)
+
+    def __reserve(self):
+        """Save the end of next block, lock must be held."""
+        limit = self.__add(self.__next, self.__block)
+        if self.__path is not None:
+            generation = self.__generation + 1
+            try:
+                mode = "r+b" if ql_fs.path_exists(self.__path) else "wb"
+                with open(self.__path, mode) as f:
+                    f.seek((generation & 1) * _SLOT_SIZE)
+                    f.write(ustruct.pack(_SLOT_FMT, _MAGIC, generation, limit, generation ^ limit ^ _CHECK_KEY))
+                    f.flush()
+                self.__generation = generation
+            except Exception as e:
+                # Numbers are still given out, they may repeat after reboot.
+                sys.print_exception(e)
+        self.__limit = limit
+
+    def next(self):
+        """Take next frame number.
+
+        Returns:
+            str: 6 digits frame number.
+        """
+        with self.__lock:
+            number = self.__next
+            if number == self.__limit:
+                self.__reserve()
+            self.__next = self.__add(number, 1)
+        return "%06d" % number
+
+    def peek(self):
+        """Next frame number without taking it."""
+        return self.__next
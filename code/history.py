@@ -0,0 +1,214 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : history.py
+@author    : agent (agent@local)
+@brief     : Flash-backed ring queue for store-and-forward packets.
+@version   : v1.0.0
+@date      : 2026-10-18 01:13:01
+@copyright : Copyright (c) 2026
+"""
+
+import sys
+import ustruct
+import ql_fs
+import _thread
+
+_MAGIC = 0xA140
+# magic, slot size, capacity, head slot, count
+_HEADER_FMT = "<HHHHH"
+_HEADER_SIZE = ustruct.calcsize(_HEADER_FMT)
+_LEN_SIZE = 2
+
+
+class HistoryQueue:
+    """Fixed slot ring file, every slot is `2 bytes length + data`.
+
+    Append and pop only write one slot and the header, so the cost is O(1)
+    no matter how many packets are stored. When the ring is full the oldest
+    packet is overwritten.
+
+    Every packet has a sequence number counted from the oldest packet after
+    open, a sender reads packets by `read` and removes them by `pop` with the
+    sequence number, so packets dropped by `put` meanwhile are not counted as
+    sent ones.
+    """
+
+    def __init__(self, path="/usr/ais_history.dat", capacity=1000, slot_size=320):
+        """
+        Args:
+            path: ring file path (default: {"/usr/ais_history.dat"})
+            capacity: max packets stored (default: {1000})
+            slot_size: max bytes of a packet add 2 bytes length (default: {320})
+        """
+        self.__path = path
+        self.__capacity = capacity
+        self.__slot_size = slot_size
+        self.__head = 0
+        self.__count = 0
+        # Sequence number of the oldest packet.
+        self.__seq = 0
+        self.__file = None
+        self.__slot = bytearray(slot_size)
+        self.__lock = _thread.allocate_lock()
+        self.__open()
+
+    def __open(self):
+        try:
+            if ql_fs.path_exists(self.__path):
+                self.__file = open(self.__path, "r+b")
+                header = self.__file.read(_HEADER_SIZE)
+                if len(header) == _HEADER_SIZE:
+                    magic, slot_size, capacity, head, count = ustruct.unpack(_HEADER_FMT, header)
+                    if magic == _MAGIC and slot_size == self.__slot_size and capacity == self.__capacity:
+                        self.__head = head
+                        self.__count = count
+                        return
+                self.__file.close()
+            # New file or layout changed, old packets can not be read.
+            self.__file = open(self.__path, "wb")
+            self.__file.close()
+            self.__file = open(self.__path, "r+b")
+            self.__head = 0
+            self.__count = 0
+            self.__save_header()
+        except Exception as e:
+            sys.print_exception(e)
+            self.__file = None
+
+    def __save_header(self):
+        self.__file.seek(0)
+        self.__file.write(ustruct.pack(_HEADER_FMT, _MAGIC, self.__slot_size, self.__capacity,
+                                       self.__head, self.__count))
+        self.__file.flush()
+
+    def __seek_slot(self, index):
+        self.__file.seek(_HEADER_SIZE + ((self.__head + index) % self.__capacity) * self.__slot_size)
+
+    def put(self, data):
+        """Append a packet, the oldest packet is dropped when queue is full.
+
+        Args:
+            data(str/bytes): packet data
+
+        Returns:
+            bool: True - success, False - falied.
+        """
+        data = data.encode() if isinstance(data, str) else data
+        size = len(data)
+        if size + _LEN_SIZE > self.__slot_size:
+            return False
+        with self.__lock:
+            if self.__file is None:
+                return False
+            try:
+                if self.__count == self.__capacity:
+                    self.__head = (self.__head + 1) % self.__capacity
+                    self.__count -= 1
+                    self.__seq += 1
+                slot = self.__slot
+                slot[0] = size & 0xFF
+                slot[1] = size >> 8
+                slot[_LEN_SIZE:_LEN_SIZE + size] = data
+                self.__seek_slot(self.__count)
+                self.__file.write(slot)
+                self.__count += 1
+                self.__save_header()
+                return True
+            except Exception as e:
+                sys.print_exception(e)
+                return False
+
+    def peek(self, offset=0, max_size=4096):
+        """Read packets from the oldest one without removing them.
+
+        Args:
+            offset: count of packets to skip (default: {0})
+            max_size: max total bytes of packets read (default: {4096})
+
+        Returns:
+            list: packets bytes.
+        """
+        with self.__lock:
+            return self.__read(offset, max_size)
+
+    def read(self, seq=0, max_size=4096):
+        """Read packets from a sequence number without removing them.
+
+        Args:
+            seq: sequence number of the first packet, the oldest packet if it is dropped (default: {0})
+            max_size: max total bytes of packets read (default: {4096})
+
+        Returns:
+            tuple: (sequence number of the first packet read, packets bytes list)
+        """
+        with self.__lock:
+            offset = max(0, seq - self.__seq)
+            return self.__seq + offset, self.__read(offset, max_size)
+
+    def __read(self, offset, max_size):
+        frames = []
+        total = 0
+        if self.__file is None:
+            return frames
+        try:
+            for index in range(offset, self.__count):
+                self.__seek_slot(index)
+                size = self.__file.read(_LEN_SIZE)
+                size = size[0] | (size[1] << 8)
+                if frames and total + size > max_size:
+                    break
+                frames.append(self.__file.read(size))
+                total += size
+        except Exception as e:
+            sys.print_exception(e)
+        return frames
+
+    def pop(self, count=1, seq=None):
+        """Remove the oldest packets.
+
+        Args:
+            count: packets number (default: {1})
+            seq: sequence number of the first packet of `read`, the packets before
+                seq + count still stored are removed, None is from the oldest (default: {None})
+
+        Returns:
+            int: packets number removed.
+        """
+        with self.__lock:
+            if seq is not None:
+                count = seq + count - self.__seq
+            count = max(0, min(count, self.__count))
+            if count and self.__file is not None:
+                self.__head = (self.__head + count) % self.__capacity
+                self.__count -= count
+                self.__seq += count
+                try:
+                    self.__save_header()
+                except Exception as e:
+                    sys.print_exception(e)
+            return count
+
+    def clear(self):
+        return self.pop(self.__count)
+
+    def size(self):
+        return self.__count
+
+    def close(self):
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
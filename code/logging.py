@@ -28,6 +28,7 @@ import uos
 import sys
 import utime
 import ql_fs
+import ustruct
 import _thread
 
 _LOG_LOCK = _thread.allocate_lock()
@@ -48,64 +49,304 @@ _log_size = 0x8000
 _log_back = 8
 _log_level = "debug"
 _log_debug = True
+# Min level code logged, checked before any work.
+_log_threshold = 0
+# Background writer, callers only queue (epoch seconds, name, level, message, args).
+_log_async = False
+_log_queue = []
+_log_queue_max = 64
+_log_dropped = 0
+_log_wake = _thread.allocate_lock()
+_log_writer = None
+# File sink, lines are buffered and written in blocks, file size is tracked here.
+_log_block = 4096
+_log_interval = 5000
+_log_buf = []
+_log_buf_size = 0
+_log_buf_at = 0
+_log_file_size = None
+# Binary file records, logger names and message templates are interned.
+_log_binary = False
+_bin_names = {}
+_bin_templates = {}
 
+# Binary log file: magic, then records of tag byte.
+# 0x01 name: id varint, utf-8 length varint, bytes
+# 0x02 template: same as name
+# 0x10 + level code, log: seconds uint32, name id varint, template id varint,
+#   inline name/template when id is 0, argc byte, args.
+# Args: type byte, "i" zigzag varint, "d" float64, "s"/"b" length varint and bytes,
+#   "n" None, "t" True, "f" False.
+BIN_MAGIC = b"QLOG\x01"
+_BIN_NAME = 0x01
+_BIN_TEMPLATE = 0x02
+_BIN_RECORD = 0x10
+_BIN_INTERN_MAX = 255
 
-class Logger:
-    def __init__(self, name):
-        self.__name = name
 
-    def __save_log(self, msg):
-        global _log_path
-        global _log_file
-        try:
-            log_size = 0
+def _update_threshold():
+    global _log_threshold
+    _log_threshold = 0 if _log_debug else max(1, _LOG_LEVEL_CODE[_log_level])
+
+
+def _format(message, args):
+    if not args:
+        return str(message)
+    try:
+        return message % args
+    except (TypeError, ValueError):
+        # Messages joined by space, e.g. logger.info("a", "b").
+        return " ".join([str(i) for i in (message,) + args])
+
+
+def _freeze(args):
+    """Args kept for background writer, buffers and containers are copied."""
+    for arg in args:
+        if arg is not None and not isinstance(arg, (str, int, float, bytes)):
+            return tuple([bytes(i) if isinstance(i, (bytearray, memoryview)) else
+                          i if i is None or isinstance(i, (str, int, float, bytes)) else str(i) for i in args])
+    return args
+
+
+def _varint(buf, value):
+    while value > 0x7F:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def _bin_bytes(buf, data):
+    data = data.encode() if isinstance(data, str) else data
+    _varint(buf, len(data))
+    buf.extend(data)
+
+
+def _intern(table, value, tag, buf):
+    index = table.get(value)
+    if index is None:
+        if len(table) >= _BIN_INTERN_MAX:
+            return 0
+        index = len(table) + 1
+        table[value] = index
+        buf.append(tag)
+        _varint(buf, index)
+        _bin_bytes(buf, value)
+    return index
+
+
+def _bin_header():
+    """Magic and all interned strings, so every log file is decoded alone."""
+    buf = bytearray(BIN_MAGIC)
+    for tag, table in ((_BIN_NAME, _bin_names), (_BIN_TEMPLATE, _bin_templates)):
+        for value, index in table.items():
+            buf.append(tag)
+            _varint(buf, index)
+            _bin_bytes(buf, value)
+    return bytes(buf)
+
+
+def _encode(secs, name, level, message, args):
+    buf = bytearray()
+    template = message if isinstance(message, str) else str(message)
+    name_id = _intern(_bin_names, name, _BIN_NAME, buf)
+    template_id = _intern(_bin_templates, template, _BIN_TEMPLATE, buf)
+    buf.extend(ustruct.pack("<BI", _BIN_RECORD + _LOG_LEVEL_CODE[level], secs & 0xFFFFFFFF))
+    _varint(buf, name_id)
+    _varint(buf, template_id)
+    if not name_id:
+        _bin_bytes(buf, name)
+    if not template_id:
+        _bin_bytes(buf, template)
+    buf.append(min(len(args), 0xFF))
+    for arg in args[:0xFF]:
+        if arg is None:
+            buf.append(0x6E)
+        elif arg is True:
+            buf.append(0x74)
+        elif arg is False:
+            buf.append(0x66)
+        elif isinstance(arg, int):
+            buf.append(0x69)
+            _varint(buf, arg << 1 if arg >= 0 else ((-arg) << 1) - 1)
+        elif isinstance(arg, float):
+            buf.append(0x64)
+            buf.extend(ustruct.pack("<d", arg))
+        elif isinstance(arg, (bytes, bytearray, memoryview)):
+            buf.append(0x62)
+            _bin_bytes(buf, bytes(arg))
+        else:
+            buf.append(0x73)
+            _bin_bytes(buf, arg if isinstance(arg, str) else str(arg))
+    return bytes(buf)
+
+
+def _rotate():
+    for i in range(_log_back, 0, -1):
+        bak_file = _log_file + "." + str(i)
+        if ql_fs.path_exists(bak_file):
+            if i == _log_back:
+                uos.remove(bak_file)
+            else:
+                uos.rename(bak_file, _log_file + "." + str(i + 1))
+    uos.rename(_log_file, _log_file + ".1")
+
+
+def _flush_log():
+    """Write buffered lines with one append, log lock must be held."""
+    global _log_buf, _log_buf_size, _log_file_size
+    if not _log_buf:
+        return
+    lines = _log_buf
+    size = _log_buf_size
+    _log_buf = []
+    _log_buf_size = 0
+    try:
+        if _log_file_size is None:
             if not ql_fs.path_exists(_log_path):
                 uos.mkdir(_log_path[:-1])
-            if ql_fs.path_exists(_log_file):
-                log_size = ql_fs.path_getsize(_log_file)
-                if log_size + len(msg) >= _log_size:
-                    for i in range(_log_back, 0, -1):
-                        bak_file = _log_file + "." + str(i)
-                        if ql_fs.path_exists(bak_file):
-                            if i == _log_back:
-                                uos.remove(bak_file)
-                            else:
-                                uos.rename(bak_file, _log_file + "." + str(i + 1))
-                    uos.rename(_log_file, _log_file + ".1")
-            with open(_log_file, "a") as lf:
-                lf.write(msg)
+            _log_file_size = ql_fs.path_getsize(_log_file) if ql_fs.path_exists(_log_file) else 0
+        # Current file is filled up with the lines which fit, the rest starts new files,
+        # a block may be more than some log files.
+        while _log_file_size + size >= _log_size:
+            fit = 0
+            count = 0
+            for line in lines:
+                if _log_file_size + fit + len(line) >= _log_size:
+                    break
+                fit += len(line)
+                count += 1
+            if not count and not _log_file_size:
+                # A line longer than log size is a file alone.
+                fit = len(lines[0])
+                count = 1
+            if count:
+                _append((b"" if _log_binary else "").join(lines[:count]))
+                lines = lines[count:]
+                size -= fit
+            if not lines:
+                break
+            _rotate()
+            _log_file_size = 0
+        if lines:
+            _append((b"" if _log_binary else "").join(lines))
+    except Exception as e:
+        # Size is read from file again on next flush.
+        _log_file_size = None
+        sys.print_exception(e)
+
+
+def _append(data):
+    global _log_file_size
+    if _log_binary and not _log_file_size:
+        data = _bin_header() + data
+    with open(_log_file, "ab" if _log_binary else "a") as lf:
+        lf.write(data)
+    _log_file_size += len(data)
+
+
+def _save_log(level, msg):
+    global _log_buf_size, _log_buf_at
+    if not _log_buf:
+        _log_buf_at = utime.ticks_ms()
+    _log_buf.append(msg)
+    _log_buf_size += len(msg)
+    if _log_buf_size >= _log_block or level == "critical" or utime.ticks_diff(utime.ticks_ms(), _log_buf_at) >= _log_interval:
+        _flush_log()
+
+
+def _emit(secs, name, level, message, args):
+    text = _format(message, args)
+    msg = "[{}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}]".format(*utime.localtime(secs)[:6]) + "[{}][{}]".format(name, level)
+    print(msg, text)
+    if _log_save:
+        if _log_binary:
+            _save_log(level, _encode(secs, name, level, message, args))
+        else:
+            _save_log(level, msg + " " + text + "\n")
+
+
+def _writer():
+    global _log_writer
+    while True:
+        if not _log_queue:
+            with _LOG_LOCK:
+                if not _log_async and not _log_queue:
+                    _flush_log()
+                    # Cleared under the lock, so `setAsyncLog(True)` either keeps this
+                    # writer running or starts a new one after it.
+                    _log_writer = None
+                    return
+            if _log_buf:
+                # Idle, buffered lines are written when flush interval is over.
+                utime.sleep_ms(100)
+                with _LOG_LOCK:
+                    if _log_buf and utime.ticks_diff(utime.ticks_ms(), _log_buf_at) >= _log_interval:
+                        _flush_log()
+            else:
+                # Released by the next queued record.
+                _log_wake.acquire()
+            continue
+        record = _log_queue.pop(0)
+        try:
+            with _LOG_LOCK:
+                _emit(*record)
         except Exception as e:
             sys.print_exception(e)
 
-    def __log(self, level, *message):
-        global _log_save
+
+def _wake_writer():
+    if _log_wake.locked():
+        try:
+            _log_wake.release()
+        except Exception:
+            pass
+
+
+class Logger:
+    """Logger of a module.
+
+    Messages are formatted only if the level is enabled, arguments are
+    formatted by `%` like `logger.debug("read %s bytes", size)`. Expensive
+    arguments can be guarded by `isEnabledFor`.
+    """
+
+    def __init__(self, name):
+        self.__name = name
+
+    def isEnabledFor(self, level):
+        return _LOG_LEVEL_CODE.get(level, 0) >= _log_threshold
+
+    def __log(self, level, message, args):
+        global _log_dropped
+        if _log_async:
+            if len(_log_queue) >= _log_queue_max:
+                _log_dropped += 1
+                return
+            _log_queue.append((utime.time(), self.__name, level, message, _freeze(args)))
+            _wake_writer()
+            return
         with _LOG_LOCK:
-            if _log_debug is False:
-                if _log_level == "debug" and level == "debug":
-                    return
-                if _LOG_LEVEL_CODE.get(level) < _LOG_LEVEL_CODE.get(_log_level):
-                    return
-            _time = "{}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}".format(*utime.localtime())
-            msg = "[{}][{}][{}]".format(_time, self.__name, level)
-            print(msg, *message)
-            if _log_save:
-                msg = msg + " " + " ".join(message) if message else msg
-                self.__save_log(msg)
+            _emit(utime.time(), self.__name, level, message, args)
 
-    def critical(self, *message):
-        self.__log("critical", *message)
+    def critical(self, message, *args):
+        if _log_threshold <= 4:
+            self.__log("critical", message, args)
 
-    def error(self, *message):
-        self.__log("error", *message)
+    def error(self, message, *args):
+        if _log_threshold <= 3:
+            self.__log("error", message, args)
 
-    def warn(self, *message):
-        self.__log("warn", *message)
+    def warn(self, message, *args):
+        if _log_threshold <= 2:
+            self.__log("warn", message, args)
 
-    def info(self, *message):
-        self.__log("info", *message)
+    def info(self, message, *args):
+        if _log_threshold <= 1:
+            self.__log("info", message, args)
 
-    def debug(self, *message):
-        self.__log("debug", *message)
+    def debug(self, message, *args):
+        if _log_threshold <= 0:
+            self.__log("debug", message, args)
 
 
 def getLogger(name):
@@ -116,9 +357,12 @@ def getLogger(name):
 
 
 def setLogFile(path, name):
-    global _log_path, _log_name, _log_file
+    global _log_path, _log_name, _log_file, _log_file_size
     if not path.endswith("/"):
         path += "/"
+    with _LOG_LOCK:
+        _flush_log()
+        _log_file_size = None
     _log_path = path
     _log_name = name
     _log_file = _log_path + _log_name
@@ -129,6 +373,8 @@ def setSaveLog(save, size=None, backups=None):
     global _log_save, _log_size, _log_back
     if not isinstance(save, bool):
         return (1, "save is not bool.")
+    if not save:
+        flushLog()
     _log_save = save
     if _log_save:
         if not isinstance(size, int):
@@ -150,6 +396,7 @@ def setLogLevel(level):
     if level not in _LOG_LEVEL_CODE.keys():
         return False
     _log_level = level
+    _update_threshold()
     return True
 
 
@@ -161,9 +408,90 @@ def setLogDebug(debug):
     global _log_debug
     if isinstance(debug, bool):
         _log_debug = debug
+        _update_threshold()
         return True
     return False
 
 
 def getLogDebug():
     return _log_debug
+
+
+def setAsyncLog(enable, size=64):
+    """Write logs by a background thread, so callers never wait console or file I/O.
+
+    Args:
+        enable(bool): True - background writer, False - write in caller
+        size: max queued records, new records are dropped when it is full (default: {64})
+    """
+    global _log_async, _log_queue_max, _log_writer
+    if not isinstance(enable, bool):
+        return False
+    with _LOG_LOCK:
+        _log_queue_max = size
+        _log_async = enable
+        if enable and _log_writer is None:
+            _thread.stack_size(0x2000)
+            _log_writer = _thread.start_new_thread(_writer, ())
+    _wake_writer()
+    return True
+
+
+def getAsyncLog():
+    return _log_async
+
+
+def getLogDropped():
+    """Records dropped because the background writer queue was full."""
+    return _log_dropped
+
+
+def setLogFlush(block=4096, interval=5):
+    """Set when saved log lines are written to file.
+
+    Lines are kept in memory and written with one append when `block`
+    bytes are buffered, the oldest line is `interval` seconds old or a
+    critical message is logged. Without background writer (`setAsyncLog`)
+    the interval is checked when a line is logged, call `flushLog` before
+    reset or power off.
+
+    Args:
+        block: buffered bytes written at once (default: {4096})
+        interval: max seconds a line is buffered (default: {5})
+    """
+    global _log_block, _log_interval
+    _log_block = block
+    _log_interval = interval * 1000
+    return True
+
+
+def flushLog():
+    """Write buffered log lines to file."""
+    with _LOG_LOCK:
+        _flush_log()
+    return True
+
+
+def setBinaryLog(binary):
+    """Save log as compact binary records, decoded to text by `tools/log_decoder.py`.
+
+    Logger names and message templates are stored once per file, each
+    record only has level, time, ids and packed arguments. Use another
+    log file name by `setLogFile`, text and binary records are not mixed
+    in one file.
+
+    Args:
+        binary(bool): True - binary records, False - text lines
+    """
+    global _log_binary, _log_file_size
+    if not isinstance(binary, bool):
+        return False
+    with _LOG_LOCK:
+        _flush_log()
+        _log_binary = binary
+        _log_file_size = None
+    return True
+
+
+def getBinaryLog():
+    return _log_binary
@@ -0,0 +1,151 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : motion_filter.py
+@author    : agent (agent@local)
+@brief     : Deadband filter of location reports for parked vehicles.
+@version   : v1.0.0
+@date      : 2026-10-18 01:34:20
+@copyright : Copyright (c) 2026
+"""
+
+import math
+import utime
+from usr.encoder import NRM_FIELDS
+
+_EARTH_RADIUS = 6371000
+_NR = "NR"
+_PACKET_TYPE = NRM_FIELDS.index("packet_type")
+_LAT = NRM_FIELDS.index("latitude")
+_LAT_DIR = NRM_FIELDS.index("latitude_dir")
+_LON = NRM_FIELDS.index("longitude")
+_LON_DIR = NRM_FIELDS.index("longitude_dir")
+_SPEED = NRM_FIELDS.index("speed")
+_HEADING = NRM_FIELDS.index("heading")
+# A change of these fields is always reported.
+_STATE_FIELDS = tuple(NRM_FIELDS.index(i) for i in (
+    "gps_fix", "ignition", "main_power_status", "emergency_status", "temper_alert",
+    "digital_input_status", "digital_output_status"
+))
+
+
+def _float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class MotionFilter:
+    """Suppress normal location reports while the vehicle does not move.
+
+    A normal report (packet type NR) is suppressed when position, speed and
+    heading are all inside the deadbands of the last sent report and no
+    state field (ignition, power, emergency, IO...) changed. Alert packets
+    (other packet types) are never suppressed. At least one report is sent
+    every `max_interval` seconds, so a parked vehicle is down-sampled, not
+    silent.
+    """
+
+    def __init__(self, distance=10, speed=2, heading=10, max_interval=300):
+        """
+        Args:
+            distance: position deadband meters (default: {10})
+            speed: speed deadband km/h (default: {2})
+            heading: heading deadband degrees (default: {10})
+            max_interval: max seconds between sent reports, 0 is no limit (default: {300})
+        """
+        self.distance = distance
+        self.speed = speed
+        self.heading = heading
+        self.max_interval = max_interval
+        self.sent = 0
+        self.suppressed = 0
+        self.sent_bytes = 0
+        self.__last = None
+        self.__last_at = 0
+
+    def __position(self, values):
+        lat = _float(values[_LAT])
+        lon = _float(values[_LON])
+        if lat is None or lon is None:
+            return None
+        if values[_LAT_DIR] == "S":
+            lat = -lat
+        if values[_LON_DIR] == "W":
+            lon = -lon
+        return lat, lon
+
+    def __moved(self, last, values):
+        pos = self.__position(values)
+        last_pos = self.__position(last)
+        if pos is None or last_pos is None:
+            return True
+        # Equirectangular distance is exact enough for meters.
+        dy = math.radians(pos[0] - last_pos[0])
+        dx = math.radians(pos[1] - last_pos[1]) * math.cos(math.radians(pos[0]))
+        if (dx * dx + dy * dy) * _EARTH_RADIUS * _EARTH_RADIUS > self.distance * self.distance:
+            return True
+        speed, last_speed = _float(values[_SPEED]), _float(last[_SPEED])
+        if speed is None or last_speed is None or abs(speed - last_speed) > self.speed:
+            return True
+        heading, last_heading = _float(values[_HEADING]), _float(last[_HEADING])
+        if heading is None or last_heading is None:
+            return True
+        turn = abs(heading - last_heading) % 360
+        return min(turn, 360 - turn) > self.heading
+
+    def check(self, values):
+        """Check if a location report should be sent.
+
+        Args:
+            values(list): NRM values in `NRM_FIELDS` order
+
+        Returns:
+            bool: True - send, False - suppress.
+        """
+        now = utime.ticks_ms()
+        last = self.__last
+        send = (
+            last is None
+            or values[_PACKET_TYPE] != _NR
+            or (self.max_interval and utime.ticks_diff(now, self.__last_at) >= self.max_interval * 1000)
+            or [values[i] for i in _STATE_FIELDS] != [last[i] for i in _STATE_FIELDS]
+            or self.__moved(last, values)
+        )
+        if send:
+            self.__last = list(values)
+            self.__last_at = now
+            self.sent += 1
+        else:
+            self.suppressed += 1
+        return send
+
+    def record(self, size):
+        """Count bytes of a sent report, used to estimate bytes saved."""
+        self.sent_bytes += size
+
+    def reset(self):
+        """Send next report whatever it is, e.g. after reconnect."""
+        self.__last = None
+
+    def stats(self):
+        avg = self.sent_bytes // self.sent if self.sent else 0
+        return {
+            "sent": self.sent,
+            "suppressed": self.suppressed,
+            "sent_bytes": self.sent_bytes,
+            "saved_bytes": avg * self.suppressed,
+        }
@@ -0,0 +1,344 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : scheduler.py
+@author    : agent (agent@local)
+@brief     : Report scheduler driven by UR/URE/URH server commands.
+@version   : v1.0.0
+@date      : 2026-10-18 01:33:42
+@copyright : Copyright (c) 2026
+"""
+
+import sys
+import utime
+import _thread
+from usr import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Report:
+    """A periodic report, `send` is called with no args when it is due."""
+
+    def __init__(self, name, interval, send):
+        self.name = name
+        self.interval = interval
+        self.send = send
+        self.enabled = True
+        self.due = utime.ticks_ms()
+        # Ticks of the last send, None before the first.
+        self.sent_at = None
+
+
+class ReportScheduler:
+    """Send location, emergency and health reports at the server rates.
+
+    - Location reports use `rate_on` or `rate_off` by ignition state,
+      `SET UR` changes `rate_on`.
+    - Emergency reports (EPB) are sent every `rate_emergency` seconds while
+      emergency is on, `SET URE` changes it, `SET EO` stops emergency and
+      `SET ED` sets emergency duration seconds.
+    - Health reports use `rate_health`, `SET URH` changes it.
+
+    Reports due within `coalesce` seconds of each other are sent in the same
+    wake-up as one socket write, and then stay in phase, so the radio wakes
+    up once for all of them.
+
+    The scheduler has no thread of its own, it sets a client timer to the
+    next due report, so it runs while the client I/O loop runs, `start` it
+    after `AISClient.connect`. Rate and ignition changes move the timer at
+    once. Due reports are sent by a worker thread, as sending waits for ACKs
+    checked by the I/O loop.
+    """
+
+    def __init__(self, client, location, health=None, emergency=None, ignition=None, rate_on=10, rate_off=60,
+                 rate_emergency=5, rate_health=600, coalesce=2):
+        """
+        Args:
+            client(AISClient): client used to send reports
+            location(function): returns kwargs of `send_loction_alert_information`
+            health(function): returns kwargs of `send_heart_beat`, update rates are filled in (default: {None})
+            emergency(function): returns kwargs of `send_emergency` (default: {None})
+            ignition(function): returns True if ignition is on, None is always on, call `on_ignition`
+                when it changes (default: {None})
+            rate_on: location report seconds when ignition on (default: {10})
+            rate_off: location report seconds when ignition off (default: {60})
+            rate_emergency: emergency report seconds (default: {5})
+            rate_health: health report seconds (default: {600})
+            coalesce: seconds a report may be sent early to join other reports (default: {2})
+        """
+        self.__client = client
+        self.__location = location
+        self.__health = health
+        self.__emergency = emergency
+        self.__ignition = ignition
+        self.__rate_on = rate_on
+        self.__rate_off = rate_off
+        self.__coalesce = coalesce
+        self.__lock = _thread.allocate_lock()
+        self.__started = False
+        self.__timer = None
+        self.__running = False
+        self.__run_again = False
+        self.__emergency_until = None
+        self.__reports = [
+            Report("location", rate_on, self.__send_location),
+            Report("emergency", rate_emergency, self.__send_emergency),
+            Report("health", rate_health, self.__send_health),
+        ]
+        self.__reports[1].enabled = False
+        self.__reports[2].enabled = health is not None
+        self.__reports[0].interval = self.__location_rate()
+        self.wakeups = 0
+        self.sent = 0
+        client.set_scheduler(self)
+
+    def __report(self, name):
+        for report in self.__reports:
+            if report.name == name:
+                return report
+
+    def __ignition_on(self):
+        if self.__ignition is None:
+            return True
+        try:
+            return bool(self.__ignition())
+        except Exception as e:
+            sys.print_exception(e)
+            return True
+
+    def __location_rate(self):
+        return self.__rate_on if self.__ignition_on() else self.__rate_off
+
+    def __reschedule(self, report, now):
+        """Next report is one new interval after the last one, lock is held."""
+        if report.sent_at is None:
+            return
+        due = utime.ticks_add(report.sent_at, report.interval * 1000)
+        report.due = due if utime.ticks_diff(due, now) > 0 else now
+
+    def __arm(self):
+        """Set client timer to the next due report, lock is held."""
+        if self.__timer is not None:
+            self.__client.cancel_timer(self.__timer)
+            self.__timer = None
+        if not self.__started or self.__running:
+            # A running worker sets the timer when it ends.
+            return
+        wait = self.__next_wait(utime.ticks_ms())
+        if wait >= 0:
+            self.__timer = self.__client.add_timer(wait, self.__on_timer)
+
+    def __send_location(self):
+        return self.__client.send_loction_alert_information(**self.__location())
+
+    def __send_emergency(self):
+        if self.__emergency is None:
+            return False
+        return self.__client.send_emergency(**self.__emergency())
+
+    def __send_health(self):
+        kwargs = self.__health()
+        kwargs["data_update_rate_when_ignition_on"] = self.__rate_on
+        kwargs["data_update_rate_when_ignition_off"] = self.__rate_off
+        return self.__client.send_heart_beat(**kwargs)
+
+    def set_rate(self, name, seconds):
+        """Change report rate.
+
+        Args:
+            name(str): "location"/"location_off"/"emergency"/"health"
+            seconds(int): report interval seconds
+        """
+        if seconds <= 0:
+            return False
+        with self.__lock:
+            if name in ("location", "location_off"):
+                if name == "location":
+                    self.__rate_on = seconds
+                else:
+                    self.__rate_off = seconds
+                report = self.__report("location")
+                rate = self.__location_rate()
+            else:
+                report = self.__report(name)
+                if report is None:
+                    return False
+                rate = seconds
+            if report.interval != rate:
+                report.interval = rate
+                self.__reschedule(report, utime.ticks_ms())
+                self.__arm()
+        logger.info("%s report rate is %s seconds", name, seconds)
+        return True
+
+    def on_ignition(self):
+        """Call when ignition changes, location report is rescheduled at the rate of new state."""
+        with self.__lock:
+            report = self.__report("location")
+            rate = self.__location_rate()
+            if report.interval != rate:
+                report.interval = rate
+                self.__reschedule(report, utime.ticks_ms())
+                self.__arm()
+        return True
+
+    def set_emergency(self, on, duration=0):
+        """Start or stop emergency reports.
+
+        Args:
+            on(bool): emergency on
+            duration: seconds to stop automatically, 0 is until stopped (default: {0})
+        """
+        with self.__lock:
+            report = self.__report("emergency")
+            if on and not report.enabled:
+                report.due = utime.ticks_ms()
+            report.enabled = bool(on)
+            self.__emergency_until = utime.ticks_add(utime.ticks_ms(), duration * 1000) if on and duration else None
+            self.__arm()
+        return True
+
+    def on_command(self, key, value):
+        """Apply SET command from server.
+
+        Returns:
+            bool: True if command is for scheduler.
+        """
+        rates = {"UR": "location", "URE": "emergency", "URH": "health"}
+        try:
+            if key in rates:
+                return self.set_rate(rates[key], int(value))
+            if key == "EO":
+                return self.set_emergency(False)
+            if key == "ED":
+                with self.__lock:
+                    if self.__report("emergency").enabled and int(value) > 0:
+                        self.__emergency_until = utime.ticks_add(utime.ticks_ms(), int(value) * 1000)
+                        self.__arm()
+                return True
+        except ValueError:
+            logger.error("Invalid value of SET %s: %s", key, value)
+        return False
+
+    def __due_reports(self, now):
+        due = []
+        early = False
+        with self.__lock:
+            if self.__emergency_until is not None and utime.ticks_diff(now, self.__emergency_until) >= 0:
+                self.__report("emergency").enabled = False
+                self.__emergency_until = None
+            location = self.__report("location")
+            location.interval = self.__location_rate()
+            for report in self.__reports:
+                if not report.enabled:
+                    continue
+                wait = utime.ticks_diff(report.due, now)
+                if wait <= 0:
+                    early = True
+                if wait <= self.__coalesce * 1000:
+                    due.append(report)
+            if not early:
+                return []
+            for report in due:
+                report.sent_at = now
+                report.due = utime.ticks_add(now, report.interval * 1000)
+        return due
+
+    def __next_wait(self, now):
+        """Milliseconds to next due report, -1 - none, lock is held."""
+        wait = -1
+        for report in self.__reports:
+            if report.enabled:
+                diff = max(0, utime.ticks_diff(report.due, now))
+                if wait < 0 or diff < wait:
+                    wait = diff
+        if self.__emergency_until is not None:
+            diff = max(0, utime.ticks_diff(self.__emergency_until, now))
+            if wait < 0 or diff < wait:
+                wait = diff
+        return wait
+
+    def run_once(self):
+        """Send due reports.
+
+        Returns:
+            int: reports sent.
+        """
+        due = self.__due_reports(utime.ticks_ms())
+        if not due:
+            return 0
+        self.wakeups += 1
+        client = self.__client
+        if len(due) > 1:
+            client.begin_batch()
+        count = 0
+        try:
+            for report in due:
+                try:
+                    if report.send():
+                        count += 1
+                except Exception as e:
+                    sys.print_exception(e)
+        finally:
+            if len(due) > 1 and not client.end_batch():
+                count = 0
+        if logger.isEnabledFor("debug"):
+            logger.debug("reports %s sent %s", [i.name for i in due], count)
+        self.sent += count
+        return count
+
+    def __on_timer(self):
+        # Client I/O loop, one worker thread sends due reports at a time.
+        with self.__lock:
+            self.__timer = None
+            if not self.__started:
+                return
+            self.__run_again = True
+            if self.__running:
+                return
+            self.__running = True
+        _thread.stack_size(0x2000)
+        _thread.start_new_thread(self.__run, ())
+
+    def __run(self):
+        while True:
+            with self.__lock:
+                if not self.__run_again or not self.__started:
+                    self.__running = False
+                    self.__arm()
+                    return
+                self.__run_again = False
+            try:
+                self.run_once()
+            except Exception as e:
+                sys.print_exception(e)
+
+    def start(self):
+        with self.__lock:
+            if not self.__started:
+                self.__started = True
+                now = utime.ticks_ms()
+                for report in self.__reports:
+                    report.due = now
+                    report.sent_at = None
+                self.__arm()
+        return True
+
+    def stop(self):
+        with self.__lock:
+            self.__started = False
+            self.__arm()
+        return True
@@ -0,0 +1,188 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : ais_benchmark_demo.py
+@author    : agent (agent@local)
+@brief     : Packet encoding benchmark on QuecPython module.
+@version   : v1.0.0
+@date      : 2026-10-18 01:14:28
+@copyright : Copyright (c) 2026
+"""
+
+import gc
+import utime
+import urandom
+from utils import crc32 as Crc32Engine
+from usr.ais import checksum
+from usr.checksum import xor_checksum, write_hex, crc32, crc32_table, crc32_backend
+from usr.encoder import nrm_encoder, epb_encoder, NRM_FIELDS
+from usr import logging
+
+logger = logging.getLogger(__name__)
+
+ROUNDS = 200
+
+NRM_VALUES = [
+    "QUECTEL", "EC200UCNAAR02A01M08", "NR", "01", "L", "868540050954037", "car123456", 1, "29042024",
+    "152000", "12.896545", "N", "76.358759", "E", 25, 135, 10, 76, 2.5, 1.9, "QUECTEL", 1, 1, 12.4, 4.2,
+    0, "C", 31, 404, 98, 123, 456, "1,2,3,1,2,3,1,2,3,1,2,3", "0000", "00", 6.7, 2.5, 123456, "000001"
+]
+
+EPB_VALUES = [
+    "QUECTEL", "EMR", "868540050954037", "NM", "18122017124850", "A", "12.896545", "N", "76.358759", "E",
+    123, 25, 12345, "G", "car123456", ""
+]
+
+NRM_FORMAT = "$,NRM,{vender_id},{firmware_version},{packet_type},{alert_id},{packet_status}," \
+    "{imei},{vehicle_reg_no},{gps_fix},{date},{time},{latitude},{latitude_dir}," \
+    "{longitude},{longitude_dir},{speed},{heading},{no_of_satellites},{altitude}," \
+    "{pdop},{hdop},{operator_name},{ignition},{main_power_status},{main_input_voltage}," \
+    "{internal_battery_voltage},{emergency_status},{temper_alert},{gsm_strength},{mcc},{mnc}," \
+    "{lac},{cell_id},{nmr},{digital_input_status},{digital_output_status},{analog_input_1}," \
+    "{analog_input_2},{odometer},{frame_number}"
+
+
+def nrm_legacy(values):
+    """NRM packet built like AISClient before encoders: kwargs dict and str.format."""
+    kwgs = {}
+    for i in range(len(NRM_FIELDS)):
+        kwgs[NRM_FIELDS[i]] = values[i]
+    msg = NRM_FORMAT.format(**kwgs)
+    return msg + ",%s*" % checksum(msg[2:])
+
+
+def nrm_encode(enc, values):
+    pos = enc.encode(values)
+    check_sum = xor_checksum(enc.buf, 2, pos)
+    pos = enc.put(pos, b",")
+    pos = write_hex(enc.buf, pos, check_sum)
+    pos = enc.put(pos, b"*")
+    return enc.view[:pos]
+
+
+def bench(name, func, *args):
+    """Run func ROUNDS times, log time and heap bytes allocated per call."""
+    gc.collect()
+    gc.disable()
+    mem_start = gc.mem_alloc()
+    start = utime.ticks_us()
+    for _ in range(ROUNDS):
+        func(*args)
+    used = utime.ticks_diff(utime.ticks_us(), start)
+    mem_used = gc.mem_alloc() - mem_start
+    gc.enable()
+    gc.collect()
+    logger.info("%-16s %8d us/frame %8d bytes/frame" % (name, used // ROUNDS, mem_used // ROUNDS))
+
+
+def nrm_checksum_legacy(msg):
+    return checksum(msg[2:])
+
+
+def nrm_checksum(buf, end):
+    return xor_checksum(buf, 2, end)
+
+
+def check_checksum():
+    """Compare xor_checksum with legacy checksum on random data, split and whole."""
+    buf = bytearray(256)
+    for _ in range(100):
+        size = urandom.randint(0, len(buf))
+        for i in range(size):
+            buf[i] = urandom.randint(0, 255)
+        data = bytes(buf[:size])
+        value = int(checksum(data), 16)
+        split = urandom.randint(0, size)
+        if xor_checksum(buf, 0, size) != value or xor_checksum(buf, split, size, xor_checksum(buf, 0, split)) != value:
+            return False
+        out = bytearray(2)
+        write_hex(out, 0, value)
+        if int(bytes(out), 16) != value:
+            return False
+    return True
+
+
+def bench_checksum():
+    if not check_checksum():
+        logger.error("xor_checksum is different from legacy checksum.")
+        return
+    msg = nrm_legacy(NRM_VALUES)
+    buf = bytearray(msg.encode())
+    bench("checksum", nrm_checksum_legacy, msg)
+    bench("xor_checksum", nrm_checksum, buf, len(buf))
+
+
+def bench_encoder():
+    enc = nrm_encoder()
+    legacy = nrm_legacy(NRM_VALUES).encode()
+    frame = bytes(nrm_encode(enc, NRM_VALUES))
+    # Legacy checksum has no leading zero, compare checksum by value.
+    legacy_body, legacy_csum = legacy[:-1].rsplit(b",", 1)
+    frame_body, frame_csum = frame[:-1].rsplit(b",", 1)
+    if legacy_body != frame_body or int(legacy_csum, 16) != int(frame_csum, 16) or len(frame_csum) != 2:
+        logger.error("NRM encoder output is different from legacy format.")
+        return
+    bench("nrm format", nrm_legacy, NRM_VALUES)
+    bench("nrm encoder", nrm_encode, enc, NRM_VALUES)
+
+
+def epb_crc_legacy(enc, values):
+    """EPB CRC like AISClient before: a new engine, a frame copy and a hex string per packet."""
+    pos = enc.encode(values)
+    csum = Crc32Engine().update(0xFFFFFFFF, bytes(enc.view[:pos]))
+    return enc.put(pos, hex(csum)[2:].upper())
+
+
+def epb_crc(enc, values):
+    pos = enc.encode(values)
+    return write_hex(enc.buf, pos, crc32(enc.buf, 0, pos), 8)
+
+
+def epb_crc_table(enc, values):
+    pos = enc.encode(values)
+    return write_hex(enc.buf, pos, crc32_table(enc.buf, 0, pos), 8)
+
+
+def check_crc32():
+    """Compare crc32 with the CRC-32 check value and the table on random data, split and whole."""
+    if crc32(b"123456789") != 0xCBF43926 or crc32_table(b"123456789") != 0xCBF43926:
+        return False
+    buf = bytearray(256)
+    for _ in range(50):
+        size = urandom.randint(0, len(buf))
+        for i in range(size):
+            buf[i] = urandom.randint(0, 255)
+        value = crc32_table(buf, 0, size)
+        split = urandom.randint(0, size)
+        if crc32(buf, 0, size) != value or crc32(buf, split, size, crc32(buf, 0, split)) != value:
+            return False
+    return True
+
+
+def bench_crc32():
+    if not check_crc32():
+        logger.error("crc32 is different from CRC-32 table.")
+        return
+    logger.info("crc32 backend: %s" % crc32_backend())
+    enc = epb_encoder()
+    bench("epb crc legacy", epb_crc_legacy, enc, EPB_VALUES)
+    bench("epb crc32", epb_crc, enc, EPB_VALUES)
+    bench("epb crc32 table", epb_crc_table, enc, EPB_VALUES)
+
+
+if __name__ == "__main__":
+    bench_encoder()
+    bench_checksum()
+    bench_crc32()
@@ -23,6 +23,7 @@
 import modem
 import utime as time
 from usr.ais import AISClient, PacketTypes, AlertID
+from usr.frame_counter import FrameCounter
 from usr import logging
 
 logger = logging.getLogger(__name__)
@@ -61,6 +62,8 @@ if __name__ == "__main__":
     }
     ais_client = AISClient(**cfg)
     ais_client.set_callback(server_cmd)
+    # Frame numbers go on after reboot, so server can drop duplicates and find lost frames.
+    ais_client.set_frame_counter(FrameCounter("/usr/ais_frame.dat"))
 
     # Connect Server
     res = ais_client.connect()
@@ -0,0 +1,167 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : ais_history_benchmark_demo.py
+@author    : agent (agent@local)
+@brief     : Bytes on air of history bursts, standard, compact and compressed frames, on CPython.
+@version   : v1.0.0
+@date      : 2026-10-18 01:53:39
+@copyright : Copyright (c) 2026
+"""
+
+import os
+import sys
+import time
+import zlib
+import logging
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server"))
+
+from packet import COMPACT_HEAD, ZLIB_HEAD, FrameReader, expand_frame, inflate_frame  # noqa: E402
+from checksum import xor_checksum, write_hex  # noqa: E402
+from compact import compact_frames  # noqa: E402
+from compressor import BatchCompressor  # noqa: E402
+from encoder import nrm_encoder, epb_encoder  # noqa: E402
+
+# A day offline at 10 seconds reports is more than the default 1000 packets history queue.
+FRAMES = 1000
+# Same as `AISClient.set_history` default batch size.
+BATCH_SIZE = 4096
+# One alert or EPB frame per this location frames.
+ALERT_EVERY = 100
+# RAM budgets of `BatchCompressor`.
+BUDGETS = [6144, 8192, 16384]
+
+logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(asctime)s %(filename)s: %(message)s')
+
+NRM_VALUES = [
+    "QUECTEL", "EC200UCNAAR02A01M08", "NR", "02", "H", "868540050954037", "car123456", 1, "29042024",
+    "152000", "12.896545", "N", "76.358759", "E", 25, 135, 10, 76, 2.5, 1.9, "QUECTEL", 1, 1, 12.4, 4.2,
+    0, "C", 31, 404, 98, 123, 456, "1,2,3,1,2,3,1,2,3,1,2,3", "0000", "00", 6.7, 2.5, 123456, "000001"
+]
+EPB_VALUES = [
+    "QUECTEL", "EMR", "868540050954037", "NH", "29042024152000", "A", "12.896545", "N", "76.358759", "E",
+    76, 25, 12345, "G", "car123456", ""
+]
+
+
+def make_history():
+    """History queue of a moving vehicle, frames are built like AISClient does."""
+    nrm = nrm_encoder()
+    epb = epb_encoder()
+    frames = []
+    lat, lon, speed, heading, odometer = 12.896545, 76.358759, 25, 135, 123456
+    for i in range(FRAMES):
+        secs = 15 * 3600 + 20 * 60 + i * 10
+        if i % ALERT_EVERY == ALERT_EVERY - 1:
+            pos = epb.encode(EPB_VALUES)
+            frames.append(bytes(epb.view[:pos]) + b"%08X" % zlib.crc32(epb.view[:pos]))
+            continue
+        speed = max(0, min(80, speed + (i * 7 % 11) - 5))
+        heading = (heading + (i * 13 % 9) - 4) % 360
+        lat += speed * 0.0000005
+        lon -= speed * 0.0000003
+        odometer += speed * 10 // 3600
+        values = list(NRM_VALUES)
+        values[2] = "IN" if i % ALERT_EVERY == ALERT_EVERY // 2 else "NR"
+        values[9] = "%02d%02d%02d" % (secs // 3600 % 24, secs // 60 % 60, secs % 60)
+        values[10] = "%.6f" % lat
+        values[12] = "%.6f" % lon
+        values[14] = speed
+        values[15] = heading
+        values[16] = 9 + i % 3
+        values[27] = 28 + i % 5
+        values[37] = odometer
+        values[38] = "%06d" % (i + 1)
+        pos = nrm.encode(values)
+        csum = xor_checksum(nrm.buf, 2, pos)
+        pos = nrm.put(pos, b",")
+        pos = write_hex(nrm.buf, pos, csum)
+        pos = nrm.put(pos, b"*")
+        frames.append(bytes(nrm.view[:pos]))
+    return frames
+
+
+def batches(frames):
+    """Frames of each history write, the same split as `HistoryQueue.peek`."""
+    batch = []
+    total = 0
+    for frame in frames:
+        if batch and total + len(frame) > BATCH_SIZE:
+            yield batch
+            batch = []
+            total = 0
+        batch.append(frame)
+        total += len(frame)
+    if batch:
+        yield batch
+
+
+def receive(data):
+    """Frames rebuilt by the server from a history write."""
+    frames = []
+    reader = FrameReader(BATCH_SIZE)
+    for frame in reader.feed(data) + reader.flush():
+        if frame.startswith(ZLIB_HEAD):
+            frames.extend(receive(inflate_frame(frame)))
+        elif frame.startswith(COMPACT_HEAD):
+            frames.extend(expand_frame(frame))
+        else:
+            frames.append(frame)
+    return frames
+
+
+def run(name, frames, encode):
+    """Send all history with encode(batch frames) and log bytes on air."""
+    raw_total = 0
+    sent_total = 0
+    used = 0
+    received = []
+    for batch in batches(frames):
+        start = time.perf_counter()
+        data = encode(batch)
+        used += time.perf_counter() - start
+        raw_total += sum(len(i) for i in batch)
+        sent_total += len(data)
+        received.extend(receive(data))
+    if received != frames:
+        logging.error("%s: server rebuilds %s of %s frames, some are different" % (name, len(received), len(frames)))
+    logging.info("%-42s %7d bytes, %6d per batch, %4.1f%% saved, encode %5.1f us/packet" % (
+        name, sent_total, sent_total // len(list(batches(frames))), 100.0 * (raw_total - sent_total) / raw_total,
+        used * 1e6 / len(frames)))
+
+
+def compressed(compressor, join):
+    def encode(batch):
+        data = join(batch)
+        return compressor.compress(data) or data
+    return encode
+
+
+def main():
+    frames = make_history()
+    logging.info("%s packets in %s bytes batches" % (len(frames), BATCH_SIZE))
+    run("standard", frames, b"".join)
+    run("compact", frames, compact_frames)
+    for budget in BUDGETS:
+        # RAM is allocated once per compressor, the window is what the budget leaves.
+        compressor = BatchCompressor(budget, BATCH_SIZE)
+        name = "%s bytes ram, window %s" % (budget, compressor.window)
+        run("zlib, " + name, frames, compressed(compressor, b"".join))
+        run("compact+zlib, " + name, frames, compressed(compressor, compact_frames))
+
+
+if __name__ == "__main__":
+    main()
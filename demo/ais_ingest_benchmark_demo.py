@@ -0,0 +1,123 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : ais_ingest_benchmark_demo.py
+@author    : agent (agent@local)
+@brief     : Server ingest throughput benchmark on CPython.
+@version   : v1.0.0
+@date      : 2026-10-18 01:27:46
+@copyright : Copyright (c) 2026
+"""
+
+import os
+import sys
+import time
+import zlib
+import asyncio
+import logging
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server"))
+
+from ingest import IngestPipeline, SQLiteSink, decode_frames  # noqa: E402
+from bulk_decoder import np, decode_nrm  # noqa: E402
+from checksum import xor_checksum, write_hex  # noqa: E402
+from encoder import nrm_encoder, epb_encoder  # noqa: E402
+
+FRAMES = 100000
+# One EPB frame per this NRM frames.
+EPB_EVERY = 50
+WORKERS = [0, 1, 2, 4]
+
+logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(asctime)s %(filename)s: %(message)s')
+
+NRM_VALUES = [
+    "QUECTEL", "EC200UCNAAR02A01M08", "NR", "02", "H", "868540050954037", "car123456", 1, "29042024",
+    "152000", "12.896545", "N", "76.358759", "E", 25, 135, 10, 76, 2.5, 1.9, "QUECTEL", 1, 1, 12.4, 4.2,
+    0, "C", 31, 404, 98, 123, 456, "1,2,3,1,2,3,1,2,3,1,2,3", "0000", "00", 6.7, 2.5, 123456, "000001"
+]
+EPB_VALUES = [
+    "QUECTEL", "EMR", "868540050954037", "NM", "18122017124850", "A", "12.896545", "N", "76.358759", "E",
+    123, 25, 12345, "G", "car123456", ""
+]
+
+
+def make_frames():
+    """History replay stream, frames are built like AISClient does."""
+    nrm = nrm_encoder()
+    epb = epb_encoder()
+    frames = []
+    for i in range(FRAMES):
+        if i % EPB_EVERY == EPB_EVERY - 1:
+            pos = epb.encode(EPB_VALUES)
+            frames.append(bytes(epb.view[:pos]) + b"%08X" % zlib.crc32(epb.view[:pos]))
+            continue
+        NRM_VALUES[-1] = "%06d" % (i % 999999 + 1)
+        pos = nrm.encode(NRM_VALUES)
+        csum = xor_checksum(nrm.buf, 2, pos)
+        pos = nrm.put(pos, b",")
+        pos = write_hex(nrm.buf, pos, csum)
+        pos = nrm.put(pos, b"*")
+        frames.append(bytes(nrm.view[:pos]))
+    return frames
+
+
+async def run(frames, workers):
+    pipeline = IngestPipeline(SQLiteSink(), workers=workers)
+    start = time.perf_counter()
+    for frame in frames:
+        pipeline.submit(None, frame)
+        # Same back-pressure as AISServer: stop feeding until workers catch up.
+        while pipeline.pending() >= pipeline.max_pending:
+            await asyncio.sleep(0.001)
+    await pipeline.drain()
+    used = time.perf_counter() - start
+    stats = pipeline.stats()
+    rows = pipeline.sink.rows
+    pipeline.close()
+    if stats["records"] != len(frames) or stats["invalid"] or rows != len(frames):
+        logging.error("workers %s lost records: %s, %s rows" % (workers, stats, rows))
+    return used
+
+
+def bench_bulk(frames):
+    """Archive reprocessing: scalar parser against vectorized NRM decoder."""
+    if np is None:
+        logging.warning("NumPy is not installed, skip bulk decoder benchmark.")
+        return
+    frames = [i for i in frames if i.startswith(b"$,NRM,")]
+    data = b"\n".join(frames)
+    start = time.perf_counter()
+    decode_frames(frames)
+    used = time.perf_counter() - start
+    logging.info("scalar decode: %8d frames/s" % (len(frames) / used))
+    start = time.perf_counter()
+    columns = decode_nrm(data)
+    used = time.perf_counter() - start
+    if columns["valid"].sum() != len(frames):
+        logging.error("bulk decoder rejects %s frames" % (len(frames) - columns["valid"].sum()))
+    logging.info("bulk decode:   %8d frames/s" % (len(frames) / used))
+
+
+def main():
+    frames = make_frames()
+    logging.info("%s frames, %s bytes" % (len(frames), sum(len(i) for i in frames)))
+    for workers in WORKERS:
+        used = asyncio.run(run(frames, workers))
+        logging.info("workers %s: %8d frames/s" % (workers, len(frames) / used))
+    bench_bulk(frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,25 +15,25 @@
 """
 @file      : ais_server_demo.py
 @author    : Jack Sun (jack.sun@quectel.com)
-@brief     : <Description>
+@brief     : AIS-140 server demo on CPython.
 @version   : v1.0.0
 @date      : 2024-04-29 14:41:35
 @copyright : Copyright (c) 2024
 """
 
-import time
+import os
+import sys
+import asyncio
 import logging
-from threading import Thread
-from socketserver import BaseRequestHandler, TCPServer
 
-BUF_SIZE = 1024
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server"))
+
+from ais_server import AISServer  # noqa: E402
+from sequence_index import SequenceIndex  # noqa: E402
+
 SERVER_PORT = 31500
-THREAD_WORKERS_NUM = 10
+# SET PIP/PPT/SIP/SPT move devices to another server, they are not sent by this demo.
 CMDS = [
-    "SET PIP:example.com",
-    "SET PPT:8011",
-    "SET SIP:example.com",
-    "SET SPT:8011",
     "SET EO",
     "SET ED:50",
     "SET APN:CMNET",
@@ -57,39 +57,29 @@ logging.basicConfig(
 )
 
 
-class ReceiveHandler(BaseRequestHandler):
-    def setup(self):
-        logging.info("Connect from: " + str(self.client_address))
+def on_packet(conn, packet):
+    logging.debug("RECIVE %s %s" % (packet, packet.fields))
+    if packet.type == "EPB" and packet.valid:
+        # Commands are queued in the connection write buffer, the loop is not blocked.
+        for cmd in CMDS:
+            logging.debug("SEND cmd %s" % cmd)
+            conn.server.send_command(packet.imei, cmd)
 
-    def handle(self):
-        try:
-            while True:
-                msg = self.request.recv(BUF_SIZE)
-                if msg:
-                    logging.debug("RECIVE msg %s" % msg)
-                    if msg.startswith(b"$,EPB,"):
-                        for cmd in CMDS:
-                            logging.debug("SEND cmd %s" % cmd)
-                            self.request.sendall(cmd.encode())
-                            time.sleep(1)
-                else:
-                    break
-        except Exception as e:
-            logging.warning('Exception is: ' + str(e))
 
-    def finish(self):
-        logging.info("Disconnect from: " + str(self.client_address))
+async def main():
+    # Duplicate NRM frames are dropped and lost frames are listed by `SequenceIndex.missing`.
+    # Devices send history as compact frames after "SET HCM:1".
+    server = AISServer(port=SERVER_PORT, callback=on_packet, sequence=SequenceIndex(), compact_history=True)
+    await server.start()
+    logging.info("Start Server !")
+    try:
+        await server.serve_forever()
+    finally:
+        server.close()
 
 
 if __name__ == '__main__':
     try:
-        logging.info("Start Server !")
-        socket_serve = TCPServer(('', SERVER_PORT), ReceiveHandler)
-        for i in range(THREAD_WORKERS_NUM):
-            t = Thread(target=socket_serve.serve_forever)
-            t.daemon = True
-            t.start()
-        socket_serve.serve_forever()
+        asyncio.run(main())
     except KeyboardInterrupt:
-        socket_serve.shutdown()
         logging.info("Stop Server !")
@@ -0,0 +1,319 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : ais_server.py
+@author    : agent (agent@local)
+@brief     : Asyncio AIS-140 backend server on CPython.
+@version   : v1.0.0
+@date      : 2026-10-18 01:26:14
+@copyright : Copyright (c) 2026
+"""
+
+import asyncio
+import logging
+
+from packet import COMPACT_HEAD, ZLIB_HEAD, FrameReader, IMEI_INDEX, expand_frame, inflate_frame, parse_packet
+from checksum import xor_checksum
+from sequence_index import DUPLICATE
+
+logger = logging.getLogger(__name__)
+
+# Receive idle time to complete an EPB frame without all CRC digits.
+_FLUSH_DELAY = 0.5
+# Items of "$,NRM,..." split until IMEI.
+_NRM_IMEI_ITEM = IMEI_INDEX["NRM"] + 2
+_LGN_IMEI_ITEM = IMEI_INDEX["LGN"] + 2
+
+
+class AISProtocol(asyncio.Protocol):
+    """One tracker connection.
+
+    Data is framed and parsed in `data_received`, no task or stream object
+    is created per connection, so tens of thousands of connections are
+    served by one event loop.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.peer = None
+        self.imei = None
+        self.rx_at = 0
+        self.reader = FrameReader(server.max_frame_size)
+        self.__flush_handle = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.peer = transport.get_extra_info("peername")
+        self.rx_at = self.server.loop.time()
+        self.server._connection_made(self)
+
+    def data_received(self, data):
+        self.rx_at = self.server.loop.time()
+        self.server.rx_bytes += len(data)
+        for frame in self.reader.feed(data):
+            self.server._frame_received(self, frame)
+        if self.__flush_handle is not None:
+            self.__flush_handle.cancel()
+            self.__flush_handle = None
+        if self.reader.pending():
+            self.__flush_handle = self.server.loop.call_later(_FLUSH_DELAY, self.__flush)
+
+    def __flush(self):
+        self.__flush_handle = None
+        for frame in self.reader.flush():
+            self.server._frame_received(self, frame)
+
+    def eof_received(self):
+        self.__flush()
+
+    def connection_lost(self, exc):
+        if self.__flush_handle is not None:
+            self.__flush_handle.cancel()
+            self.__flush_handle = None
+        self.server._connection_lost(self)
+
+    def send(self, data):
+        """Write data without waiting.
+
+        Returns:
+            bool: False if connection is closed or its write buffer is full.
+        """
+        if self.transport is None or self.transport.is_closing():
+            return False
+        if self.transport.get_write_buffer_size() > self.server.write_buffer_max:
+            return False
+        self.transport.write(data)
+        return True
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+
+class AISServer:
+    """AIS-140 backend server.
+
+    Packets are parsed into `packet.Packet` records and given to `callback`
+    as `callback(conn, packet)` in the event loop thread, so the callback
+    must not block. Connections are indexed by IMEI of the received packets
+    for `send_command`.
+    """
+
+    def __init__(self, host="", port=31500, callback=None, idle_timeout=600, write_buffer_max=65536,
+                 max_frame_size=4096, backlog=1024, ingest=None, sequence=None,
+                 compact_history=False, max_inflate_size=65536):
+        """
+        Args:
+            host: listen host (default: {""})
+            port: listen port (default: {31500})
+            callback: packet callback `callback(conn, packet)` (default: {None})
+            idle_timeout: seconds without data before a connection is closed (default: {600})
+            write_buffer_max: max unsent bytes of a connection for commands (default: {65536})
+            max_frame_size: max bytes of a frame (default: {4096})
+            backlog: listen backlog (default: {1024})
+            ingest: `ingest.IngestPipeline` decoding frames instead of `callback` (default: {None})
+            sequence: `sequence_index.SequenceIndex` dropping duplicate NRM frames (default: {None})
+            compact_history: ask devices to send history as compact frames by `SET HCM:1` (default: {False})
+            max_inflate_size: max bytes of a decompressed `$,ZLB` batch (default: {65536})
+        """
+        self.host = host
+        self.port = port
+        self.callback = callback
+        self.idle_timeout = idle_timeout
+        self.write_buffer_max = write_buffer_max
+        self.max_frame_size = max_frame_size
+        self.backlog = backlog
+        self.ingest = ingest
+        if ingest is not None:
+            ingest.server = self
+        self.sequence = sequence
+        self.compact_history = compact_history
+        self.max_inflate_size = max_inflate_size
+        self.loop = None
+        self.connections = set()
+        self.devices = {}
+        self.rx_bytes = 0
+        self.frames = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.compact_frames = 0
+        self.compressed_frames = 0
+        self.__server = None
+        self.__sweep_handle = None
+        self.__paused = False
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.__server = await self.loop.create_server(
+            lambda: AISProtocol(self), self.host, self.port, backlog=self.backlog, reuse_address=True
+        )
+        if self.idle_timeout:
+            self.__sweep_handle = self.loop.call_later(self.idle_timeout / 4, self.__sweep)
+        logger.info("AIS server listen on %s" % (self.__server.sockets[0].getsockname(),))
+
+    async def serve_forever(self):
+        if self.__server is None:
+            await self.start()
+        await self.__server.serve_forever()
+
+    def close(self):
+        if self.__sweep_handle is not None:
+            self.__sweep_handle.cancel()
+            self.__sweep_handle = None
+        if self.__server is not None:
+            self.__server.close()
+        for conn in list(self.connections):
+            conn.close()
+
+    def __sweep(self):
+        # One timer for all connections instead of a timer per connection.
+        deadline = self.loop.time() - self.idle_timeout
+        for conn in [i for i in self.connections if i.rx_at < deadline]:
+            logger.info("Close idle connection %s" % (conn.peer,))
+            conn.close()
+        self.__sweep_handle = self.loop.call_later(self.idle_timeout / 4, self.__sweep)
+
+    def pause_reading(self):
+        """Stop reading all connections, used for back-pressure."""
+        self.__paused = True
+        for conn in self.connections:
+            conn.transport.pause_reading()
+
+    def resume_reading(self):
+        self.__paused = False
+        for conn in self.connections:
+            if not conn.transport.is_closing():
+                conn.transport.resume_reading()
+
+    def _connection_made(self, conn):
+        self.connections.add(conn)
+        if self.__paused:
+            conn.transport.pause_reading()
+        logger.debug("Connect from: %s" % (conn.peer,))
+
+    def _connection_lost(self, conn):
+        self.connections.discard(conn)
+        if conn.imei is not None and self.devices.get(conn.imei) is conn:
+            del self.devices[conn.imei]
+        logger.debug("Disconnect from: %s" % (conn.peer,))
+
+    def _register(self, conn, imei):
+        # Frames decoded by ingest workers come back after their connection may be closed.
+        if conn not in self.connections:
+            return
+        if imei and imei != conn.imei:
+            conn.imei = imei
+            self.devices[imei] = conn
+            if self.compact_history:
+                self.send_command(imei, "SET HCM:1")
+
+    def __duplicate(self, frame):
+        # "$,NRM,<fields...>,<frame_number>,<checksum>*", only IMEI and frame number are parsed.
+        end = frame.rfind(b",", 0, -1)
+        try:
+            # A broken frame is not recorded, or its good copy sent again is dropped.
+            if int(frame[end + 1:-1], 16) != xor_checksum(frame, 2, end):
+                return False
+            imei = frame.split(b",", _NRM_IMEI_ITEM + 1)[_NRM_IMEI_ITEM].decode("latin-1")
+            number = int(frame[frame.rfind(b",", 0, end) + 1:end])
+        except (IndexError, ValueError):
+            return False
+        status, _ = self.sequence.check(imei, number)
+        return status == DUPLICATE
+
+    def __login(self, frame):
+        # "$,LGN,<fields...>*", a device logs in after reboot, see `SequenceIndex.restarted`.
+        items = frame.split(b",", _LGN_IMEI_ITEM + 1)
+        if len(items) > _LGN_IMEI_ITEM + 1:
+            self.sequence.restarted(items[_LGN_IMEI_ITEM].decode("latin-1"))
+
+    def _frame_received(self, conn, frame):
+        if frame.startswith(ZLIB_HEAD):
+            # Compressed batch, its frames are handled as received one by one.
+            data = inflate_frame(frame, self.max_inflate_size)
+            if data is None:
+                self.invalid += 1
+                logger.warning("Invalid compressed frame from %s: %s bytes" % (conn.peer, len(frame)))
+                return
+            self.compressed_frames += 1
+            reader = FrameReader(len(data))
+            for batched in reader.feed(data) + reader.flush():
+                if not batched.startswith(ZLIB_HEAD):
+                    self._frame_received(conn, batched)
+            return
+        if frame.startswith(COMPACT_HEAD):
+            # History burst, its NRM frames are handled one by one as sent in standard form.
+            frames = expand_frame(frame)
+            if frames is None:
+                self.invalid += 1
+                logger.warning("Invalid compact frame from %s: %s" % (conn.peer, frame[:64]))
+                return
+            self.compact_frames += 1
+            for nrm in frames:
+                self._frame_received(conn, nrm)
+            return
+        self.frames += 1
+        if self.sequence is not None:
+            if frame.startswith(b"$,NRM,") and self.__duplicate(frame):
+                # Resent after a lost ACK, the first copy is stored already.
+                self.duplicates += 1
+                return
+            if frame.startswith(b"$,LGN,"):
+                self.__login(frame)
+        if self.ingest is not None:
+            self.ingest.submit(conn, frame)
+            return
+        packet = parse_packet(frame)
+        if packet is None or not packet.valid:
+            self.invalid += 1
+            logger.warning("Invalid frame from %s: %s" % (conn.peer, frame[:64]))
+            if packet is None:
+                return
+        if packet.valid:
+            self._register(conn, packet.imei)
+        if self.callback is not None:
+            try:
+                self.callback(conn, packet)
+            except Exception as e:
+                logger.exception("Packet callback error: %s" % e)
+
+    def send_command(self, imei, cmd):
+        """Push a command to a device without waiting.
+
+        Args:
+            imei(str): device IMEI
+            cmd(str/bytes): command, e.g. "SET UR:10"
+
+        Returns:
+            bool: False if device is not connected or its write buffer is full.
+        """
+        conn = self.devices.get(imei)
+        if conn is None:
+            return False
+        cmd = cmd.encode() if isinstance(cmd, str) else cmd
+        return conn.send(cmd + b"\r\n")
+
+    def stats(self):
+        return {
+            "connections": len(self.connections),
+            "devices": len(self.devices),
+            "rx_bytes": self.rx_bytes,
+            "frames": self.frames,
+            "invalid": self.invalid,
+            "duplicates": self.duplicates,
+            "compact_frames": self.compact_frames,
+            "compressed_frames": self.compressed_frames,
+        }
@@ -0,0 +1,349 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : archive.py
+@author    : agent (agent@local)
+@brief     : Append-only packet archive with IMEI and time index, read by mmap.
+@version   : v1.0.0
+@date      : 2026-10-18 01:31:50
+@copyright : Copyright (c) 2026
+"""
+
+import os
+import mmap
+import time
+import struct
+import calendar
+import threading
+
+from packet import PACKET_FIELDS
+
+KINDS = ("", "LGN", "HBT", "NRM", "EPB")
+_KIND_CODES = dict((kind, code) for code, kind in enumerate(KINDS) if kind)
+
+# Record columns, (name, struct format). Strings are ids of the strings file.
+RECORD_COLUMNS = (
+    ("imei", "I"),
+    ("timestamp", "q"),
+    ("kind", "B"),
+    ("valid", "B"),
+    ("packet_type", "I"),
+    ("packet_status", "I"),
+    ("alert_id", "B"),
+    ("gps_fix", "B"),
+    ("latitude", "d"),
+    ("longitude", "d"),
+    ("speed", "f"),
+    ("heading", "f"),
+    ("altitude", "f"),
+    ("no_of_satellites", "B"),
+    ("pdop", "f"),
+    ("hdop", "f"),
+    ("ignition", "B"),
+    ("main_power_status", "B"),
+    ("main_input_voltage", "f"),
+    ("internal_battery_voltage", "f"),
+    ("emergency_status", "B"),
+    ("gsm_strength", "B"),
+    ("mcc", "H"),
+    ("mnc", "H"),
+    ("lac", "I"),
+    ("cell_id", "I"),
+    ("digital_input_status", "B"),
+    ("digital_output_status", "B"),
+    ("analog_input_1", "f"),
+    ("analog_input_2", "f"),
+    ("odometer", "d"),
+    ("frame_number", "I"),
+    ("vender_id", "I"),
+    ("operator_name", "I"),
+    ("vehicle_reg_no", "I"),
+)
+STRING_COLUMNS = ("imei", "packet_type", "packet_status", "vender_id", "operator_name", "vehicle_reg_no")
+_BIT_COLUMNS = ("digital_input_status", "digital_output_status")
+
+_RECORD = struct.Struct("<" + "".join(i[1] for i in RECORD_COLUMNS))
+_NAMES = tuple(i[0] for i in RECORD_COLUMNS)
+_RECORD_BITS = {"B": 8, "H": 16, "I": 32, "q": 63}
+_KEY = struct.Struct("<IqB")
+# imei id, block, min timestamp, max timestamp
+_INDEX = struct.Struct("<IIqq")
+
+
+def _number(value, cast=float):
+    try:
+        return cast(value)
+    except ValueError:
+        return 0
+
+
+def _bits(value):
+    try:
+        return int(value, 2) & 0xFF
+    except ValueError:
+        return 0
+
+
+def _timestamp(date, clock):
+    # "DDMMYYYY", "hhmmss"
+    try:
+        return calendar.timegm((int(date[4:8]), int(date[2:4]), int(date[0:2]),
+                                int(clock[0:2]), int(clock[2:4]), int(clock[4:6])))
+    except ValueError:
+        return int(time.time())
+
+
+class PacketArchive:
+    """Append-only archive of decoded packets.
+
+    Records are fixed width and never cross a `block_size` block, numeric
+    fields are stored as numbers and strings are interned in the strings
+    file. For every sealed block the index file has one entry per IMEI in
+    the block with its time range, so a query for one IMEI and time range
+    only reads the blocks which have its records, by mmap.
+
+    Files: `<path>.dat` records, `<path>.idx` block index and
+    `<path>.str` interned strings, one per line.
+
+    It has `write(records)` and `close()`, so it can be the sink of
+    `ingest.IngestPipeline`.
+    """
+
+    def __init__(self, path, block_size=4096):
+        """
+        Args:
+            path: archive path without suffix
+            block_size: block bytes, a multiple of page size (default: {4096})
+        """
+        self.path = path
+        self.block_size = block_size
+        self.per_block = block_size // _RECORD.size
+        self.__padding = bytes(block_size - self.per_block * _RECORD.size)
+        self.__lock = threading.Lock()
+        self.__strings = []
+        self.__string_ids = {}
+        self.__index = {}
+        self.__block = {}
+        self.__count = 0
+        self.__pending = bytearray()
+        self.__pending_index = bytearray()
+        self.__pending_strings = []
+        self.__map = None
+        self.__open()
+
+    def __open(self):
+        if os.path.exists(self.path + ".str"):
+            with open(self.path + ".str", "r", encoding="utf-8") as f:
+                for line in f:
+                    self.__intern(line[:-1], False)
+        data_size = os.path.getsize(self.path + ".dat") if os.path.exists(self.path + ".dat") else 0
+        blocks, tail = divmod(data_size, self.block_size)
+        # A record half written by a crash is dropped.
+        tail -= tail % _RECORD.size
+        self.__data = open(self.path + ".dat", "a+b")
+        self.__data.truncate(blocks * self.block_size + tail)
+        self.__count = blocks * self.per_block + tail // _RECORD.size
+        indexed = 0
+        if os.path.exists(self.path + ".idx"):
+            with open(self.path + ".idx", "rb") as f:
+                data = f.read()
+            for pos in range(0, len(data) - len(data) % _INDEX.size, _INDEX.size):
+                imei, block, first, last = _INDEX.unpack_from(data, pos)
+                self.__index.setdefault(imei, []).append((block, first, last))
+                indexed = max(indexed, block + 1)
+        self.__idx = open(self.path + ".idx", "ab")
+        self.__str = open(self.path + ".str", "a", encoding="utf-8")
+        # Blocks sealed after the last index write and the open block are scanned.
+        with open(self.path + ".dat", "rb") as f:
+            for block in range(indexed, blocks + 1):
+                f.seek(block * self.block_size)
+                data = f.read(self.per_block * _RECORD.size)
+                for pos in range(0, len(data) - len(data) % _RECORD.size, _RECORD.size):
+                    imei, ts, kind = _KEY.unpack_from(data, pos)
+                    self.__add_key(imei, ts)
+                if block < blocks:
+                    self.__seal(block)
+        self.__flush()
+
+    def __intern(self, value, save=True):
+        sid = self.__string_ids.get(value)
+        if sid is None:
+            sid = len(self.__strings)
+            self.__strings.append(value)
+            self.__string_ids[value] = sid
+            if save:
+                self.__pending_strings.append(value + "\n")
+        return sid
+
+    def __add_key(self, imei, ts):
+        span = self.__block.get(imei)
+        if span is None:
+            self.__block[imei] = [ts, ts]
+        elif ts < span[0]:
+            span[0] = ts
+        elif ts > span[1]:
+            span[1] = ts
+
+    def __seal(self, block):
+        for imei, (first, last) in self.__block.items():
+            self.__index.setdefault(imei, []).append((block, first, last))
+            self.__pending_index += _INDEX.pack(imei, block, first, last)
+        self.__block = {}
+
+    def __record(self, kind, valid, values):
+        row = dict(zip(PACKET_FIELDS[kind], values))
+        get = row.get
+        if kind == "NRM":
+            ts = _timestamp(get("date", ""), get("time", ""))
+        elif kind == "EPB":
+            ts = _timestamp(get("date_time", "")[:8], get("date_time", "")[8:])
+        else:
+            ts = int(time.time())
+        lat = _number(get("latitude", 0))
+        lon = _number(get("longitude", 0))
+        if get("latitude_dir") == "S":
+            lat = -lat
+        if get("longitude_dir", get("longtiude_dir")) == "W":
+            lon = -lon
+        record = []
+        for name, fmt in RECORD_COLUMNS:
+            if name in STRING_COLUMNS:
+                value = self.__intern(get(name, ""))
+            elif name == "timestamp":
+                value = ts
+            elif name == "kind":
+                value = _KIND_CODES[kind]
+            elif name == "valid":
+                value = 1 if valid else 0
+            elif name == "latitude":
+                value = lat
+            elif name == "longitude":
+                value = lon
+            elif name in _BIT_COLUMNS:
+                value = _bits(get(name, ""))
+            elif fmt in "df":
+                value = _number(get(name, 0))
+            else:
+                value = _number(get(name, 0), int) & ((1 << _RECORD_BITS[fmt]) - 1)
+            record.append(value)
+        return record
+
+    def append(self, kind, valid, values):
+        """Append a record.
+
+        Args:
+            kind(str): LGN/HBT/NRM/EPB
+            valid(bool): packet checksum and layout are right
+            values(tuple): field values in `packet.PACKET_FIELDS` order
+        """
+        with self.__lock:
+            record = self.__record(kind, valid, values)
+            self.__pending += _RECORD.pack(*record)
+            self.__add_key(record[0], record[1])
+            self.__count += 1
+            if self.__count % self.per_block == 0:
+                self.__pending += self.__padding
+                self.__seal(self.__count // self.per_block - 1)
+
+    def write(self, records):
+        """Append `packet.parse_values` results and flush them."""
+        for kind, valid, values in records:
+            if len(values) == len(PACKET_FIELDS[kind]):
+                self.append(kind, valid, values)
+        self.flush()
+
+    def __flush(self):
+        # Strings before records and records before index, so ids and blocks always exist.
+        if self.__pending_strings:
+            self.__str.write("".join(self.__pending_strings))
+            self.__str.flush()
+            self.__pending_strings = []
+        if self.__pending:
+            self.__data.write(self.__pending)
+            self.__data.flush()
+            self.__pending = bytearray()
+        if self.__pending_index:
+            self.__idx.write(self.__pending_index)
+            self.__idx.flush()
+            self.__pending_index = bytearray()
+
+    def flush(self):
+        with self.__lock:
+            self.__flush()
+
+    def __mapped(self):
+        size = os.fstat(self.__data.fileno()).st_size
+        if self.__map is None or len(self.__map) < size:
+            if self.__map is not None:
+                self.__map.close()
+            self.__map = mmap.mmap(self.__data.fileno(), size, access=mmap.ACCESS_READ) if size else None
+        return self.__map
+
+    def query(self, imei, since=None, until=None, types=None):
+        """Records of an IMEI in a time range.
+
+        Args:
+            imei(str): device IMEI
+            since(int): min epoch seconds, None is no limit (default: {None})
+            until(int): max epoch seconds, None is no limit (default: {None})
+            types(set): packet kinds (e.g. "EPB") or NRM packet types
+                (e.g. "EA"), None is all (default: {None})
+
+        Returns:
+            list: records dicts in append order.
+        """
+        since = -(1 << 63) if since is None else since
+        until = (1 << 63) - 1 if until is None else until
+        records = []
+        with self.__lock:
+            self.__flush()
+            sid = self.__string_ids.get(imei)
+            if sid is None:
+                return records
+            blocks = [block for block, first, last in self.__index.get(sid, ()) if first <= until and last >= since]
+            span = self.__block.get(sid)
+            if span is not None and span[0] <= until and span[1] >= since:
+                blocks.append(self.__count // self.per_block)
+            buf = self.__mapped()
+            if buf is None:
+                return records
+            rows = self.per_block
+            for block in blocks:
+                base = block * self.block_size
+                for pos in range(base, min(base + rows * _RECORD.size, len(buf)), _RECORD.size):
+                    key, ts, kind = _KEY.unpack_from(buf, pos)
+                    if key != sid or ts < since or ts > until:
+                        continue
+                    record = dict(zip(_NAMES, _RECORD.unpack_from(buf, pos)))
+                    for name in STRING_COLUMNS:
+                        record[name] = self.__strings[record[name]]
+                    record["kind"] = KINDS[kind]
+                    if types is None or record["kind"] in types or record["packet_type"] in types:
+                        records.append(record)
+        return records
+
+    def size(self):
+        return self.__count
+
+    def close(self):
+        with self.__lock:
+            self.__flush()
+            if self.__map is not None:
+                self.__map.close()
+                self.__map = None
+            self.__data.close()
+            self.__idx.close()
+            self.__str.close()
+
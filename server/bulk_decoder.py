@@ -0,0 +1,311 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : bulk_decoder.py
+@author    : agent (agent@local)
+@brief     : Vectorized NRM decoder for archived packet captures, needs NumPy.
+@version   : v1.0.0
+@date      : 2026-10-18 01:30:25
+@copyright : Copyright (c) 2026
+"""
+
+from packet import NRM_FIELDS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_NRM_HEAD = b"$,NRM,"
+_NRM_NMR = NRM_FIELDS.index("nmr")
+# Commas of a frame: "$," "NRM," fields, nmr has a variable number of commas.
+_MIN_COMMAS = 2 + len(NRM_FIELDS)
+_NUMBER_WIDTH = 16
+
+# (field, column, dtype), numbers are parsed as decimal text.
+NUMBER_COLUMNS = (
+    ("alert_id", "alert_id", "u1"),
+    ("gps_fix", "gps_fix", "u1"),
+    ("speed", "speed", "f4"),
+    ("heading", "heading", "f4"),
+    ("no_of_satellites", "satellites", "u1"),
+    ("altitude", "altitude", "f4"),
+    ("pdop", "pdop", "f4"),
+    ("hdop", "hdop", "f4"),
+    ("ignition", "ignition", "u1"),
+    ("main_power_status", "main_power", "u1"),
+    ("main_input_voltage", "main_voltage", "f4"),
+    ("internal_battery_voltage", "battery_voltage", "f4"),
+    ("emergency_status", "emergency", "u1"),
+    ("gsm_strength", "gsm_strength", "u1"),
+    ("analog_input_1", "analog_input_1", "f4"),
+    ("analog_input_2", "analog_input_2", "f4"),
+    ("odometer", "odometer", "f8"),
+    ("frame_number", "frame_number", "i8"),
+)
+# (field, column, width), strings are kept as fixed width bytes.
+STRING_COLUMNS = (
+    ("imei", "imei", 16),
+    ("vehicle_reg_no", "vehicle_reg_no", 16),
+    ("packet_type", "packet_type", 2),
+    ("packet_status", "packet_status", 1),
+)
+
+
+_POW10 = 10.0 ** np.arange(_NUMBER_WIDTH + 1) if np is not None else None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("bulk_decoder needs NumPy, use packet.parse_values instead.")
+
+
+def _width(start, end, width):
+    # Columns are only walked up to the longest field.
+    return min(width, int((end - start).max())) if len(start) else 0
+
+
+def _gather(buf, start, end, width):
+    """Bytes of fields as a (n, width) matrix, bytes after field end are 0.
+
+    Columns are gathered one by one, a 1-D gather per column is much
+    cheaper than a 2-D index matrix.
+    """
+    size = end - start
+    chars = np.zeros((len(start), width), np.uint8)
+    limit = len(buf) - 1
+    for i in range(_width(start, end, width)):
+        chars[:, i] = np.where(i < size, buf[np.minimum(start + i, limit)], 0)
+    return chars, np.arange(width) < size[:, None]
+
+
+def _decimal(buf, start, end, width=_NUMBER_WIDTH):
+    """Parse decimal text like "-12.5" of all rows at once.
+
+    Digits are accumulated column by column into an int mantissa, so there
+    is no float power per digit.
+
+    Returns:
+        tuple: (float64 values, bool ok mask)
+    """
+    size = end - start
+    rows = len(start)
+    limit = len(buf) - 1
+    mantissa = np.zeros(rows, np.int64)
+    decimals = np.zeros(rows, np.int64)
+    has_dot = np.zeros(rows, bool)
+    has_digit = np.zeros(rows, bool)
+    neg = buf[np.minimum(start, limit)] == 45
+    ok = (size > 0) & (size <= width)
+    for i in range(_width(start, end, width)):
+        inside = i < size
+        char = buf[np.minimum(start + i, limit)]
+        digit = inside & ((char - 48) < 10)
+        dot = inside & (char == 46)
+        ok &= digit | dot | ~inside | (neg if i == 0 else False)
+        ok &= ~(dot & has_dot)
+        mantissa = np.where(digit, mantissa * 10 + (char - 48), mantissa)
+        decimals += digit & has_dot
+        has_dot |= dot
+        has_digit |= digit
+    values = mantissa / _POW10[decimals]
+    return np.where(neg, -values, values), ok & has_digit
+
+
+def _digits(buf, start, end, count):
+    """Fixed count digits fields, e.g. date "DDMMYYYY", as an int matrix."""
+    chars, _ = _gather(buf, start, end, count)
+    digits = chars.astype(np.int64) - 48
+    ok = ((end - start) == count) & ((digits >= 0) & (digits <= 9)).all(1)
+    return digits, ok
+
+
+def _number(digits, first, count):
+    value = np.zeros(len(digits), np.int64)
+    for i in range(first, first + count):
+        value = value * 10 + digits[:, i]
+    return value
+
+
+def _bits(buf, start, end, width=8):
+    """IO status text like "0101" as bits, first char is the highest bit."""
+    chars, inside = _gather(buf, start, end, width)
+    bits = (chars == 49).astype(np.int64)
+    ok = (end - start > 0) & (end - start <= width) & ((chars == 48) | (chars == 49) | ~inside).all(1)
+    weights = np.left_shift(1, np.clip((end - start)[:, None] - np.arange(width) - 1, 0, None))
+    return (bits * weights).sum(1), ok
+
+
+def _hex(buf, start, end, width=2):
+    chars, inside = _gather(buf, start, end, width)
+    chars = chars.astype(np.int64)
+    value = np.where(chars >= 65, (chars | 0x20) - 87, chars - 48)
+    ok = (end - start > 0) & (end - start <= width) & (((value >= 0) & (value <= 15)) | ~inside).all(1)
+    result = np.zeros(len(chars), np.int64)
+    for i in range(width):
+        result = np.where(inside[:, i], result * 16 + value[:, i], result)
+    return result, ok
+
+
+def _timestamp(buf, date_start, date_end, time_start, time_end):
+    """Epoch seconds of "DDMMYYYY" and "hhmmss" fields."""
+    date, date_ok = _digits(buf, date_start, date_end, 8)
+    clock, time_ok = _digits(buf, time_start, time_end, 6)
+    day, month, year = _number(date, 0, 2), _number(date, 2, 2), _number(date, 4, 4)
+    ok = date_ok & time_ok & (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    month = np.where(ok, month, 1)
+    day = np.where(ok, day, 1)
+    months = (year - 1970) * 12 + month - 1
+    days = months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64) + day - 1
+    seconds = _number(clock, 0, 2) * 3600 + _number(clock, 2, 2) * 60 + _number(clock, 4, 2)
+    return days * 86400 + seconds, ok
+
+
+def _find_frames(buf):
+    """Start, end (`*` index), first comma and last comma indexes of NRM frames."""
+    dollars = np.flatnonzero(buf == 36)
+    starts = dollars[dollars + len(_NRM_HEAD) <= len(buf)]
+    head = np.ones(len(starts), bool)
+    for i, char in enumerate(_NRM_HEAD):
+        head &= buf[starts + i] == char
+    starts = starts[head]
+    stars = np.flatnonzero(buf == 42)
+    index = np.searchsorted(stars, starts)
+    complete = index < len(stars)
+    starts = starts[complete]
+    ends = stars[index[complete]]
+    # A frame head before `*` means the frame is broken.
+    following = np.searchsorted(dollars, starts, "right")
+    broken = (following < len(dollars)) & (dollars[np.minimum(following, len(dollars) - 1)] < ends)
+    commas = np.flatnonzero(buf == 44)
+    first = np.searchsorted(commas, starts)
+    last = np.searchsorted(commas, ends) - 1
+    ok = ~broken & (last - first + 1 >= _MIN_COMMAS)
+    return starts, ends, commas, first, last, ok
+
+
+def decode_nrm(data):
+    """Decode all `$,NRM,...*` frames of a buffer into columns.
+
+    Frames may be joined or separated by any bytes, e.g. new lines. All
+    frames are decoded by array operations, there is no Python loop per
+    frame. Frames which are broken, have a bad field or a wrong checksum
+    are kept with `valid` False.
+
+    Args:
+        data(bytes/bytearray/memoryview/mmap/numpy.ndarray): packet capture
+
+    Returns:
+        dict: column name to numpy array, all arrays have one row per frame.
+            offset, size, valid, checksum_ok, timestamp (epoch seconds),
+            latitude/longitude (south/west negative), digital_input,
+            digital_output and the columns of NUMBER_COLUMNS, STRING_COLUMNS.
+    """
+    _require_numpy()
+    buf = data if isinstance(data, np.ndarray) else np.frombuffer(data, np.uint8)
+    starts, ends, commas, first, last, found = _find_frames(buf)
+    rows = len(starts)
+    columns = {"offset": starts, "size": ends + 1 - starts}
+    # Fields are decoded for well formed frames only, other rows stay invalid.
+    sel = np.flatnonzero(found)
+    first_ok, last_ok, starts_ok, ends_ok = first[sel], last[sel], starts[sel], ends[sel]
+
+    def field(index):
+        if index < _NRM_NMR:
+            return commas[first_ok + 1 + index] + 1, commas[first_ok + 2 + index]
+        back = len(NRM_FIELDS) - 1 - index
+        return commas[last_ok - 1 - back] + 1, commas[last_ok - back]
+
+    valid = np.zeros(rows, bool)
+    ok = np.ones(len(sel), bool)
+
+    def put(name, values, dtype, fill=0):
+        column = np.full(rows, fill, dtype)
+        column[sel] = values
+        columns[name] = column
+
+    for name, column, dtype in NUMBER_COLUMNS:
+        values, value_ok = _decimal(buf, *field(NRM_FIELDS.index(name)))
+        ok &= value_ok
+        put(column, values, dtype, np.nan if dtype[0] == "f" else 0)
+    for name, column, width in STRING_COLUMNS:
+        start, end = field(NRM_FIELDS.index(name))
+        chars, _ = _gather(buf, start, end, width)
+        ok &= end - start <= width
+        put(column, np.ascontiguousarray(chars).view("S%s" % width).ravel(), "S%s" % width, b"")
+
+    for name, sign in (("latitude", "S"), ("longitude", "W")):
+        values, value_ok = _decimal(buf, *field(NRM_FIELDS.index(name)))
+        start, end = field(NRM_FIELDS.index(name + "_dir"))
+        negative = (buf[start] == ord(sign)) & (end - start == 1)
+        ok &= value_ok
+        put(name, np.where(negative, -values, values), "f8", np.nan)
+
+    date_start, date_end = field(NRM_FIELDS.index("date"))
+    time_start, time_end = field(NRM_FIELDS.index("time"))
+    values, value_ok = _timestamp(buf, date_start, date_end, time_start, time_end)
+    ok &= value_ok
+    put("timestamp", values, "i8")
+    for name, column in (("digital_input_status", "digital_input"), ("digital_output_status", "digital_output")):
+        values, value_ok = _bits(buf, *field(NRM_FIELDS.index(name)))
+        ok &= value_ok
+        put(column, values, "u1")
+
+    # XOR of "NRM,...,<frame_number>" of all frames by one reduceat.
+    csum_comma = commas[last_ok]
+    bounds = np.empty(len(sel) * 2, np.int64)
+    bounds[0::2] = starts_ok + 2
+    bounds[1::2] = csum_comma
+    if len(sel):
+        xor = np.bitwise_xor.reduceat(buf, bounds)[0::2]
+    else:
+        xor = np.zeros(0, np.uint8)
+    csum, csum_ok = _hex(buf, csum_comma + 1, ends_ok)
+    csum_ok &= csum == xor
+    checksum_ok = np.zeros(rows, bool)
+    checksum_ok[sel] = csum_ok
+    valid[sel] = ok & csum_ok
+    columns["checksum_ok"] = checksum_ok
+    columns["valid"] = valid
+    return columns
+
+
+def decode_nrm_file(path, chunk_size=64 * 1024 * 1024):
+    """Decode a capture file by memory map, chunk by chunk.
+
+    Chunks are cut before the last frame head, so memory used is bounded by
+    chunk size no matter how large the file is.
+
+    Args:
+        path(str): capture file path
+        chunk_size: bytes decoded at once (default: {64 MB})
+
+    Yields:
+        dict: columns of `decode_nrm`, offset is file offset.
+    """
+    _require_numpy()
+    buf = np.memmap(path, np.uint8, "r")
+    pos = 0
+    size = len(buf)
+    while pos < size:
+        end = min(pos + chunk_size, size)
+        if end < size:
+            head = np.flatnonzero(buf[pos:end] == 36)
+            if len(head) and head[-1] > 0:
+                end = pos + int(head[-1])
+        columns = decode_nrm(buf[pos:end])
+        columns["offset"] += pos
+        yield columns
+        pos = end
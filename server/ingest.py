@@ -0,0 +1,228 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : ingest.py
+@author    : agent (agent@local)
+@brief     : Multi-process packet decoding and batched sink for AIS server.
+@version   : v1.0.0
+@date      : 2026-10-18 01:27:46
+@copyright : Copyright (c) 2026
+"""
+
+import asyncio
+import logging
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from packet import PACKET_FIELDS, IMEI_INDEX, parse_values
+
+logger = logging.getLogger(__name__)
+
+
+def decode_frames(frames):
+    """Decode a batch of frames, run in worker processes.
+
+    Args:
+        frames(list): frames bytes
+
+    Returns:
+        list: `packet.parse_values` results, None for unknown packets.
+    """
+    return [parse_values(frame) for frame in frames]
+
+
+class SQLiteSink:
+    """Store records into one SQLite table per packet type.
+
+    `write` is called from one sink thread, rows are committed once per
+    call, so a batch of records costs one transaction.
+    """
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self.rows = 0
+        self.__db = None
+
+    def __open(self):
+        self.__db = sqlite3.connect(self.path)
+        for kind, fields in PACKET_FIELDS.items():
+            self.__db.execute("CREATE TABLE IF NOT EXISTS %s (valid INTEGER, %s)" % (kind, ", ".join(fields)))
+        self.__db.commit()
+
+    def write(self, records):
+        """
+        Args:
+            records(list): (type, valid, values) tuples
+        """
+        if self.__db is None:
+            self.__open()
+        tables = {}
+        for kind, valid, values in records:
+            if len(values) == len(PACKET_FIELDS[kind]):
+                tables.setdefault(kind, []).append((valid,) + values)
+        for kind, rows in tables.items():
+            self.__db.executemany(
+                "INSERT INTO %s VALUES (%s)" % (kind, ",".join("?" * (len(PACKET_FIELDS[kind]) + 1))), rows
+            )
+            self.rows += len(rows)
+        self.__db.commit()
+
+    def close(self):
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
+
+
+class IngestPipeline:
+    """Decode frames in a process pool and write records to a sink in batches.
+
+    The event loop only frames data, frames are decoded in batches by
+    `workers` processes and the records are written by one sink thread.
+    When more than `max_pending` batches are waiting, reading of all
+    connections is paused until workers and sink catch up.
+    """
+
+    def __init__(self, sink, workers=2, batch_size=256, batch_delay=0.05, max_pending=None):
+        """
+        Args:
+            sink: object with `write(records)` and `close()`
+            workers: decoder processes, 0 is decoding in event loop (default: {2})
+            batch_size: frames number of a batch (default: {256})
+            batch_delay: max seconds a frame waits for its batch (default: {0.05})
+            max_pending: max batches in decoding or writing, None is 4 per worker (default: {None})
+        """
+        self.sink = sink
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_pending = max_pending or max(workers, 1) * 4
+        self.server = None
+        self.frames = 0
+        self.records = 0
+        self.invalid = 0
+        self.batches = 0
+        self.pauses = 0
+        self.__loop = None
+        self.__pool = ProcessPoolExecutor(workers) if workers else None
+        self.__sink_pool = ThreadPoolExecutor(1)
+        self.__frames = []
+        self.__conns = []
+        self.__pending = 0
+        self.__paused = False
+        self.__idle = None
+        self.__batch_handle = None
+
+    def submit(self, conn, frame):
+        """Add a frame received by conn, called in event loop."""
+        if self.__loop is None:
+            self.__loop = asyncio.get_running_loop()
+        self.__frames.append(frame)
+        self.__conns.append(conn)
+        if len(self.__frames) >= self.batch_size:
+            self.__submit_batch()
+        elif self.__batch_handle is None:
+            self.__batch_handle = self.__loop.call_later(self.batch_delay, self.__submit_batch)
+
+    def __submit_batch(self):
+        if self.__batch_handle is not None:
+            self.__batch_handle.cancel()
+            self.__batch_handle = None
+        if not self.__frames:
+            return
+        frames, conns = self.__frames, self.__conns
+        self.__frames, self.__conns = [], []
+        self.frames += len(frames)
+        self.batches += 1
+        self.__pending += 1
+        if self.__pool is None:
+            self.__decoded(conns, decode_frames(frames))
+        else:
+            fut = self.__loop.run_in_executor(self.__pool, decode_frames, frames)
+            fut.add_done_callback(lambda f: self.__decode_done(conns, f))
+        self.__check_pressure()
+
+    def __decode_done(self, conns, fut):
+        if fut.exception() is not None:
+            logger.error("Decode error: %s" % fut.exception())
+            self.invalid += len(conns)
+            self.__done()
+        else:
+            self.__decoded(conns, fut.result())
+
+    def __decoded(self, conns, results):
+        records = []
+        register = self.server is not None
+        for conn, res in zip(conns, results):
+            if res is None or not res[1]:
+                self.invalid += 1
+                if res is None:
+                    continue
+            elif register:
+                kind, _, values = res
+                self.server._register(conn, values[IMEI_INDEX[kind]])
+            records.append(res)
+        self.records += len(records)
+        fut = self.__loop.run_in_executor(self.__sink_pool, self.sink.write, records)
+        fut.add_done_callback(self.__written)
+
+    def __written(self, fut):
+        if fut.exception() is not None:
+            logger.error("Sink write error: %s" % fut.exception())
+        self.__done()
+
+    def __done(self):
+        self.__pending -= 1
+        self.__check_pressure()
+        if not self.__pending and self.__idle is not None:
+            self.__idle.set()
+
+    def __check_pressure(self):
+        if self.server is None:
+            return
+        if not self.__paused and self.__pending >= self.max_pending:
+            self.__paused = True
+            self.pauses += 1
+            self.server.pause_reading()
+        elif self.__paused and self.__pending <= self.max_pending // 2:
+            self.__paused = False
+            self.server.resume_reading()
+
+    def pending(self):
+        return self.__pending
+
+    async def drain(self):
+        """Submit the partial batch and wait until all records are written."""
+        self.__submit_batch()
+        while self.__pending:
+            self.__idle = asyncio.Event()
+            await self.__idle.wait()
+        self.__idle = None
+
+    def close(self):
+        if self.__pool is not None:
+            self.__pool.shutdown()
+        # Sink is closed in its own thread, e.g. SQLite connection can not be used by other threads.
+        self.__sink_pool.submit(self.sink.close).result()
+        self.__sink_pool.shutdown()
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "records": self.records,
+            "invalid": self.invalid,
+            "batches": self.batches,
+            "pending": self.__pending,
+            "pauses": self.pauses,
+        }
@@ -0,0 +1,267 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : packet.py
+@author    : agent (agent@local)
+@brief     : AIS-140 packet framing and parsing on CPython server.
+@version   : v1.0.0
+@date      : 2026-10-18 01:26:14
+@copyright : Copyright (c) 2026
+"""
+
+import os
+import sys
+import zlib
+
+# Field layouts and checksums are shared with the client code.
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "code"))
+
+from checksum import crc32, xor_checksum  # noqa: E402
+from compact import COMPACT_HEAD, expand_frame  # noqa: E402
+from compressor import ZLIB_HEAD  # noqa: E402
+from encoder import LGN_FIELDS, HBT_FIELDS, NRM_FIELDS, EPB_FIELDS  # noqa: E402
+
+_HEX_DIGITS = frozenset(b"0123456789ABCDEFabcdef")
+_CRC_DIGITS = 8
+_EPB_HEAD = b"$,EPB,"
+# Max digits of a `$,ZLB,<length>,` frame length.
+_ZLIB_LEN_DIGITS = 6
+_NRM_NMR = NRM_FIELDS.index("nmr")
+# Fields after nmr, nmr is the only field which has commas.
+_NRM_AFTER_NMR = len(NRM_FIELDS) - _NRM_NMR - 1
+
+PACKET_FIELDS = {
+    "LGN": LGN_FIELDS,
+    "HBT": HBT_FIELDS,
+    "NRM": NRM_FIELDS,
+    "EPB": EPB_FIELDS,
+}
+IMEI_INDEX = dict((kind, fields.index("imei")) for kind, fields in PACKET_FIELDS.items())
+
+
+class FrameReader:
+    """Split a TCP byte stream into `$,...*` frames.
+
+    Frames may be split in any place or joined without separators (history
+    batches). EPB frames carry CRC32 hex digits after `*`, they are complete
+    when 8 digits or the next frame head are received, or on `flush`.
+    Compressed `$,ZLB,<length>,<bytes>*` frames are binary, they are split
+    by length.
+    """
+
+    def __init__(self, max_size=4096):
+        """
+        Args:
+            max_size: max bytes kept for an incomplete frame (default: {4096})
+        """
+        self.max_size = max_size
+        self.dropped = 0
+        self.__buf = bytearray()
+
+    def feed(self, data):
+        """Add received data.
+
+        Args:
+            data(bytes): received data
+
+        Returns:
+            list: complete frames bytes.
+        """
+        buf = self.__buf
+        buf += data
+        frames = []
+        pos = 0
+        size = len(buf)
+        while True:
+            start = buf.find(b"$", pos)
+            if start < 0:
+                pos = size
+                break
+            if buf.startswith(ZLIB_HEAD, start):
+                end = self.__zlib_end(buf, start)
+                if end is None:
+                    pos = start
+                    break
+                if end < 0:
+                    self.dropped += 1
+                    pos = start + 1
+                    continue
+                frames.append(bytes(buf[start:end]))
+                pos = end
+                continue
+            end = buf.find(b"*", start)
+            if end < 0:
+                pos = start
+                break
+            # A frame head before `*` means the previous frame is broken.
+            head = buf.rfind(b"$", start, end)
+            if head > start:
+                self.dropped += 1
+                start = head
+            end += 1
+            if buf.startswith(_EPB_HEAD, start):
+                crc_start = end
+                limit = min(size, end + _CRC_DIGITS)
+                while end < limit and buf[end] in _HEX_DIGITS:
+                    end += 1
+                if end == size and end - crc_start < _CRC_DIGITS:
+                    # CRC digits may still be coming.
+                    pos = start
+                    break
+            frames.append(bytes(buf[start:end]))
+            pos = end
+        del buf[:pos]
+        if len(buf) > self.max_size:
+            self.dropped += 1
+            del buf[:]
+        return frames
+
+    @staticmethod
+    def __zlib_end(buf, start):
+        """End of a compressed frame, None if it is not received yet, -1 if it is broken."""
+        digits = start + len(ZLIB_HEAD)
+        comma = buf.find(b",", digits, digits + _ZLIB_LEN_DIGITS + 1)
+        if comma < 0:
+            return None if len(buf) <= digits + _ZLIB_LEN_DIGITS else -1
+        try:
+            end = comma + 1 + int(buf[digits:comma]) + 1
+        except ValueError:
+            return -1
+        if end > len(buf):
+            return None
+        return end if buf[end - 1] == 0x2A else -1
+
+    def pending(self):
+        return len(self.__buf)
+
+    def flush(self):
+        """Return the buffered frame if it is complete, used on receive idle."""
+        buf = self.__buf
+        frames = []
+        if buf.startswith(b"$") and b"*" in buf and not buf.startswith(ZLIB_HEAD):
+            frames.append(bytes(buf))
+        del buf[:]
+        return frames
+
+
+class Packet:
+    """A parsed packet, `fields` is field name to str value."""
+
+    __slots__ = ("type", "fields", "valid", "raw")
+
+    def __init__(self, type, fields, valid, raw):
+        self.type = type
+        self.fields = fields
+        self.valid = valid
+        self.raw = raw
+
+    @property
+    def imei(self):
+        return self.fields.get("imei")
+
+    def __repr__(self):
+        return "Packet(%s, %s, valid=%s)" % (self.type, self.imei, self.valid)
+
+
+def _nrm_values(frame, items):
+    # $,NRM,<fields...>,<frame_number>,<checksum>*
+    if len(items) < len(NRM_FIELDS) + 1:
+        return None, False
+    values = items[:_NRM_NMR]
+    values.append(",".join(items[_NRM_NMR:-_NRM_AFTER_NMR - 1]))
+    values.extend(items[-_NRM_AFTER_NMR - 1:-1])
+    try:
+        csum = int(items[-1], 16)
+    except ValueError:
+        return values, False
+    return values, xor_checksum(frame, 2, frame.rfind(b",", 0, -1)) == csum
+
+
+def _epb_values(frame, items):
+    # $,EPB,<fields...>*<crc32>
+    star = frame.rfind(b"*")
+    try:
+        csum = int(frame[star + 1:], 16)
+    except ValueError:
+        return items, False
+    return items, crc32(frame, 0, star + 1) == csum
+
+
+def inflate_frame(frame, max_size=65536):
+    """Decompress a `$,ZLB,<length>,<bytes>*` frame of `BatchCompressor`.
+
+    Args:
+        frame(bytes): compressed frame
+        max_size: max decompressed bytes (default: {65536})
+
+    Returns:
+        bytes: batched frames, None if the frame is broken or too large.
+    """
+    start = frame.find(b",", len(ZLIB_HEAD)) + 1
+    if not frame.startswith(ZLIB_HEAD) or start <= 0 or frame[-1:] != b"*":
+        return None
+    inflater = zlib.decompressobj()
+    try:
+        data = inflater.decompress(frame[start:-1], max_size)
+    except zlib.error:
+        return None
+    if not inflater.eof or inflater.unconsumed_tail:
+        return None
+    return data
+
+
+def parse_values(frame):
+    """Parse a frame into field values in `PACKET_FIELDS` order.
+
+    Values tuples are smaller than `Packet` objects to pass between
+    processes.
+
+    Args:
+        frame(bytes): `$,XXX,...*` frame
+
+    Returns:
+        tuple: (type, valid, values), None if packet type is unknown.
+    """
+    kind = frame[2:5].decode("latin-1")
+    fields = PACKET_FIELDS.get(kind)
+    if fields is None:
+        return None
+    text = frame[6:].decode("latin-1")
+    if kind == "NRM":
+        values, valid = _nrm_values(frame, text[:-1].split(","))
+        if values is None:
+            return kind, False, ()
+    elif kind == "EPB":
+        values, valid = _epb_values(frame, text[:text.rfind("*")].split(","))
+    else:
+        values = text[:-1].split(",")
+        valid = True
+    return kind, valid and len(values) == len(fields), tuple(values)
+
+
+def parse_packet(frame):
+    """Parse a frame from `FrameReader` into a `Packet`.
+
+    Args:
+        frame(bytes): `$,XXX,...*` frame
+
+    Returns:
+        Packet: packet record, None if packet type is unknown.
+    """
+    res = parse_values(frame)
+    if res is None:
+        return None
+    kind, valid, values = res
+    return Packet(kind, dict(zip(PACKET_FIELDS[kind], values)), valid, frame)
@@ -0,0 +1,271 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : sequence_index.py
+@author    : agent (agent@local)
+@brief     : Per-IMEI frame number index for duplicate and gap detection.
+@version   : v1.0.0
+@date      : 2026-10-18 01:49:29
+@copyright : Copyright (c) 2026
+"""
+
+import time
+from array import array
+
+# Frame number check results.
+NEW = 0
+DUPLICATE = 1
+LATE = 2
+STALE = 3
+
+FRAME_MIN = 1
+FRAME_MAX = 999999
+
+# Max gaps waiting per device, older ones are dropped.
+_GAPS_MAX = 16
+
+
+class SequenceIndex:
+    """Sliding window bitmap of received frame numbers per IMEI.
+
+    Frame numbers wrap from 999999 to 000001, so every device has an
+    unwrapped sequence of its newest frame (head) and a ring bitmap of the
+    last `window` sequences. A check is one bit test and set:
+
+    - NEW: after head, the frames skipped between are a gap.
+    - DUPLICATE: already received, the frame should be dropped.
+    - LATE: a missing frame of the window, e.g. a history replay.
+    - STALE: older than the window, it can not be checked.
+
+    Heads and bitmaps of all devices are kept in two flat buffers, a
+    device costs `8 + window / 8` bytes and its dict entry, so 100k
+    devices with the default window take about 25 MB.
+
+    A device keeping frame numbers on flash (`FrameCounter` of the client)
+    goes on after the reserved block on reboot, so up to a block of numbers
+    is never sent. After `restarted` (the device logged in), a skip of at
+    most `restart_skip` numbers before its next new frame is not a gap.
+
+    A device keeping frame numbers in RAM, or losing its counter file,
+    starts again from a lower number on reboot. After `restarted`, a frame
+    which is already received or older than the window resets the device
+    to that frame, so its new frames are not dropped as duplicates.
+    """
+
+    def __init__(self, window=1024, restart_skip=100):
+        """
+        Args:
+            window: frames tracked per device, a multiple of 8, should cover
+                the device history queue (default: {1024})
+            restart_skip: frame numbers a device may skip after reboot, the
+                `block` of its `FrameCounter`, 0 is counting them as gaps (default: {100})
+        """
+        self.window = max(8, window - window % 8)
+        self.restart_skip = restart_skip
+        self.__row = self.window // 8
+        self.__slots = {}
+        self.__heads = array("q")
+        self.__bits = bytearray()
+        # Gaps waiting for late frames: {imei key: [[first seq, last seq, found time], ...]}
+        self.__gaps = {}
+        # Devices logged in since their last new frame.
+        self.__restarted = set()
+        self.checked = 0
+        self.duplicates = 0
+        self.late = 0
+        self.stale = 0
+        self.gap_frames = 0
+        self.restart_skips = 0
+        self.restart_resets = 0
+
+    @staticmethod
+    def __key(imei):
+        # Numeric IMEIs are kept as int, half the size of str.
+        return int(imei) if imei.isdigit() and imei[0] != "0" else imei
+
+    @staticmethod
+    def frame(seq):
+        """Frame number of an unwrapped sequence."""
+        return (seq - FRAME_MIN) % (FRAME_MAX - FRAME_MIN + 1) + FRAME_MIN
+
+    def __seq(self, head, frame):
+        cycle = FRAME_MAX - FRAME_MIN + 1
+        diff = (frame - self.frame(head)) % cycle
+        return head + diff if diff < cycle // 2 else head - (cycle - diff)
+
+    def __test(self, slot, seq):
+        return self.__bits[slot * self.__row + (seq % self.window >> 3)] & (1 << (seq & 7))
+
+    def __test_set(self, slot, seq):
+        pos = slot * self.__row + (seq % self.window >> 3)
+        mask = 1 << (seq & 7)
+        seen = self.__bits[pos] & mask
+        self.__bits[pos] |= mask
+        return seen
+
+    def __clear(self, slot, start, end):
+        """Clear bits of sequences start..end, which are reused for newer frames."""
+        if end - start + 1 >= self.window:
+            base = slot * self.__row
+            self.__bits[base:base + self.__row] = bytes(self.__row)
+            return
+        for seq in range(start, end + 1):
+            pos = slot * self.__row + (seq % self.window >> 3)
+            self.__bits[pos] &= ~(1 << (seq & 7)) & 0xFF
+
+    def check(self, imei, frame):
+        """Record a received frame number.
+
+        Args:
+            imei(str): device IMEI
+            frame(int): frame number
+
+        Returns:
+            tuple: (NEW/DUPLICATE/LATE/STALE, gap), gap is (first, last)
+                frame numbers skipped before a NEW frame, or None.
+        """
+        self.checked += 1
+        key = self.__key(imei)
+        slot = self.__slots.get(key)
+        if slot is None:
+            slot = len(self.__heads)
+            self.__slots[key] = slot
+            self.__heads.append(frame)
+            self.__bits.extend(bytes(self.__row))
+            self.__test_set(slot, frame)
+            return NEW, None
+        head = self.__heads[slot]
+        seq = self.__seq(head, frame)
+        if seq > head:
+            self.__clear(slot, head + 1, seq)
+            self.__test_set(slot, seq)
+            self.__heads[slot] = seq
+            if seq == head + 1:
+                self.__restarted.discard(key)
+                return NEW, None
+            if key in self.__restarted:
+                self.__restarted.discard(key)
+                if seq - head - 1 <= self.restart_skip:
+                    # Numbers reserved before reboot, they are not sent.
+                    self.restart_skips += 1
+                    return NEW, None
+            self.gap_frames += seq - head - 1
+            gaps = self.__gaps.setdefault(key, [])
+            gaps.append([head + 1, seq - 1, time.monotonic()])
+            if len(gaps) > _GAPS_MAX:
+                gaps.pop(0)
+            return NEW, (self.frame(head + 1), self.frame(seq - 1))
+        if key in self.__restarted and (seq <= head - self.window or self.__test(slot, seq)):
+            # Frame counter went back on reboot, numbers before are of the last run.
+            self.__restarted.discard(key)
+            self.__gaps.pop(key, None)
+            self.__clear(slot, 0, self.window - 1)
+            self.__test_set(slot, seq)
+            self.__heads[slot] = seq
+            self.restart_resets += 1
+            return NEW, None
+        if seq <= head - self.window:
+            self.stale += 1
+            return STALE, None
+        if self.__test_set(slot, seq):
+            self.duplicates += 1
+            return DUPLICATE, None
+        self.late += 1
+        return LATE, None
+
+    def restarted(self, imei):
+        """Record a device login, it may be rebooted and skip reserved frame numbers
+        or start again from a lower number.
+
+        Args:
+            imei(str): device IMEI
+        """
+        key = self.__key(imei)
+        if key in self.__slots:
+            self.__restarted.add(key)
+
+    def __missing(self, slot, first, last):
+        """Missing ranges of first..last sequences, the part older than the window is missing."""
+        head = self.__heads[slot]
+        low = head - self.window + 1
+        ranges = []
+        start = first if first < low else None
+        base = slot * self.__row
+        for seq in range(max(first, low), last + 1):
+            if self.__bits[base + (seq % self.window >> 3)] & (1 << (seq & 7)):
+                if start is not None:
+                    ranges.append((start, seq - 1))
+                    start = None
+            elif start is None:
+                start = seq
+        if start is not None:
+            ranges.append((start, last))
+        return ranges
+
+    def missing(self, imei):
+        """Frame ranges of found gaps which are still missing.
+
+        Returns:
+            list: (first, last) frame numbers.
+        """
+        key = self.__key(imei)
+        slot = self.__slots.get(key)
+        ranges = []
+        for first, last, _ in self.__gaps.get(key, ()):
+            ranges.extend((self.frame(a), self.frame(b)) for a, b in self.__missing(slot, first, last))
+        return ranges
+
+    def due_gaps(self, delay, now=None):
+        """Take gaps found `delay` seconds ago whose frames are still missing.
+
+        Args:
+            delay: seconds to wait late frames
+            now: monotonic seconds (default: {None})
+
+        Returns:
+            list: (imei, first, last) frame numbers to request again.
+        """
+        now = time.monotonic() if now is None else now
+        due = []
+        for key in [k for k, gaps in self.__gaps.items() if now - gaps[0][2] >= delay]:
+            slot = self.__slots[key]
+            gaps = self.__gaps.pop(key)
+            keep = []
+            for gap in gaps:
+                if now - gap[2] < delay:
+                    keep.append(gap)
+                    continue
+                for a, b in self.__missing(slot, gap[0], gap[1]):
+                    due.append((str(key), self.frame(a), self.frame(b)))
+            if keep:
+                self.__gaps[key] = keep
+        return due
+
+    def __len__(self):
+        return len(self.__slots)
+
+    def stats(self):
+        return {
+            "devices": len(self.__slots),
+            "checked": self.checked,
+            "duplicates": self.duplicates,
+            "late": self.late,
+            "stale": self.stale,
+            "gap_frames": self.gap_frames,
+            "restart_skips": self.restart_skips,
+            "restart_resets": self.restart_resets,
+            "pending_gaps": sum(len(i) for i in self.__gaps.values()),
+            "memory": self.__heads.itemsize * len(self.__heads) + len(self.__bits),
+        }
@@ -0,0 +1,123 @@
+"""
+@file      : conftest.py
+@author    : agent (agent@local)
+@brief     : CPython stand-ins of QuecPython modules, device code is loaded as `usr.*` modules.
+@version   : v1.0.0
+@date      : 2026-10-18 02:09:44
+@copyright : Copyright (c) 2026
+
+MicroPython does not mangle `__name` attributes and the device code relies
+on it (e.g. subclasses use private attributes of their base), so sources
+are loaded with `__name` renamed to `_u_name`.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import types
+import zlib
+import random
+import struct
+import select
+import socket
+import binascii
+import threading
+import traceback
+
+import pytest
+
+CODE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "code")
+SERVER_PATH = os.path.join(os.path.dirname(CODE_PATH), "server")
+# Server modules import code modules by file name, appended to keep stdlib `logging`.
+sys.path.append(SERVER_PATH)
+
+_MANGLED = re.compile(r"(?<![\w])__([A-Za-z]\w*?)(?<!__)\b(?!__)")
+_DEPENDS = {
+    "ais": ("logging", "checksum", "compact", "frame_counter", "encoder"),
+    "compact": ("checksum",),
+    "motion_filter": ("encoder",),
+    "scheduler": ("logging",),
+}
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+class _CRC32:
+
+    def update(self, crc, data):
+        return zlib.crc32(data, crc) & 0xFFFFFFFF
+
+
+_threads = {}
+
+
+def _start_new_thread(func, args):
+    thread = threading.Thread(target=func, args=args, daemon=True)
+    thread.start()
+    _threads[thread.ident] = thread
+    return thread.ident
+
+
+_module("ure", match=re.match, search=re.search, compile=re.compile)
+_module("utime", sleep=time.sleep, sleep_ms=lambda ms: time.sleep(ms / 1000),
+        ticks_ms=lambda: int(time.monotonic() * 1000), ticks_us=lambda: int(time.monotonic() * 1000000),
+        ticks_diff=lambda a, b: a - b, ticks_add=lambda a, b: a + b, localtime=time.localtime,
+        mktime=time.mktime, time=lambda: int(time.time()))
+_module("_thread", allocate_lock=threading.Lock, start_new_thread=_start_new_thread, stack_size=lambda size: None,
+        threadIsRunning=lambda tid: _threads[tid].is_alive(), stop_thread=lambda tid: None,
+        get_ident=threading.get_ident)
+_module("utils", crc32=_CRC32)
+_module("ql_fs", path_exists=os.path.exists, path_getsize=os.path.getsize,
+        mkdirs=lambda path: os.makedirs(path, exist_ok=True))
+_module("uos", mkdir=os.mkdir, remove=os.remove, rename=os.rename, stat=os.stat, listdir=os.listdir)
+_module("urandom", randint=random.randint, getrandbits=random.getrandbits, random=random.random)
+_module("uselect", poll=select.poll, POLLIN=select.POLLIN, POLLOUT=select.POLLOUT, POLLHUP=select.POLLHUP,
+        POLLERR=select.POLLERR)
+_module("usocket", socket=socket.socket, getaddrinfo=socket.getaddrinfo, AF_INET=socket.AF_INET,
+        SOCK_STREAM=socket.SOCK_STREAM, SOCK_DGRAM=socket.SOCK_DGRAM, IPPROTO_TCP=socket.IPPROTO_TCP,
+        IPPROTO_UDP=socket.IPPROTO_UDP, SOL_SOCKET=socket.SOL_SOCKET, TCP_KEEPALIVE=9)
+sys.modules.setdefault("ustruct", struct)
+sys.modules.setdefault("ujson", json)
+sys.modules.setdefault("ubinascii", binascii)
+if not hasattr(sys, "print_exception"):
+    sys.print_exception = traceback.print_exception
+_usr = _module("usr")
+_usr.__path__ = []
+
+
+def load_module(name):
+    """Load code/<name>.py as `usr.<name>`, once per test session.
+
+    Args:
+        name(str): module file name without `.py`
+
+    Returns:
+        module: loaded module.
+    """
+    if "usr." + name in sys.modules:
+        return sys.modules["usr." + name]
+    for depend in _DEPENDS.get(name, ()):
+        load_module(depend)
+    with open(os.path.join(CODE_PATH, name + ".py")) as f:
+        source = _MANGLED.sub(lambda m: "_u_" + m.group(1), f.read())
+    module = types.ModuleType("usr." + name)
+    module.__file__ = os.path.join(CODE_PATH, name + ".py")
+    sys.modules["usr." + name] = module
+    setattr(_usr, name, module)
+    exec(compile(source, module.__file__, "exec"), module.__dict__)
+    if name == "logging":
+        module.setLogDebug(False)
+    return module
+
+
+@pytest.fixture
+def usr():
+    """Loader of device modules, e.g. `usr("ais").CommandParser`."""
+    return load_module
@@ -0,0 +1,188 @@
+"""
+@file      : test_ais_client.py
+@author    : agent (agent@local)
+@brief     : Send and ACK handling of the device client.
+@version   : v1.0.0
+@date      : 2026-10-18 02:34:17
+@copyright : Copyright (c) 2026
+"""
+
+import time
+import threading
+
+import pytest
+
+NRM_KWARGS = dict(zip((
+    "vender_id", "firmware_version", "packet_type", "alert_id", "packet_status", "imei", "vehicle_reg_no",
+    "gps_fix", "date", "time", "latitude", "latitude_dir", "longitude", "longitude_dir", "speed", "heading",
+    "no_of_satellites", "altitude", "pdop", "hdop", "operator_name", "ignition", "main_power_status",
+    "main_input_voltage", "internal_battery_voltage", "emergency_status", "temper_alert", "gsm_strength", "mcc",
+    "mnc", "lac", "cell_id", "nmr", "digital_input_status", "digital_output_status", "analog_input_1",
+    "analog_input_2", "odometer"
+), (
+    "QUECTEL", "EC200U", "NR", "01", "L", "868540050954037", "car123456", 1, "29042024", "152000", "12.896545",
+    "N", "76.358759", "E", 25, 135, 10, 76, 2.5, 1.9, "QUECTEL", 1, 1, 12.4, 4.2, 0, "C", 31, 404, 98, 123, 456,
+    "1,2,3,1,2,3", "0000", "00", 6.7, 2.5, 123456
+)))
+EPB_KWARGS = dict(zip((
+    "vender_id", "packet_type", "imei", "packet_status", "date_time", "gps_fix", "latitude", "latitude_dir",
+    "longitude", "longitude_dir", "altitude", "speed", "distance", "provider", "vehicle_reg_no", "reply_number"
+), (
+    "QUECTEL", "EMR", "868540050954037", "NM", "18122017124850", "A", "12.896545", "N", "76.358759", "E", 123,
+    25, 12345, "G", "car123456", ""
+)))
+
+
+class FakeSocket:
+    """Connected TCP socket of the module, ACKs are given by the test if `auto_ack` is False."""
+
+    def __init__(self, *args):
+        self.sent = bytearray()
+        self.acked = 0
+        self.auto_ack = True
+        self.sta = 4
+
+    def connect(self, addr):
+        pass
+
+    def setsockopt(self, *args):
+        pass
+
+    def setblocking(self, flag):
+        pass
+
+    def write(self, data):
+        if self.sta != 4:
+            raise OSError(104)
+        self.sent += data
+        if self.auto_ack:
+            self.acked = len(self.sent)
+        return len(data)
+
+    def readinto(self, buf):
+        return None
+
+    def getsendacksize(self):
+        return self.acked
+
+    def getsocketsta(self):
+        return self.sta
+
+    def close(self):
+        self.sta = 0
+
+    def ack(self):
+        self.acked = len(self.sent)
+
+
+class FakePoll:
+    """Socket is always writable and never readable."""
+
+    def __init__(self):
+        self.masks = {}
+
+    def register(self, sock, mask):
+        self.masks[id(sock)] = [sock, mask]
+
+    def modify(self, sock, mask):
+        self.masks[id(sock)][1] = mask
+
+    def unregister(self, sock):
+        self.masks.pop(id(sock), None)
+
+    def poll(self, timeout=-1):
+        end = time.monotonic() + (timeout / 1000 if timeout >= 0 else 3600)
+        while True:
+            events = []
+            for sock, mask in list(self.masks.values()):
+                event = mask & 0x04
+                if sock.sta != 4:
+                    event |= 0x10
+                if event:
+                    events.append((sock, event))
+            if events or time.monotonic() >= end:
+                return events
+            time.sleep(0.002)
+
+
+@pytest.fixture
+def client(usr, monkeypatch):
+    """Maker of connected clients on fake sockets: `client(**kwargs)` returns (client, socket)."""
+    ais = usr("ais")
+    sockets = []
+    clients = []
+    monkeypatch.setattr(ais.usocket, "socket", lambda *args: sockets.append(FakeSocket()) or sockets[-1])
+    monkeypatch.setattr(ais.uselect, "poll", FakePoll)
+    monkeypatch.setattr(ais.uselect, "POLLOUT", 0x04)
+    monkeypatch.setattr(ais.uselect, "POLLHUP", 0x10)
+
+    def make(**kwargs):
+        kwargs.setdefault("ack_timeout", 0.3)
+        ais_client = ais.AISClient(ip="10.0.0.1", port=31500, **kwargs)
+        clients.append(ais_client)
+        assert ais_client.connect()
+        return ais_client, sockets[-1]
+
+    yield make
+    for ais_client in clients:
+        ais_client.disconnect()
+
+
+def _history(usr, tmp_path):
+    return usr("history").HistoryQueue(str(tmp_path / "history.dat"), capacity=8)
+
+
+def test_acked_packets_return_true(client):
+    ais_client, sock = client()
+    assert ais_client.send_loction_alert_information(**NRM_KWARGS)
+    assert ais_client.send_emergency(**EPB_KWARGS)
+    assert bytes(sock.sent).count(b"$,") == 2
+
+
+def test_not_acked_packets_return_false_and_stored(usr, tmp_path, client):
+    ais_client, sock = client(ack_failover=10)
+    history = _history(usr, tmp_path)
+    ais_client.set_history(history)
+    sock.auto_ack = False
+    assert ais_client.send_loction_alert_information(**NRM_KWARGS) is False
+    assert ais_client.send_emergency(**EPB_KWARGS) is False
+    assert history.size() == 2
+
+
+def test_pipelined_window_waits_for_ack(client):
+    ais_client, sock = client(send_window=2, ack_timeout=2)
+    results = []
+    ais_client.set_ack_callback(lambda msg, res: results.append(res))
+    sock.auto_ack = False
+    assert ais_client.send_loction_alert_information(**NRM_KWARGS)
+    assert ais_client.send_loction_alert_information(**NRM_KWARGS)
+    sent = []
+    thread = threading.Thread(target=lambda: sent.append(ais_client.send_loction_alert_information(**NRM_KWARGS)))
+    thread.start()
+    time.sleep(0.2)
+    assert sent == []
+    assert bytes(sock.sent).count(b"$,NRM") == 2
+    # Emergency packets are not held back by a full window.
+    assert ais_client.send_emergency(**EPB_KWARGS)
+    assert bytes(sock.sent).count(b"$,EPB") == 1
+    sock.ack()
+    thread.join(1)
+    assert sent == [True]
+    assert bytes(sock.sent).count(b"$,NRM") == 3
+    sock.ack()
+    assert ais_client.flush(1)
+    assert results == [True] * 4
+
+
+def test_pipelined_ack_timeout_stored_to_history(usr, tmp_path, client):
+    ais_client, sock = client(send_window=4, ack_timeout=0.2, ack_failover=10)
+    history = _history(usr, tmp_path)
+    ais_client.set_history(history)
+    results = []
+    ais_client.set_ack_callback(lambda msg, res: results.append(res))
+    sock.auto_ack = False
+    assert ais_client.send_loction_alert_information(**NRM_KWARGS)
+    assert ais_client.send_emergency(**EPB_KWARGS)
+    assert ais_client.flush(1)
+    assert results == [False, False]
+    assert history.size() == 2
@@ -0,0 +1,117 @@
+"""
+@file      : test_ais_server.py
+@author    : agent (agent@local)
+@brief     : Frame handling of the AIS server.
+@version   : v1.0.0
+@date      : 2026-10-18 02:16:33
+@copyright : Copyright (c) 2026
+"""
+
+from ais_server import AISServer
+from checksum import write_hex, xor_checksum
+from sequence_index import SequenceIndex
+
+IMEI = "868540050954037"
+NRM_VALUES = [
+    "QUECTEL", "EC200U", "NR", "01", "L", IMEI, "car123456", "1", "29042024", "152000", "12.896545", "N",
+    "76.358759", "E", "25", "135", "10", "76", "2.5", "1.9", "QUECTEL", "1", "1", "12.4", "4.2", "0", "C", "31",
+    "404", "98", "123", "456", "1,2,3,1,2,3", "0000", "00", "6.7", "2.5", "123456"
+]
+LGN_FRAME = ("$,LGN,QUECTEL,AIS,%s,FW1,AIS140,12.896545,N,76.358759,E*" % IMEI).encode()
+
+
+class FakeConn:
+    peer = ("127.0.0.1", 50000)
+    imei = None
+
+
+def nrm_frame(number):
+    frame = bytearray(("$,NRM,%s,%06d,00*" % (",".join(NRM_VALUES), number)).encode())
+    write_hex(frame, len(frame) - 3, xor_checksum(frame, 2, len(frame) - 4))
+    return bytes(frame)
+
+
+def make_server(**kwargs):
+    packets = []
+    server = AISServer(callback=lambda conn, packet: packets.append(packet), sequence=SequenceIndex(), **kwargs)
+    return server, packets
+
+
+def test_duplicate_frame_dropped():
+    server, packets = make_server()
+    conn = FakeConn()
+    server._frame_received(conn, nrm_frame(1))
+    server._frame_received(conn, nrm_frame(1))
+    assert len(packets) == 1
+    assert server.stats()["duplicates"] == 1
+
+
+def test_corrupted_frame_does_not_mark_frame_number():
+    server, packets = make_server()
+    conn = FakeConn()
+    good = nrm_frame(1)
+    # Speed "25" changed on air, checksum does not match.
+    server._frame_received(conn, good.replace(b",E,25,", b",E,35,"))
+    server._frame_received(conn, good)
+    stats = server.stats()
+    assert stats["invalid"] == 1
+    assert stats["duplicates"] == 0
+    assert [packet.valid for packet in packets] == [False, True]
+    assert server.sequence.stats()["checked"] == 1
+
+
+def test_reboot_skip_after_login_is_not_gap():
+    server, packets = make_server()
+    conn = FakeConn()
+    server._frame_received(conn, nrm_frame(1))
+    server._frame_received(conn, LGN_FRAME)
+    # FrameCounter goes on after its reserved block of 100 numbers.
+    server._frame_received(conn, nrm_frame(101))
+    assert server.sequence.missing(IMEI) == []
+    server._frame_received(conn, nrm_frame(105))
+    assert server.sequence.missing(IMEI) == [(102, 104)]
+    assert len(packets) == 4
+
+
+def test_reboot_counter_back_after_login_is_new():
+    server, packets = make_server()
+    conn = FakeConn()
+    for number in range(1, 6):
+        server._frame_received(conn, nrm_frame(number))
+    server._frame_received(conn, LGN_FRAME)
+    # FrameCounter kept in RAM starts from 1 again.
+    for number in range(1, 4):
+        server._frame_received(conn, nrm_frame(number))
+    assert len(packets) == 9
+    assert server.stats()["duplicates"] == 0
+    assert server.sequence.stats()["restart_resets"] == 1
+    server._frame_received(conn, nrm_frame(3))
+    assert server.stats()["duplicates"] == 1
+
+
+def test_counter_back_without_login_is_duplicate():
+    server, packets = make_server()
+    conn = FakeConn()
+    for number in (1, 2, 1):
+        server._frame_received(conn, nrm_frame(number))
+    assert len(packets) == 2
+    assert server.stats()["duplicates"] == 1
+
+
+def test_skip_without_login_is_gap():
+    sequence = SequenceIndex()
+    sequence.check(IMEI, 1)
+    sequence.check(IMEI, 50)
+    assert sequence.missing(IMEI) == [(2, 49)]
+
+
+def test_register_open_connection_only():
+    server, _ = make_server()
+    conn = FakeConn()
+    server._connection_made(conn)
+    server._frame_received(conn, nrm_frame(1))
+    assert server.devices == {IMEI: conn}
+    server._connection_lost(conn)
+    # Decoded by ingest after the connection is closed.
+    server._register(conn, IMEI)
+    assert server.devices == {}
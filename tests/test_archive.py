@@ -0,0 +1,119 @@
+"""
+@file      : test_archive.py
+@author    : agent (agent@local)
+@brief     : Packet archive of the server, records and index after reopen.
+@version   : v1.0.0
+@date      : 2026-10-18 02:37:41
+@copyright : Copyright (c) 2026
+"""
+
+import calendar
+
+from archive import PacketArchive
+from packet import NRM_FIELDS
+
+IMEIS = ("868540050900001", "868540050900002", "868540050900003")
+START = calendar.timegm((2024, 5, 1, 0, 0, 0))
+
+
+def nrm(number, imei):
+    ts = START + number * 60
+    day, clock = divmod(ts - START, 86400)
+    values = dict.fromkeys(NRM_FIELDS, "0")
+    values.update({
+        "vender_id": "QUECTEL",
+        "packet_type": "EA" if number % 10 == 0 else "NR",
+        "packet_status": "L",
+        "imei": imei,
+        "vehicle_reg_no": "car%d" % (number % 3),
+        "date": "%02d052024" % (day + 1),
+        "time": "%02d%02d%02d" % (clock // 3600, clock // 60 % 60, clock % 60),
+        "latitude": "31.%06d" % number,
+        "latitude_dir": "S",
+        "longitude": "117.%06d" % number,
+        "longitude_dir": "E",
+        "operator_name": "QUECTEL",
+        "digital_input_status": "0101",
+        "digital_output_status": "10",
+        "frame_number": "%06d" % number,
+    })
+    return ts, [values[name] for name in NRM_FIELDS]
+
+
+def fill(archive, numbers):
+    expect = {}
+    for number in numbers:
+        imei = IMEIS[number % len(IMEIS)]
+        ts, values = nrm(number, imei)
+        archive.append("NRM", True, values)
+        expect.setdefault(imei, []).append((ts, number))
+    return expect
+
+
+def frames(records):
+    return [(record["timestamp"], record["frame_number"]) for record in records]
+
+
+def test_record_values(tmp_path):
+    archive = PacketArchive(str(tmp_path / "ais"))
+    fill(archive, [10])
+    record, = archive.query(IMEIS[1])
+    archive.close()
+    assert record["kind"] == "NRM" and record["valid"] == 1
+    assert record["timestamp"] == START + 600
+    assert record["packet_type"] == "EA" and record["vehicle_reg_no"] == "car1"
+    assert record["latitude"] == -31.00001 and record["longitude"] == 117.00001
+    assert record["digital_input_status"] == 0b0101 and record["digital_output_status"] == 0b10
+    assert record["frame_number"] == 10
+
+
+def test_reopen(tmp_path):
+    path = str(tmp_path / "ais")
+    archive = PacketArchive(path)
+    # Several sealed blocks and an open one.
+    count = archive.per_block * 3 + 5
+    expect = fill(archive, range(count))
+    before = dict((imei, archive.query(imei)) for imei in IMEIS)
+    archive.close()
+
+    archive = PacketArchive(path)
+    assert archive.size() == count
+    for imei in IMEIS:
+        records = archive.query(imei)
+        assert records == before[imei]
+        assert frames(records) == expect[imei]
+    since, until = START + 60 * 40, START + 60 * 70
+    assert frames(archive.query(IMEIS[0], since, until)) == [
+        (ts, number) for ts, number in expect[IMEIS[0]] if since <= ts <= until]
+    assert [record["frame_number"] for record in archive.query(IMEIS[1], types={"EA"})] == [
+        number for ts, number in expect[IMEIS[1]] if number % 10 == 0]
+    assert archive.query("868540050999999") == []
+
+    # Appending after reopen goes on from the open block.
+    more = fill(archive, range(count, count + archive.per_block))
+    archive.close()
+    archive = PacketArchive(path)
+    assert archive.size() == count + archive.per_block
+    for imei in IMEIS:
+        assert frames(archive.query(imei)) == expect[imei] + more[imei]
+    archive.close()
+
+    # Strings are interned once over reopens.
+    with open(path + ".str", encoding="utf-8") as f:
+        strings = f.read().splitlines()
+    assert len(strings) == len(set(strings))
+
+
+def test_reopen_drops_half_record(tmp_path):
+    path = str(tmp_path / "ais")
+    archive = PacketArchive(path)
+    expect = fill(archive, range(7))
+    archive.close()
+    with open(path + ".dat", "ab") as f:
+        f.write(b"\x01\x02\x03")
+
+    archive = PacketArchive(path)
+    assert archive.size() == 7
+    more = fill(archive, [7])
+    assert frames(archive.query(IMEIS[1])) == expect[IMEIS[1]] + more[IMEIS[1]]
+    archive.close()
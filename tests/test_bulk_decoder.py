@@ -0,0 +1,108 @@
+"""
+@file      : test_bulk_decoder.py
+@author    : agent (agent@local)
+@brief     : Vectorized NRM decoder of the server.
+@version   : v1.0.0
+@date      : 2026-10-18 02:36:32
+@copyright : Copyright (c) 2026
+"""
+
+import random
+import calendar
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from bulk_decoder import decode_nrm, decode_nrm_file  # noqa: E402
+from checksum import write_hex, xor_checksum  # noqa: E402
+from packet import NRM_FIELDS, parse_values  # noqa: E402
+
+
+def nrm_frame(values, csum=None):
+    frame = bytearray(("$,NRM,%s,00*" % ",".join(values)).encode())
+    csum = xor_checksum(frame, 2, len(frame) - 4) if csum is None else csum
+    write_hex(frame, len(frame) - 3, csum)
+    return bytes(frame)
+
+
+def nrm_values(rand, number):
+    values = dict(zip(NRM_FIELDS, (
+        "QUECTEL", "EC200U", "NR", "01", "L", "8685400509%05d" % rand.randint(0, 99999), "car%d" % number, "1",
+        "%02d%02d2024" % (rand.randint(1, 28), rand.randint(1, 12)),
+        "%02d%02d%02d" % (rand.randint(0, 23), rand.randint(0, 59), rand.randint(0, 59)),
+        "%.6f" % (rand.random() * 90), rand.choice("NS"), "%.6f" % (rand.random() * 180), rand.choice("EW"),
+        "%.1f" % (rand.random() * 120), str(rand.randint(0, 359)), str(rand.randint(0, 20)), "76", "2.5", "1.9",
+        "QUECTEL", str(rand.randint(0, 1)), "1", "12.4", "4.2", "0", "C", "31", "404", "98", "123", "456",
+        ",".join(str(rand.randint(1, 9)) for _ in range(rand.choice((3, 6, 12)))),
+        "".join(rand.choice("01") for _ in range(4)), "00", "6.7", "2.5", str(rand.randint(0, 10 ** 6)),
+        "%06d" % number,
+    )))
+    return values
+
+
+def capture(count=200, seed=7):
+    rand = random.Random(seed)
+    frames = []
+    for number in range(1, count + 1):
+        values = nrm_values(rand, number)
+        frame = nrm_frame([values[name] for name in NRM_FIELDS])
+        if number % 17 == 0:
+            # Corrupted on air, checksum does not match.
+            frame = frame.replace(b",L,", b",H,", 1)
+        frames.append((frame, values))
+    return frames
+
+
+def test_same_as_parse_values():
+    frames = capture()
+    data = b"\r\n".join(frame for frame, _ in frames) + b"\r\n"
+    columns = decode_nrm(data)
+    assert len(columns["valid"]) == len(frames)
+    for row, (frame, values) in enumerate(frames):
+        kind, valid, parsed = parse_values(frame)
+        assert columns["valid"][row] == valid
+        assert data[columns["offset"][row]:columns["offset"][row] + columns["size"][row]] == frame
+        if not valid:
+            continue
+        parsed = dict(zip(NRM_FIELDS, parsed))
+        assert parsed["nmr"] == values["nmr"]
+        assert columns["imei"][row] == parsed["imei"].encode()
+        assert columns["vehicle_reg_no"][row] == parsed["vehicle_reg_no"].encode()
+        assert columns["frame_number"][row] == int(parsed["frame_number"])
+        assert columns["speed"][row] == pytest.approx(float(parsed["speed"]))
+        assert columns["odometer"][row] == float(parsed["odometer"])
+        sign = -1 if parsed["latitude_dir"] == "S" else 1
+        assert columns["latitude"][row] == pytest.approx(sign * float(parsed["latitude"]))
+        sign = -1 if parsed["longitude_dir"] == "W" else 1
+        assert columns["longitude"][row] == pytest.approx(sign * float(parsed["longitude"]))
+        date, clock = parsed["date"], parsed["time"]
+        assert columns["timestamp"][row] == calendar.timegm((
+            int(date[4:]), int(date[2:4]), int(date[:2]), int(clock[:2]), int(clock[2:4]), int(clock[4:]), 0, 0, 0
+        ))
+        assert columns["digital_input"][row] == int(parsed["digital_input_status"], 2)
+    assert columns["valid"].sum() == len(frames) - len(frames) // 17
+
+
+def test_bad_frames_are_invalid():
+    rand = random.Random(1)
+    values = nrm_values(rand, 1)
+    good = nrm_frame([values[name] for name in NRM_FIELDS])
+    values["speed"] = "fast"
+    bad_field = nrm_frame([values[name] for name in NRM_FIELDS])
+    cut = good[:60]
+    columns = decode_nrm(cut + good + bad_field + b"$,HBT,QUECTEL*" + good[:-1])
+    assert list(columns["valid"]) == [False, True, False]
+    assert list(columns["checksum_ok"]) == [False, True, True]
+    assert parse_values(bad_field)[1]
+
+
+def test_file_chunks_same_as_buffer(tmp_path):
+    data = b"\n".join(frame for frame, _ in capture(300, 3))
+    path = tmp_path / "capture.log"
+    path.write_bytes(data)
+    whole = decode_nrm(data)
+    chunks = list(decode_nrm_file(str(path), chunk_size=4096))
+    assert len(chunks) > 1
+    for name in ("offset", "valid", "frame_number", "imei", "timestamp"):
+        assert np.array_equal(np.concatenate([chunk[name] for chunk in chunks]), whole[name])
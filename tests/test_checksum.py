@@ -0,0 +1,82 @@
+"""
+@file      : test_checksum.py
+@author    : agent (agent@local)
+@brief     : Frame checksums of the device.
+@version   : v1.0.0
+@date      : 2026-10-18 02:33:10
+@copyright : Copyright (c) 2026
+"""
+
+import random
+import zlib
+
+NRM = (b"$,NRM,QUECTEL,EC200U,NR,01,L,868540050954037,car123456,1,29042024,152000,12.896545,N,76.358759,E,"
+       b"25,135,10,76,2.5,1.9,QUECTEL,1,1,12.4,4.2,0,C,31,404,98,123,456,1,2,3,1,2,3,0000,00,6.7,2.5,123456,"
+       b"000001")
+EPB = b"$,EPB,QUECTEL,EMR,868540050954037,NM,18122017124850,A,12.896545,N,76.358759,E,123,25,12345,G,car123456,*"
+
+
+class LegacyCrc32:
+    """`utils.crc32` of the device, `update` starts from the CRC register value."""
+
+    def update(self, crc, data):
+        return zlib.crc32(data, crc ^ 0xFFFFFFFF) & 0xFFFFFFFF
+
+
+def legacy_crc32_checksum(data):
+    """`crc32_checksum` before `checksum.crc32`."""
+    csum = 0xFFFFFFFF
+    csum = LegacyCrc32().update(csum, data)
+    return hex(csum)[2:].upper()
+
+
+def slices(data, count=50):
+    rand = random.Random(len(data))
+    yield 0, len(data)
+    yield 2, len(data)
+    for _ in range(count):
+        start = rand.randint(0, len(data))
+        yield start, rand.randint(start, len(data))
+
+
+def test_xor_checksum_same_as_legacy(usr):
+    ais = usr("ais")
+    checksum = usr("checksum")
+    for frame in (NRM, EPB, bytes(range(256))):
+        buf = bytearray(frame)
+        for start, end in slices(frame):
+            value = checksum.xor_checksum(buf, start, end)
+            assert value == int(ais.checksum(frame[start:end]), 16)
+            assert value == checksum.xor_checksum(memoryview(frame)[start:end])
+            # Incremental over a split point.
+            split = (start + end) // 2
+            assert value == checksum.xor_checksum(buf, split, end, checksum.xor_checksum(buf, start, split))
+
+
+def test_crc32_same_as_legacy(usr):
+    ais = usr("ais")
+    checksum = usr("checksum")
+    for frame in (EPB, NRM, bytes(range(256))):
+        buf = bytearray(frame)
+        for start, end in slices(frame):
+            value = checksum.crc32(buf, start, end)
+            assert value == int(legacy_crc32_checksum(frame[start:end]), 16)
+            assert value == checksum.crc32_table(buf, start, end)
+            assert ais.crc32_checksum(frame[start:end]) == "%08X" % value
+
+
+def test_hex_zero_padded(usr):
+    # Legacy checksums dropped leading zeros, frames now always carry 2 or 8 hex digits.
+    ais = usr("ais")
+    checksum = usr("checksum")
+    frame = b"\x0a"
+    assert ais.checksum(frame) == "A"
+    out = bytearray(2)
+    assert checksum.write_hex(out, 0, checksum.xor_checksum(frame)) == 2
+    assert out == b"0A"
+    out = bytearray(8)
+    checksum.write_hex(out, 0, 0x1234, 8)
+    assert out == b"00001234"
+    for frame in (NRM, EPB):
+        legacy = legacy_crc32_checksum(frame)
+        assert ais.crc32_checksum(frame) == legacy.rjust(8, "0")
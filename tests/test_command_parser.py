@@ -0,0 +1,96 @@
+"""
+@file      : test_command_parser.py
+@author    : agent (agent@local)
+@brief     : Server commands tokenizer of the device.
+@version   : v1.0.0
+@date      : 2026-10-18 02:09:44
+@copyright : Copyright (c) 2026
+"""
+
+
+def _parse(usr, reads, size=64, final=False):
+    ais = usr("ais")
+    commands = []
+    rx = ais.RingBuffer(size)
+    parser = ais.CommandParser(lambda *cmd: commands.append(cmd))
+    for data in reads:
+        while data:
+            # Free space may wrap at the buffer end.
+            view = rx.write_view()
+            size = min(len(view), len(data))
+            view[:size] = data[:size]
+            rx.commit(size)
+            data = data[size:]
+        parser.parse(rx)
+    if final:
+        parser.parse(rx, final=True)
+    return commands, rx
+
+
+def test_command_ends_near_read_end(usr):
+    # Key or value chars S/G/C within 4 bytes of the read end are not keywords, CR/LF still ends the command.
+    commands, rx = _parse(usr, [b"GET GPS\r\n"])
+    assert commands == [("GET", "GPS", "")]
+    assert rx.used == 0
+    commands, rx = _parse(usr, [b"SET VN:AB12CS\r\n", b"CLR EMR\r\n"])
+    assert commands == [("SET", "VN", "AB12CS"), ("CLR", "EMR", "")]
+    assert rx.used == 0
+
+
+def test_command_value_is_not_split_keyword(usr):
+    commands, _ = _parse(usr, [b"SET VN:XSE"], final=True)
+    assert commands == [("SET", "VN", "XSE")]
+
+
+def test_keyword_split_across_reads(usr):
+    commands, rx = _parse(usr, [b"SET VN:AB\r\nGE", b"T GPS\r\n"])
+    assert commands == [("SET", "VN", "AB"), ("GET", "GPS", "")]
+    assert rx.used == 0
+
+
+def test_command_split_across_reads(usr):
+    commands, _ = _parse(usr, [b"SET VN:A", b"B12", b"CS\r"])
+    assert commands == [("SET", "VN", "AB12CS")]
+
+
+def test_commands_without_delimiter(usr):
+    commands, _ = _parse(usr, [b"GET GPSSET VN:1"], final=True)
+    assert commands == [("GET", "GPS", ""), ("SET", "VN", "1")]
+
+
+def _client_servers(usr, data, **kwargs):
+    ais = usr("ais")
+    client = ais.AISClient(ip="10.0.0.1", port=31500, **kwargs)
+    servers = []
+    commands = []
+    client.set_server = lambda **server: servers.append(server)
+    client.set_callback(lambda *cmd: commands.append(cmd))
+    rx = ais.RingBuffer(256)
+    rx.write_view()[:len(data)] = data
+    rx.commit(len(data))
+    client.parse(rx)
+    return servers, commands
+
+
+def test_server_address_commands_are_opt_in(usr):
+    servers, commands = _client_servers(usr, b"SET PIP:example.com\r\nSET PPT:8011\r\n")
+    assert servers == []
+    assert commands == [("SET", "PIP", "example.com"), ("SET", "PPT", "8011")]
+    servers, _ = _client_servers(usr, b"SET PIP:example.com\r\nSET SPT:8011\r\n", remote_server=True)
+    assert servers == [{"host": "example.com", "secondary": False}, {"port": 8011, "secondary": True}]
+
+
+def test_invalid_server_address_ignored(usr):
+    data = b"SET PIP:bad host\r\nSET SIP:256.1.1.1\r\nSET PIP:-a.com\r\nSET PPT:0\r\nSET SPT:70000\r\n"
+    servers, commands = _client_servers(usr, data, remote_server=True)
+    assert servers == []
+    assert len(commands) == 5
+    servers, _ = _client_servers(usr, b"SET SIP:10.0.0.2\r\nSET PIP:fe80::1\r\n", remote_server=True)
+    assert servers == [{"host": "10.0.0.2", "secondary": True}, {"host": "fe80::1", "secondary": False}]
+
+
+def test_ring_buffer_wrap(usr):
+    reads = [b"GET GPS\r\n"] * 8
+    commands, rx = _parse(usr, reads, size=16)
+    assert commands == [("GET", "GPS", "")] * 8
+    assert rx.used == 0
@@ -0,0 +1,98 @@
+"""
+@file      : test_compact.py
+@author    : agent (agent@local)
+@brief     : Compact history frames of the device.
+@version   : v1.0.0
+@date      : 2026-10-18 02:35:15
+@copyright : Copyright (c) 2026
+"""
+
+NRM_VALUES = [
+    "QUECTEL", "EC200U", "NR", "01", "H", "868540050954037", "car123456", "1", "29042024", "152000",
+    "12.896545", "N", "76.358759", "E", "25.0", "135", "10", "76", "2.5", "1.9", "QUECTEL", "1", "1", "12.4",
+    "4.2", "0", "C", "31", "404", "98", "123", "456", "1", "2", "3", "0000", "00", "6.7", "2.5", "123456",
+    "000001"
+]
+
+
+def nrm_frame(usr, values):
+    checksum = usr("checksum")
+    frame = bytearray(("$,NRM,%s,00*" % ",".join(values)).encode())
+    checksum.write_hex(frame, len(frame) - 3, checksum.xor_checksum(frame, 2, len(frame) - 4))
+    return bytes(frame)
+
+
+def nrm_run(usr, count):
+    frames = []
+    values = list(NRM_VALUES)
+    for i in range(count):
+        values[9] = "%06d" % (152000 + i * 10)
+        values[10] = "%.6f" % (12.896545 + i * 0.000125)
+        values[14] = "%.1f" % (25 - i * 1.5)
+        values[16] = str(10 - i)
+        values[-1] = "%06d" % (i + 1)
+        frames.append(nrm_frame(usr, values))
+    return frames
+
+
+def split_frames(data):
+    # Test frames have no "*" but the last byte.
+    return [i + b"*" for i in data.split(b"*")[:-1]]
+
+
+def expand(usr, data):
+    compact = usr("compact")
+    frames = []
+    for frame in split_frames(data):
+        if frame.startswith(compact.COMPACT_HEAD):
+            frames.extend(compact.expand_frame(frame))
+        else:
+            frames.append(frame)
+    return frames
+
+
+def test_nrm_run_round_trip(usr):
+    compact = usr("compact")
+    frames = nrm_run(usr, 20)
+    data = compact.compact_frames(frames)
+    assert data.startswith(compact.COMPACT_HEAD)
+    assert len(split_frames(data)) == 1
+    assert len(data) < sum(len(i) for i in frames) // 3
+    assert expand(usr, data) == frames
+
+
+def test_items_number_change_and_empty_values(usr):
+    compact = usr("compact")
+    frames = nrm_run(usr, 3)
+    values = list(NRM_VALUES)
+    values[32:35] = ["1", "2", "3", "4", "5"]
+    values[6] = ""
+    values[14] = "-0.5"
+    frames.append(nrm_frame(usr, values))
+    values[6] = "car123456"
+    frames.append(nrm_frame(usr, values))
+    data = compact.compact_frames(frames)
+    assert b";!" in data
+    assert expand(usr, data) == frames
+
+
+def test_other_frames_split_runs(usr):
+    compact = usr("compact")
+    hbt = b"$,HBT,QUECTEL,EC200U,868540050954037,60%,30%,30%,10,60,0001,12.6*"
+    frames = nrm_run(usr, 3)
+    frames = frames[:2] + [hbt] + frames[2:]
+    data = compact.compact_frames(frames)
+    out = split_frames(data)
+    assert out[0].startswith(compact.COMPACT_HEAD)
+    # A single NRM frame is not compacted.
+    assert out[1:] == [hbt, frames[-1]]
+    assert expand(usr, data) == frames
+
+
+def test_broken_compact_frame(usr):
+    compact = usr("compact")
+    frame = compact.compact_frames(nrm_run(usr, 4))
+    body = bytearray(frame)
+    body[10] ^= 0x01
+    assert compact.expand_frame(bytes(body)) is None
+    assert compact.expand_frame(frame[:-1]) is None
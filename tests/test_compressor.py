@@ -0,0 +1,63 @@
+"""
+@file      : test_compressor.py
+@author    : agent (agent@local)
+@brief     : History batch compressor of the device.
+@version   : v1.0.0
+@date      : 2026-10-18 02:35:35
+@copyright : Copyright (c) 2026
+"""
+
+import random
+import zlib
+
+import pytest
+
+
+def nrm_batch(count, seed=0):
+    rand = random.Random(seed)
+    frames = []
+    for i in range(count):
+        frames.append((
+            "$,NRM,QUECTEL,EC200U,NR,01,H,868540050954037,car123456,1,29042024,%06d,%.6f,N,%.6f,E,%.1f,%d,10,76,"
+            "2.5,1.9,QUECTEL,1,1,12.4,4.2,0,C,31,404,98,123,456,1,2,3,1,2,3,0000,00,6.7,2.5,123456,%06d,%02X*"
+            % (152000 + i * 10, 12.896545 + rand.random() / 100, 76.358759 + rand.random() / 100,
+               rand.random() * 80, rand.randint(0, 359), i + 1, rand.randint(0, 255))
+        ).encode())
+    return b"".join(frames)
+
+
+def inflate(usr, frame):
+    head = usr("compressor").ZLIB_HEAD
+    assert frame.startswith(head) and frame.endswith(b"*")
+    size, _, body = frame[len(head):-1].partition(b",")
+    assert int(size) == len(body)
+    return zlib.decompress(body)
+
+
+def test_zlib_decompresses_batches(usr):
+    compressor = usr("compressor").BatchCompressor()
+    for count in (2, 5, 16):
+        data = nrm_batch(count, count)
+        frame = compressor.compress(data)
+        assert frame is not None and len(frame) < len(data)
+        assert inflate(usr, frame) == data
+    assert compressor.stats()["batches"] == 3
+
+
+def test_budgets_and_long_matches(usr):
+    data = nrm_batch(12) + b"A" * 1000 + bytes(range(256)) * 2 + b"x"
+    for budget, max_chain in ((4096 + 2048, 1), (8192, 8), (65536, 32)):
+        compressor = usr("compressor").BatchCompressor(budget, 4096, max_chain)
+        assert compressor.memory <= budget
+        assert inflate(usr, compressor.compress(data)) == data
+
+
+def test_not_compressed(usr):
+    compressor = usr("compressor").BatchCompressor(max_size=1024)
+    rand = random.Random(1)
+    assert compressor.compress(bytes(rand.randint(0, 255) for _ in range(512))) is None
+    assert compressor.compress(nrm_batch(10)) is None
+    assert compressor.compress(b"") is None
+    assert compressor.stats()["batches"] == 0
+    with pytest.raises(ValueError):
+        usr("compressor").BatchCompressor(budget=4096, max_size=4096)
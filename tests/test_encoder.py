@@ -0,0 +1,46 @@
+"""
+@file      : test_encoder.py
+@author    : agent (agent@local)
+@brief     : Packet encoders of the device.
+@version   : v1.0.0
+@date      : 2026-10-18 02:32:31
+@copyright : Copyright (c) 2026
+"""
+
+import pytest
+
+NRM_VALUES = [
+    "QUECTEL", "EC200U", "NR", "01", "L", "868540050954037", "car123456", 1, "29042024", "152000",
+    "12.896545", "N", "76.358759", "E", 25, 135, 10, 76, 2.5, 1.9, "QUECTEL", True, 1, 12.4, 4.2, 0, "C", -31,
+    404, 98, 123, 456, "1,2,3,1,2,3", b"0000", bytearray(b"00"), 6.7, 2.5, 123456, "000001"
+]
+
+
+def test_nrm_same_as_format(usr):
+    encoder = usr("encoder")
+    enc = encoder.nrm_encoder()
+    pos = enc.encode(NRM_VALUES)
+    text = [bytes(i).decode() if isinstance(i, (bytes, bytearray)) else i for i in NRM_VALUES]
+    assert bytes(enc.view[:pos]) == ("$,NRM," + ",".join("{}".format(i) for i in text)).encode()
+
+
+def test_int_frame_number_zero_padded(usr):
+    encoder = usr("encoder")
+    enc = encoder.nrm_encoder()
+    values = list(NRM_VALUES)
+    values[-1] = 42
+    pos = enc.encode(values)
+    assert bytes(enc.view[:pos]).endswith(b",123456,000042")
+    values[-1] = 1234567
+    pos = enc.encode(values)
+    assert bytes(enc.view[:pos]).endswith(b",123456,1234567")
+
+
+def test_packet_longer_than_buffer(usr):
+    encoder = usr("encoder")
+    enc = encoder.PacketEncoder("$,HBT,", ("a", "b"), "*", size=12)
+    assert bytes(enc.view[:enc.encode((0, 10))]) == b"$,HBT,0,10*"
+    with pytest.raises(ValueError):
+        enc.encode((0, 1000))
+    with pytest.raises(ValueError):
+        enc.encode(("abcd", "d"))
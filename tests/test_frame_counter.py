@@ -0,0 +1,55 @@
+"""
+@file      : test_frame_counter.py
+@author    : agent (agent@local)
+@brief     : Frame number counter of the device.
+@version   : v1.0.0
+@date      : 2026-10-18 02:35:58
+@copyright : Copyright (c) 2026
+"""
+
+import struct
+
+
+def _counter(usr, tmp_path, block=10):
+    return usr("frame_counter").FrameCounter(str(tmp_path / "frame.dat"), block)
+
+
+def test_counter_in_ram(usr):
+    counter = usr("frame_counter").FrameCounter(None)
+    assert [counter.next() for _ in range(3)] == ["000001", "000002", "000003"]
+    assert counter.peek() == 4
+
+
+def test_goes_on_after_reboot(usr, tmp_path):
+    counter = _counter(usr, tmp_path)
+    numbers = [counter.next() for _ in range(15)]
+    assert numbers[0] == "000001" and numbers[-1] == "000015"
+    # Second block 11 ~ 20 is reserved, numbers after it are never used before.
+    counter = _counter(usr, tmp_path)
+    assert counter.next() == "000021"
+    for _ in range(9):
+        counter.next()
+    assert _counter(usr, tmp_path).next() == "000031"
+
+
+def test_torn_write_falls_back_to_other_slot(usr, tmp_path):
+    counter = _counter(usr, tmp_path)
+    for _ in range(15):
+        counter.next()
+    path = tmp_path / "frame.dat"
+    data = bytearray(path.read_bytes())
+    # Newest slot (generation 2) is cut by power loss, block 11 ~ 20 was not given out.
+    data[4] ^= 0xFF
+    path.write_bytes(bytes(data))
+    assert _counter(usr, tmp_path).next() == "000011"
+
+
+def test_block_rolls_over_frame_max(usr, tmp_path):
+    slot = struct.pack("<HIII", 0xA141, 1, 999998, 1 ^ 999998 ^ 0x5A5A5A5A)
+    (tmp_path / "frame.dat").write_bytes(slot * 2)
+    counter = _counter(usr, tmp_path, block=3)
+    assert [counter.next() for _ in range(3)] == ["999998", "999999", "000001"]
+    # Reserved block ends after the wrap.
+    counter = _counter(usr, tmp_path, block=3)
+    assert [counter.next() for _ in range(2)] == ["000002", "000003"]
+    assert _counter(usr, tmp_path, block=3).next() == "000005"
@@ -0,0 +1,55 @@
+"""
+@file      : test_history.py
+@author    : agent (agent@local)
+@brief     : Flash-backed history queue of the device.
+@version   : v1.0.0
+@date      : 2026-10-18 02:15:25
+@copyright : Copyright (c) 2026
+"""
+
+
+def _queue(usr, tmp_path, capacity=4):
+    return usr("history").HistoryQueue(str(tmp_path / "history.dat"), capacity=capacity, slot_size=32)
+
+
+def test_read_and_pop_by_sequence(usr, tmp_path):
+    history = _queue(usr, tmp_path)
+    for i in range(3):
+        assert history.put(b"frame%d" % i)
+    assert history.read(0, 12) == (0, [b"frame0", b"frame1"])
+    assert history.read(2) == (2, [b"frame2"])
+    assert history.pop(2, 0) == 2
+    assert history.read(0) == (2, [b"frame2"])
+
+
+def test_pop_keeps_packets_put_while_batch_in_flight(usr, tmp_path):
+    history = _queue(usr, tmp_path)
+    for i in range(4):
+        history.put(b"frame%d" % i)
+    seq, frames = history.read(0, 12)
+    assert frames == [b"frame0", b"frame1"]
+    # Queue is full, new packets drop the oldest ones of the batch in flight.
+    history.put(b"frame4")
+    history.put(b"frame5")
+    history.put(b"frame6")
+    assert history.pop(len(frames), seq) == 0
+    assert history.read(0) == (3, [b"frame3", b"frame4", b"frame5", b"frame6"])
+
+
+def test_pop_after_part_of_batch_dropped(usr, tmp_path):
+    history = _queue(usr, tmp_path)
+    for i in range(4):
+        history.put(b"frame%d" % i)
+    seq, frames = history.read(0, 12)
+    history.put(b"frame4")
+    assert history.pop(len(frames), seq) == 1
+    assert history.peek() == [b"frame2", b"frame3", b"frame4"]
+
+
+def test_reopen(usr, tmp_path):
+    history = _queue(usr, tmp_path)
+    for i in range(6):
+        history.put(b"frame%d" % i)
+    history.close()
+    history = _queue(usr, tmp_path)
+    assert history.read(0) == (0, [b"frame2", b"frame3", b"frame4", b"frame5"])
@@ -0,0 +1,70 @@
+"""
+@file      : test_logging.py
+@author    : agent (agent@local)
+@brief     : Log module of the device.
+@version   : v1.0.0
+@date      : 2026-10-18 02:16:42
+@copyright : Copyright (c) 2026
+"""
+
+import time
+
+
+def test_format(usr):
+    logging = usr("logging")
+    assert logging._format("read %s bytes", (12,)) == "read 12 bytes"
+    assert logging._format("a", ("b", 1)) == "a b 1"
+    # "%" which is not a format, e.g. a percentage.
+    assert logging._format("upload 100%", ("complete",)) == "upload 100% complete"
+
+
+def _wait(check, timeout=2):
+    end = time.time() + timeout
+    while not check() and time.time() < end:
+        time.sleep(0.001)
+    return check()
+
+
+def test_async_log_restart(usr, capsys, monkeypatch):
+    logging = usr("logging")
+    log = logging.getLogger("test")
+    flush_log = logging._flush_log
+
+    def slow_flush_log():
+        # Writer is exiting while async log is enabled again.
+        time.sleep(0.005)
+        flush_log()
+
+    monkeypatch.setattr(logging, "_flush_log", slow_flush_log)
+    try:
+        for i in range(50):
+            logging.setAsyncLog(False)
+            time.sleep(0.002)
+            logging.setAsyncLog(True)
+            log.info("record %s", i)
+            # A writer exiting after disable must not leave queued records behind.
+            assert _wait(lambda: not logging._log_queue)
+            assert logging._log_writer is not None
+    finally:
+        logging.setAsyncLog(False)
+        assert _wait(lambda: logging._log_writer is None)
+    assert "record 49" in capsys.readouterr().out
+
+
+def test_flush_block_more_than_log_size(usr, tmp_path, capsys):
+    logging = usr("logging")
+    log = logging.getLogger("test")
+    logging.setLogFile(str(tmp_path), "test.log")
+    logging.setLogFlush(4096, 60)
+    logging.setSaveLog(True, 2000, 4)
+    try:
+        for i in range(60):
+            log.info("line %03d %s", i, "x" * 40)
+        logging.flushLog()
+    finally:
+        logging.setSaveLog(False)
+        logging.setLogFlush()
+    sizes = dict((path.name, path.stat().st_size) for path in tmp_path.iterdir())
+    assert sorted(sizes) == ["test.log", "test.log.1", "test.log.2"]
+    assert max(sizes.values()) <= 2000
+    assert sum(sizes.values()) == sum(len(line) for line in capsys.readouterr().out.splitlines(True))
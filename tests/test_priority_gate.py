@@ -0,0 +1,66 @@
+"""
+@file      : test_priority_gate.py
+@author    : agent (agent@local)
+@brief     : Send lanes of the device client.
+@version   : v1.0.0
+@date      : 2026-10-18 02:30:43
+@copyright : Copyright (c) 2026
+"""
+
+import time
+import threading
+
+
+def waiter(gate, prio, granted, **kwargs):
+    def run():
+        if gate.acquire(prio, **kwargs):
+            granted.append(prio)
+            time.sleep(0.01)
+            gate.release()
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_higher_lane_granted_first(usr):
+    ais = usr("ais")
+    gate = ais.PriorityGate()
+    granted = []
+    assert gate.acquire(ais.Priority.Normal)
+    threads = [waiter(gate, ais.Priority.History, granted)]
+    time.sleep(0.05)
+    threads.append(waiter(gate, ais.Priority.Health, granted))
+    threads.append(waiter(gate, ais.Priority.Emergency, granted))
+    time.sleep(0.05)
+    gate.release()
+    for thread in threads:
+        thread.join(2)
+    assert granted == [ais.Priority.Emergency, ais.Priority.History, ais.Priority.Health]
+
+
+def test_acquire_timeout(usr):
+    ais = usr("ais")
+    gate = ais.PriorityGate()
+    assert gate.acquire(ais.Priority.Normal)
+    start = time.monotonic()
+    assert not gate.acquire(ais.Priority.Emergency, 100)
+    assert 0.09 <= time.monotonic() - start < 1
+    gate.release()
+    # A timed out higher lane does not hold back lower lanes.
+    assert gate.acquire(ais.Priority.Health, 100)
+
+
+def test_notify_wakes_ready_waiter(usr):
+    ais = usr("ais")
+    gate = ais.PriorityGate()
+    drained = []
+    granted = []
+    thread = waiter(gate, ais.Priority.History, granted, ready=lambda: bool(drained))
+    time.sleep(0.05)
+    assert granted == []
+    drained.append(True)
+    start = time.monotonic()
+    gate.notify()
+    thread.join(2)
+    assert granted == [ais.Priority.History]
+    assert time.monotonic() - start < 0.1
@@ -0,0 +1,119 @@
+"""
+@file      : test_scheduler.py
+@author    : agent (agent@local)
+@brief     : Report scheduler of the device.
+@version   : v1.0.0
+@date      : 2026-10-18 02:19:46
+@copyright : Copyright (c) 2026
+"""
+
+import time
+import threading
+
+
+class FakeClient:
+    """Timers run in their own threads like callbacks of the client I/O loop."""
+
+    def __init__(self):
+        self.senders = []
+        self.timers = []
+        self.sending = 0
+        self.overlaps = 0
+        self.lock = threading.Lock()
+
+    def set_scheduler(self, scheduler):
+        return True
+
+    def add_timer(self, interval, callback, periodic=False):
+        timer = threading.Timer(interval / 1000, callback)
+        timer.daemon = True
+        self.timers.append(timer)
+        timer.start()
+        return timer
+
+    def cancel_timer(self, timer):
+        timer.cancel()
+        return True
+
+    def send_loction_alert_information(self, **kwargs):
+        with self.lock:
+            self.sending += 1
+            self.overlaps += self.sending > 1
+        self.senders.append((time.time(), threading.get_ident()))
+        time.sleep(0.005)
+        with self.lock:
+            self.sending -= 1
+        return True
+
+
+def sent_since(client, since):
+    return [at for at, ident in client.senders if at >= since]
+
+
+def test_restart_keeps_one_schedule(usr):
+    client = FakeClient()
+    scheduler = usr("scheduler").ReportScheduler(client, dict, rate_on=0.05, coalesce=0)
+    scheduler.start()
+    time.sleep(0.02)
+    scheduler.stop()
+    scheduler.start()
+    try:
+        time.sleep(0.3)
+        since = time.time()
+        time.sleep(0.5)
+    finally:
+        scheduler.stop()
+    # One report every 50 ms, not two schedules sending at once.
+    assert 6 <= len(sent_since(client, since)) <= 12
+    assert client.overlaps == 0
+    stopped = time.time()
+    time.sleep(0.2)
+    assert sent_since(client, stopped) == []
+
+
+def test_rate_change_reschedules(usr):
+    client = FakeClient()
+    scheduler = usr("scheduler").ReportScheduler(client, dict, rate_on=60, coalesce=0)
+    scheduler.start()
+    try:
+        time.sleep(0.1)
+        assert len(client.senders) == 1
+        # Next report is one new interval after the last one, not after the old 60 seconds.
+        assert scheduler.on_command("UR", "1")
+        time.sleep(1.2)
+        assert len(client.senders) == 2
+        assert 0.9 <= client.senders[1][0] - client.senders[0][0] <= 1.2
+        # A longer interval moves the next report later.
+        scheduler.set_rate("location", 0.3)
+        time.sleep(0.4)
+        count = len(client.senders)
+        scheduler.set_rate("location", 60)
+        time.sleep(0.4)
+        assert len(client.senders) == count
+    finally:
+        scheduler.stop()
+
+
+def test_ignition_change_reschedules(usr):
+    client = FakeClient()
+    ignition = [False]
+    scheduler = usr("scheduler").ReportScheduler(client, dict, ignition=lambda: ignition[0], rate_on=0.2,
+                                                 rate_off=60, coalesce=0)
+    scheduler.start()
+    try:
+        time.sleep(0.4)
+        assert len(client.senders) == 1
+        ignition[0] = True
+        scheduler.on_ignition()
+        time.sleep(0.1)
+        # Last report was more than `rate_on` ago, so it is sent now.
+        assert len(client.senders) == 2
+        time.sleep(0.3)
+        assert len(client.senders) == 3
+        ignition[0] = False
+        scheduler.on_ignition()
+        count = len(client.senders)
+        time.sleep(0.4)
+        assert len(client.senders) == count
+    finally:
+        scheduler.stop()
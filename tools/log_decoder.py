@@ -0,0 +1,186 @@
+# Copyright (c) Quectel Wireless Solution, Co., Ltd.All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+@file      : log_decoder.py
+@author    : agent (agent@local)
+@brief     : Decode binary device logs of usr.logging to text on host.
+@version   : v1.0.0
+@date      : 2026-10-18 01:45:58
+@copyright : Copyright (c) 2026
+
+Usage:
+    python tools/log_decoder.py pigeon_tracker.log.2 pigeon_tracker.log.1 pigeon_tracker.log
+    python tools/log_decoder.py --stats pigeon_tracker.log
+"""
+
+import sys
+import time
+import struct
+import argparse
+
+MAGIC = b"QLOG\x01"
+LEVELS = ("debug", "info", "warn", "error", "critical")
+_NAME = 0x01
+_TEMPLATE = 0x02
+_RECORD = 0x10
+_HEAD = struct.Struct("<BI")
+_DOUBLE = struct.Struct("<d")
+
+
+class DecodeError(Exception):
+    pass
+
+
+def _varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise DecodeError("truncated varint")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _bytes(data, pos):
+    size, pos = _varint(data, pos)
+    if pos + size > len(data):
+        raise DecodeError("truncated string")
+    return data[pos:pos + size], pos + size
+
+
+def _arg(data, pos):
+    kind = data[pos]
+    pos += 1
+    if kind == 0x6E:
+        return None, pos
+    if kind == 0x74:
+        return True, pos
+    if kind == 0x66:
+        return False, pos
+    if kind == 0x69:
+        value, pos = _varint(data, pos)
+        return (value >> 1) ^ -(value & 1), pos
+    if kind == 0x64:
+        if pos + 8 > len(data):
+            raise DecodeError("truncated float")
+        return _DOUBLE.unpack_from(data, pos)[0], pos + 8
+    if kind == 0x62:
+        return _bytes(data, pos)
+    if kind == 0x73:
+        value, pos = _bytes(data, pos)
+        return value.decode("utf-8", "replace"), pos
+    raise DecodeError("unknown arg type 0x%02X" % kind)
+
+
+def format_message(template, args):
+    """Same as `usr.logging`, `%` format or messages joined by space."""
+    if not args:
+        return template
+    try:
+        return template % args
+    except (TypeError, ValueError):
+        return " ".join(str(i) for i in (template,) + args)
+
+
+def decode(data):
+    """Decode one binary log file.
+
+    Args:
+        data(bytes): file content
+
+    Yields:
+        tuple: (seconds, logger name, level, message)
+    """
+    if not data.startswith(MAGIC):
+        raise DecodeError("not a binary log file")
+    names = {}
+    templates = {}
+    pos = len(MAGIC)
+    while pos < len(data):
+        start = pos
+        try:
+            tag = data[pos]
+            pos += 1
+            if tag in (_NAME, _TEMPLATE):
+                index, pos = _varint(data, pos)
+                value, pos = _bytes(data, pos)
+                (names if tag == _NAME else templates)[index] = value.decode("utf-8", "replace")
+                continue
+            if not _RECORD <= tag < _RECORD + len(LEVELS):
+                raise DecodeError("unknown tag 0x%02X at %s" % (tag, start))
+            if start + _HEAD.size > len(data):
+                raise DecodeError("truncated record")
+            _, secs = _HEAD.unpack_from(data, start)
+            pos = start + _HEAD.size
+            name_id, pos = _varint(data, pos)
+            template_id, pos = _varint(data, pos)
+            if name_id:
+                name = names.get(name_id, "#%s" % name_id)
+            else:
+                name, pos = _bytes(data, pos)
+                name = name.decode("utf-8", "replace")
+            if template_id:
+                template = templates.get(template_id, "#%s" % template_id)
+            else:
+                template, pos = _bytes(data, pos)
+                template = template.decode("utf-8", "replace")
+            argc = data[pos]
+            pos += 1
+            args = []
+            for _ in range(argc):
+                value, pos = _arg(data, pos)
+                args.append(value)
+        except (DecodeError, IndexError) as e:
+            # A record cut by power loss is the end of file.
+            sys.stderr.write("stop at byte %s: %s\n" % (start, e))
+            return
+        yield secs, name, LEVELS[tag - _RECORD], format_message(template, tuple(args))
+
+
+def to_text(secs, name, level, message):
+    """Text line as printed on device."""
+    return "[{}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}][{}][{}] {}".format(
+        *time.gmtime(secs)[:6], name, level, message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode binary logs of usr.logging.")
+    parser.add_argument("files", nargs="+", help="log files, oldest first")
+    parser.add_argument("--stats", action="store_true", help="print binary and text sizes")
+    args = parser.parse_args()
+    binary_size = 0
+    text_size = 0
+    records = 0
+    for path in args.files:
+        with open(path, "rb") as f:
+            data = f.read()
+        binary_size += len(data)
+        for record in decode(data):
+            line = to_text(*record)
+            records += 1
+            text_size += len(line.encode("utf-8")) + 1
+            if not args.stats:
+                print(line)
+    if args.stats:
+        print("records %s, binary %s bytes, text %s bytes, %.1fx" % (
+            records, binary_size, text_size, text_size / binary_size if binary_size else 0))
+
+
+if __name__ == "__main__":
+    main()